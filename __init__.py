@@ -1,6 +1,6 @@
 # ipblock package
 
-__all__ = ("ipv4", "ipv6")
+__all__ = ("ipv4", "ipv6", "ipv4compare", "ipv4trie", "ipv4file", "ipv4parse", "ipv4shard", "ipprobe", "ipv4interval", "ipv4live", "ipv4pool", "ipv4stats", "ipv4ingest", "ipv4cache", "ipv4shm", "ipv4bitmap")
 
 
 
@@ -0,0 +1,3 @@
+# bench - reproducible benchmarks for the ipblock hot paths
+#
+# python -m bench.run --help from the top of the source tree
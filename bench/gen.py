@@ -0,0 +1,98 @@
+# bench.gen - deterministic synthetic routing tables for benchmarks.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Synthetic prefix tables that look enough like a BGP table to exercise
+the same code paths: mostly /24s, a spread of shorter prefixes, more
+specifics nested inside other prefixes, and runs of adjacent siblings.
+The same seed always gives the same table.
+"""
+
+import random
+from ipv4 import IPv4Addr, IPv4CIDR, IPv4NetMask
+
+# rough shape of the prefix length histogram of a full IPv4 table
+_lengths = [(8,1),(12,2),(14,4),(16,60),(17,20),(18,40),(19,80),(20,120),
+            (21,140),(22,220),(23,200),(24,1100)]
+
+def _pick(rnd,weights):
+  total = sum([w for n,w in weights])
+  x = rnd.uniform(0,total)
+  for n,w in weights:
+    x -= w
+    if x <= 0:
+      return n
+  return weights[-1][0]
+
+def prefixes(n,seed=1,nested=0.1,siblings=0.15):
+  """generate n (start,nbits) pairs in feed order, i.e. not sorted.
+  nested is the share of prefixes placed inside an earlier one and
+  siblings the share placed right after an earlier one"""
+  rnd = random.Random(seed)
+  out = []
+  for i in xrange(n):
+    r = rnd.random()
+    if out and r < nested:
+      s, b = out[rnd.randrange(len(out))]
+      nb = min(32,b + rnd.randint(1,8))
+      s |= rnd.getrandbits(nb - b) << (32 - nb) if nb > b else 0
+      out.append((s,nb))
+    elif out and r < nested + siblings:
+      s, b = out[-1]
+      s += 1L << (32 - b)
+      if s <= 0xFFFFFFFFL:
+        out.append((s,b))
+        continue
+      out.append((0x0A000000,b))
+    else:
+      b = _pick(rnd,_lengths)
+      first = rnd.randint(1,223) # unicast space
+      s = (first << 24 | rnd.getrandbits(24)) & (0xFFFFFFFFL << (32 - b))
+      out.append((s & 0xFFFFFFFFL,b))
+  return out
+
+def cidrs(n,seed=1):
+  "the same table as prefixes(), as IPv4CIDR objects"
+  masks = [IPv4NetMask(b) for b in range(33)]
+  return [IPv4CIDR(IPv4Addr(s),masks[b]) for s,b in prefixes(n,seed)]
+
+def addresses(n,seed=2):
+  "n random unicast addresses as ints, for lookup benchmarks"
+  rnd = random.Random(seed)
+  return [rnd.randint(0x01000000,0xDFFFFFFF) for i in xrange(n)]
+
+def v6strings(n,seed=3):
+  "n random IPv6 addresses in a mix of text forms"
+  rnd = random.Random(seed)
+  out = []
+  for i in xrange(n):
+    g = [0x2001,rnd.getrandbits(16)] + [rnd.getrandbits(16)*(rnd.random() < .5)
+                                         for j in range(6)]
+    out.append(":".join(["%x" % x for x in g]).replace(":0:0:","::",1))
+  return out
@@ -0,0 +1,245 @@
+# bench.run - time the ipblock hot paths and compare with a baseline.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Run from the top of the source tree:
+
+  python -m bench.run                        all scenarios at 10k,100k,1M
+  python -m bench.run -s 10000,100000 -o contains_array,normalize
+  python -m bench.run --save bench/baseline.json
+  python -m bench.run --compare bench/baseline.json
+
+Every scenario runs in a forked child so that peak memory is measured
+per scenario. All the scenarios are run --repeat times over and each
+one's median run is reported. Throughput is operations per second of
+the timed part only; setup such as generating the table is not timed.
+With --compare a scenario more than --tolerance slower than the
+baseline is reported as a regression and the exit status is 1. Record
+and compare baselines on the same machine.
+"""
+
+import sys, time, json, resource, multiprocessing, optparse, traceback
+from ipv4 import IPv4Addr, IPv4CIDR, IPv4NetMask, IPv4RangeList, \
+                 IPv4RangeArray
+from ipv6 import IPv6Addr
+from bench import gen
+
+# each scenario is setup(n) -> state, then run(state) -> operation count
+
+def _table(n):
+  return gen.cidrs(n)
+
+def _list(n):
+  return IPv4RangeList(gen.cidrs(n))
+
+def _lookups(n,k):
+  return _list(n), [IPv4Addr(a) for a in gen.addresses(k)]
+
+def _build_list(rl):
+  IPv4RangeList(rl)
+  return len(rl)
+
+def _build_array(rl):
+  IPv4RangeArray(rl)
+  return len(rl)
+
+def _contains(state):
+  rl, addrs = state
+  for a in addrs:
+    a in rl
+  return len(addrs)
+
+def _contains_many(state):
+  ra, addrs = state
+  ra.contains_many(addrs)
+  return len(addrs)
+
+def _extend(state):
+  a, b = state
+  a.extend(b)
+  return len(b)
+
+def _normalize(rl):
+  n = len(rl)
+  rl.normalize()
+  return n
+
+def _span(rl):
+  rl.span()
+  return len(rl)
+
+def _cidr(state):
+  addrs, masks = state
+  for a,m in zip(addrs,masks):
+    IPv4CIDR(a,m)
+  return len(addrs)
+
+def _v6parse(strings):
+  for s in strings:
+    IPv6Addr(s)
+  return len(strings)
+
+def _halves(n):
+  t = gen.cidrs(n)
+  return IPv4RangeList(t[::2]), IPv4RangeList(t[1::2])
+
+def _cidrstate(n):
+  masks = [IPv4NetMask(b) for b in range(33)]
+  return ([IPv4Addr(s) for s,b in gen.prefixes(n)],
+          [masks[b] for s,b in gen.prefixes(n)])
+
+SCENARIOS = [
+  # name, setup, run
+  ("build_list",_table,_build_list),
+  ("build_array",_list,_build_array),
+  # IPv4RangeList.__contains__ is a linear scan, so only a few lookups
+  ("contains_list",lambda n: _lookups(n,20),_contains),
+  ("contains_array",lambda n: (_list(n).compact(),
+                               [IPv4Addr(a) for a in gen.addresses(100000)]),
+   _contains),
+  ("contains_many",lambda n: (_list(n).compact(),gen.addresses(1000000)),
+   _contains_many),
+  ("extend",_halves,_extend),
+  ("normalize",_list,_normalize),
+  ("span",_list,_span),
+  ("cidr",_cidrstate,_cidr),
+  ("ipv6_parse",gen.v6strings,_v6parse),
+]
+
+def _child(setup,run,n,conn):
+  "time one scenario, sending the figures or the traceback if it raises"
+  try:
+    state = setup(n)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t = time.time()
+    ops = run(state)
+    elapsed = time.time() - t
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send((ops,elapsed,peak,peak - before))
+  except Exception:
+    conn.send(traceback.format_exc())
+  conn.close()
+
+def measure(name,n):
+  """run one scenario at size n in a child, returning a result dict, or
+  raising RuntimeError if the scenario failed or the child died"""
+  for sname,setup,run in SCENARIOS:
+    if sname == name:
+      break
+  else:
+    raise ValueError("no scenario %s" % name)
+  parent, child = multiprocessing.Pipe(False)
+  p = multiprocessing.Process(target=_child,args=(setup,run,n,child))
+  p.start()
+  child.close() # so recv sees EOF if the child dies without sending
+  try:
+    got = parent.recv()
+  except EOFError:
+    got = None
+  p.join()
+  if got is None:
+    got = "child exited with code %s\n" % p.exitcode
+  if isinstance(got,str):
+    raise RuntimeError("%s/%d failed:\n%s" % (name,n,got))
+  ops, elapsed, peak, grew = got
+  return {"scenario": name, "n": n, "ops": ops,
+          "seconds": round(elapsed,4),
+          "ops_per_sec": round(ops/max(elapsed,1e-9),1),
+          "peak_kb": peak, "grew_kb": grew}
+
+def _median(runs):
+  "the run with the median time, noting how many it was taken from"
+  r = dict(sorted(runs,key=lambda r: r["seconds"])[len(runs) // 2])
+  r["repeat"] = len(runs)
+  return r
+
+def _key(r):
+  return "%s/%d" % (r["scenario"],r["n"])
+
+def main(argv=None):
+  op = optparse.OptionParser(usage="python -m bench.run [options]")
+  op.add_option("-s","--sizes",default="10000,100000,1000000",
+                help="comma separated table sizes")
+  op.add_option("-o","--only",default="",
+                help="comma separated scenario names, default all")
+  op.add_option("--save",help="write the results as a baseline file")
+  op.add_option("--compare",help="compare with a baseline file")
+  op.add_option("-r","--repeat",type="int",default=5,
+                help="passes to take each median from, default 5")
+  op.add_option("--tolerance",type="float",default=0.4,
+                help="allowed slowdown before flagging, default 0.4")
+  opts, args = op.parse_args(argv)
+  sizes = [int(x) for x in opts.sizes.split(",")]
+  names = opts.only and opts.only.split(",") or [s[0] for s in SCENARIOS]
+  baseline = {}
+  if opts.compare:
+    baseline = dict([(_key(r),r) for r in json.load(open(opts.compare))])
+  # whole passes over the scenarios, so that a burst of load on the
+  # machine lands on one run of several scenarios, not every run of one
+  runs, failed = {}, set()
+  for i in xrange(opts.repeat):
+    for n in sizes:
+      for name in names:
+        k = "%s/%d" % (name,n)
+        if k in failed:
+          continue
+        try:
+          runs.setdefault(k,[]).append(measure(name,n))
+        except RuntimeError, e:
+          sys.stderr.write("%s\n" % e)
+          failed.add(k)
+    sys.stderr.write("pass %d of %d done\n" % (i + 1,opts.repeat))
+  results, regressions = [], 0
+  print "%-16s %8s %14s %10s %10s  %s" % ("scenario","n","ops/sec",
+                                           "peak KB","grew KB","vs baseline")
+  for n in sizes:
+    for name in names:
+      if "%s/%d" % (name,n) in failed:
+        print "%-16s %8d  FAILED" % (name,n)
+        continue
+      r = _median(runs["%s/%d" % (name,n)])
+      results.append(r)
+      note = ""
+      b = baseline.get(_key(r))
+      if b:
+        ratio = r["ops_per_sec"]/b["ops_per_sec"]
+        note = "%.2fx" % ratio
+        if ratio < 1 - opts.tolerance:
+          note += " REGRESSION"
+          regressions += 1
+      print "%-16s %8d %14.1f %10d %10d  %s" % (name,n,r["ops_per_sec"],
+                                                r["peak_kb"],r["grew_kb"],note)
+  if opts.save:
+    f = open(opts.save,"w")
+    json.dump(results,f,indent=1,sort_keys=True)
+    f.close()
+  return 1 if regressions or failed else 0
+
+if __name__ == "__main__":
+  sys.exit(main())
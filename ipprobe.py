@@ -0,0 +1,218 @@
+# ipprobe - opt-in counters and timers for the ipv4 and ipv6 hot paths.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Find out where a slow job spends its time: comparisons, object
+creation, or range list lookups.
+
+  import ipprobe
+  with ipprobe.enabled():
+    ... the slow job ...
+    print ipprobe.report()
+
+While enabled, the methods of the ipv4 and ipv6 classes are replaced by
+wrappers that count calls and time them; lookups in range lists also
+record their probe lengths, i.e. ranges scanned by the linear
+IPv4RangeList search or bisect steps for the array backed lists. When
+disabled the original methods are put back, so there is no cost at all.
+Times include nested calls, so the time of a lookup includes the time of
+the comparisons it makes.
+"""
+
+import timeit
+import ipv4, ipv6
+
+_clock = timeit.default_timer
+_stats = {} # name -> [calls, seconds, probes]
+_patches = [] # (owner, attribute, original) to undo
+_missing = object()
+
+# methods to time, by class
+_methods = {
+  ipv4.IPv4Addr: ("__cmp__","__eq__","__ne__","__lt__","__le__","__gt__",
+                  "__ge__","__hash__","__add__","__sub__","__and__","__or__",
+                  "__xor__","__lshift__","__rshift__"),
+  ipv4.IPv4Range: ("__cmp__","__eq__","__ne__","__lt__","__le__","__gt__",
+                   "__ge__","__hash__","lessthan","__contains__","overlaps",
+                   "adjacent","join","difference","to_cidrs"),
+  ipv4.IPv4RangeList: ("append","extend","normalize","span","union",
+                       "intersection","difference","symmetric_difference",
+                       "compact","aggregate"),
+  ipv4.IPv4RangeArray: ("append","normalize","span","union","intersection",
+                        "difference","symmetric_difference","aggregate"),
+  ipv4.IPv4RangeMap: ("get","get_many","find_many","set","remove"),
+  ipv6.IPv6Addr: ("__cmp__","__eq__","__ne__","__lt__","__le__","__gt__",
+                  "__ge__","__hash__","__add__","__sub__","__and__","__or__",
+                  "__xor__","__lshift__","__rshift__"),
+  ipv6.IPv6Range: ("__cmp__","__eq__","__contains__","overlaps","adjacent",
+                   "join","difference","to_cidrs"),
+  ipv6.IPv6RangeList: ("append","extend","normalize","span","union",
+                       "intersection","difference","symmetric_difference",
+                       "compact","aggregate"),
+  ipv6.IPv6RangeArray: ("append","normalize","span","union","intersection",
+                        "difference","symmetric_difference","aggregate"),
+}
+# classes whose instances are counted as they are created
+_created = (ipv4.IPv4Addr,ipv4.IPv4Mask,ipv4.IPv4NetMask,ipv4.IPv4Range,
+            ipv4.IPv4CIDR,ipv6.IPv6Addr,ipv6.IPv6NetMask,ipv6.IPv6Range,
+            ipv6.IPv6CIDR)
+# module level aliases of __new__ used to build objects without __init__
+_aliases = ((ipv4,"_newaddr"),(ipv4,"_newcidr"),(ipv4,"_newview"),
+            (ipv6,"_newaddr"),(ipv6,"_newcidr"))
+
+def _record(name,seconds,probes=0):
+  s = _stats.get(name)
+  if s is None:
+    s = _stats[name] = [0,0.0,0]
+  s[0] += 1
+  s[1] += seconds
+  s[2] += probes
+
+def _timed(name,f):
+  def wrapper(*args,**kw):
+    t = _clock()
+    try:
+      return f(*args,**kw)
+    finally:
+      _record(name,_clock() - t)
+  return wrapper
+
+def _creation(f):
+  def wrapper(self,*args,**kw):
+    if type(self).__init__.im_func is wrapper: # not a chained super __init__
+      _record(type(self).__name__ + " created",0.0)
+    return f(self,*args,**kw)
+  return wrapper
+
+def _newalias(f):
+  def wrapper(cls,*args):
+    _record(cls.__name__ + " created",0.0)
+    return f(cls,*args)
+  return wrapper
+
+def _scan(name,f):
+  "IPv4RangeList.__contains__ reworked to count the ranges it scans"
+  def wrapper(self,other):
+    t = _clock()
+    n, found = 0, False
+    for i in self:
+      n += 1
+      if other in i:
+        found = True
+        break
+    _record(name,_clock() - t,n)
+    return found
+  return wrapper
+
+def _bisected(name,f,batch=False):
+  "array lookups, the probes are the bisect steps per address"
+  def wrapper(self,a):
+    t = _clock()
+    try:
+      return f(self,a)
+    finally:
+      steps = len(self).bit_length()
+      if batch:
+        steps *= hasattr(a,"__len__") and len(a) or 1
+      _record(name,_clock() - t,steps)
+  return wrapper
+
+def _patch(owner,attr,wrap):
+  original = owner.__dict__.get(attr,_missing)
+  f = getattr(owner,attr)
+  _patches.append((owner,attr,original))
+  setattr(owner,attr,wrap(f))
+
+def enable():
+  "install the wrappers; calling it again while enabled does nothing"
+  if _patches:
+    return
+  for cls,names in _methods.items():
+    for m in names:
+      if m in cls.__dict__:
+        name = "%s.%s" % (cls.__name__,m)
+        _patch(cls,m,lambda f,name=name: _timed(name,f))
+  for cls in _created:
+    if "__init__" in cls.__dict__:
+      _patch(cls,"__init__",_creation)
+  for module,attr in _aliases:
+    _patch(module,attr,_newalias)
+  for cls in (ipv4.IPv4RangeList,ipv6.IPv6RangeList):
+    _patch(cls,"__contains__",
+           lambda f,name=cls.__name__ + ".__contains__": _scan(name,f))
+  for cls in (ipv4.IPv4RangeArray,ipv6.IPv6RangeArray):
+    for m,batch in (("__contains__",False),("find",False),
+                    ("contains_many",True),("find_many",True)):
+      name = "%s.%s" % (cls.__name__,m)
+      _patch(cls,m,lambda f,name=name,batch=batch: _bisected(name,f,batch))
+
+def disable():
+  "put the original methods back; the counts are kept"
+  while _patches:
+    owner, attr, original = _patches.pop()
+    if original is _missing:
+      delattr(owner,attr)
+    else:
+      setattr(owner,attr,original)
+
+def is_enabled():
+  return bool(_patches)
+
+def reset():
+  "clear the counts"
+  _stats.clear()
+
+class enabled(object):
+  "with ipprobe.enabled(): ... enables, resets the counts and disables"
+  def __enter__(self):
+    reset()
+    enable()
+    return self
+  def __exit__(self,*exc):
+    disable()
+
+def snapshot():
+  "the counts so far as {name: {'calls','seconds','probes'}}"
+  return dict([(k,{"calls": c,"seconds": s,"probes": p})
+               for k,(c,s,p) in _stats.items()])
+
+def report(snap=None):
+  "the counts as a text table, the most time consuming first"
+  if snap is None:
+    snap = snapshot()
+  lines = ["%-36s %10s %10s %10s %10s" % ("operation","calls","seconds",
+                                           "usec/call","probes/call")]
+  for k,v in sorted(snap.items(),key=lambda kv: (-kv[1]["seconds"],kv[0])):
+    c = v["calls"]
+    lines.append("%-36s %10d %10.4f %10.2f %10.1f" %
+                 (k,c,v["seconds"],1e6*v["seconds"]/c,float(v["probes"])/c))
+  return "\n".join(lines)
+
+if __name__ == "__main__":
+  print "This is an import module"
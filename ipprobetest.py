@@ -0,0 +1,101 @@
+# ipprobetest - unit test the ipprobe module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+import ipprobe
+from ipv4 import *
+from ipv6 import IPv6Addr, IPv6Range, IPv6RangeList
+
+class testProbe(unittest.TestCase):
+  def tearDown(self):
+    ipprobe.disable()
+    ipprobe.reset()
+  def testDisabledLeavesClassesAlone(self):
+    before = dict(IPv4Addr.__dict__), dict(IPv4RangeList.__dict__)
+    ipprobe.enable()
+    self.assertTrue(ipprobe.is_enabled())
+    self.assertNotEqual(before[0]["__lt__"],IPv4Addr.__dict__["__lt__"])
+    ipprobe.disable()
+    self.assertFalse(ipprobe.is_enabled())
+    self.assertEqual(before,(dict(IPv4Addr.__dict__),
+                             dict(IPv4RangeList.__dict__)))
+  def testCounts(self):
+    with ipprobe.enabled():
+      a = IPv4Addr("10.0.0.1")
+      b = IPv4Addr("10.0.0.2")
+      a < b
+      a < b
+      a + 1
+      IPv4CIDR("10.0.0.0",IPv4NetMask(24))
+      IPv4Mask("255.255.255.0")
+    snap = ipprobe.snapshot()
+    self.assertEqual(2,snap["IPv4Addr.__lt__"]["calls"])
+    self.assertEqual(1,snap["IPv4Addr.__add__"]["calls"])
+    self.assertTrue(snap["IPv4Addr created"]["calls"] >= 3)
+    self.assertEqual(1,snap["IPv4CIDR created"]["calls"])
+    self.assertEqual(1,snap["IPv4NetMask created"]["calls"])
+    self.assertEqual(1,snap["IPv4Mask created"]["calls"])
+  def testProbeLengths(self):
+    rl = IPv4RangeList([IPv4Range("10.0.%d.0" % i,"10.0.%d.255" % i)
+                        for i in range(8)])
+    ra = IPv4RangeArray(rl)
+    with ipprobe.enabled():
+      self.assertTrue("10.0.5.1" in rl)
+      self.assertFalse("10.1.0.0" in rl)
+      self.assertTrue("10.0.5.1" in ra)
+      ra.contains_many(["10.0.0.1","10.0.1.1"])
+    snap = ipprobe.snapshot()
+    self.assertEqual(2,snap["IPv4RangeList.__contains__"]["calls"])
+    self.assertEqual(6 + 8,snap["IPv4RangeList.__contains__"]["probes"])
+    self.assertEqual(4,snap["IPv4RangeArray.__contains__"]["probes"])
+    self.assertEqual(8,snap["IPv4RangeArray.contains_many"]["probes"])
+  def testIPv6(self):
+    rl = IPv6RangeList([IPv6Range("2001:db8::","2001:db8::ffff")])
+    with ipprobe.enabled():
+      self.assertTrue("2001:db8::1" in rl)
+      IPv6Addr("::1") == IPv6Addr("::1")
+    snap = ipprobe.snapshot()
+    self.assertEqual(1,snap["IPv6RangeList.__contains__"]["probes"])
+    self.assertEqual(1,snap["IPv6Addr.__eq__"]["calls"])
+  def testReport(self):
+    with ipprobe.enabled():
+      IPv4Addr("1.2.3.4") < IPv4Addr("1.2.3.5")
+    text = ipprobe.report()
+    self.assertTrue(text.startswith("operation"))
+    self.assertTrue("IPv4Addr.__lt__" in text)
+    self.assertEqual(1,len(ipprobe.report({}).split("\n")))
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testProbe))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
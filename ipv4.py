@@ -27,7 +27,12 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-import socket, struct, bisect
+import socket, struct, bisect, sys, operator
+from array import array
+try:
+  import numpy # optional, speeds up the bulk lookups
+except ImportError:
+  numpy = None
 
 _structunpack = struct.unpack
 _structpack = struct.pack
@@ -41,23 +46,36 @@ _hbits = ('0000', '0001', '0010', '0011', # hex bits for printing
           '0100', '0101', '0110', '0111', # numbers in binary format
           '1000', '1001', '1010', '1011',
           '1100', '1101', '1110', '1111')
+# typecode for packed arrays of unsigned 32-bit ints
+_u32 = [t for t in ('I', 'L') if array(t).itemsize == 4][0]
+_bisectright = bisect.bisect_right
+
 class IPv4Addr(object):
   "32-bit IPv4 addresses"
-  __slots__ = ["bits"] # reduce storage required for an instance
+  __slots__ = ["num"] # one native int, keeps instances small and fast
 
   def __init__(self,a):
     "initialize from either a long int or a dotted quad string"
     if isinstance(a,str):
       if len(a) == 4:
-        self.bits = a
+        self.num = _structunpack('!L',a)[0]
       else:
-        self.bits = _sockinetaton(a)
+        self.num = _structunpack('!L',_sockinetaton(a))[0]
     elif isinstance(a,(long,int)):
-      self.bits = _structpack('!L',a)
+      if a < 0 or a > 0xFFFFFFFFL:
+        raise ValueError("IPv4 address out of range")
+      self.num = a
+    elif isinstance(a,IPv4Addr):
+      self.num = a.num
+
+  @property
+  def bits(self):
+    "the address as a 4 byte string in network order"
+    return _structpack('!L',self.num)
 
   def __str__(self):
     "show it as dotted quad"
-    return _sockinetntoa(self.bits)
+    return _sockinetntoa(_structpack('!L',self.num))
 
   @staticmethod
   def bstr(n): # n in range 0-255
@@ -65,34 +83,52 @@ class IPv4Addr(object):
 
   def __cmp__(self,other):
     "make comparisons work"
-    return cmp(self.bits,other.bits)
+    return cmp(self.num,other.num)
+  def __eq__(self,other):
+    return isinstance(other,IPv4Addr) and self.num == other.num
+  def __ne__(self,other):
+    return not isinstance(other,IPv4Addr) or self.num != other.num
+  def __lt__(self,other):
+    return self.num < other.num
+  def __le__(self,other):
+    return self.num <= other.num
+  def __gt__(self,other):
+    return self.num > other.num
+  def __ge__(self,other):
+    return self.num >= other.num
+  def __hash__(self):
+    return hash(self.num)
+  def __int__(self):
+    return self.num
+  def __long__(self):
+    return long(self.num)
+
   def __add__(self,n):
-     a1 = _structunpack("!L",self.bits)[0]
-     a1 = (a1 + 1) & 0xffffffffL
-     return IPv4Addr(a1)
+     return _mkaddr((self.num + n) & 0xffffffffL)
+  __radd__ = __add__
+  def __sub__(self,n):
+     "address minus an int is an address, minus an address is an int"
+     if isinstance(n,IPv4Addr):
+       return self.num - n.num
+     return _mkaddr((self.num - n) & 0xffffffffL)
   def __lshift__(self,n):
-     a1 = "".join([chr((ord(x)<<n)&0xff) for x in self.bits])
-     return IPv4Addr(a1)
+     return _mkaddr((self.num << n) & 0xffffffffL)
   def __rshift__(self,n):
-     a1 = "".join([chr((ord(x)>>n)&0xff) for x in self.bits])
-     return IPv4Addr(a1)
+     return _mkaddr(self.num >> n)
   def __or__(self,m):
-     return IPv4Addr("".join([chr(ord(x)|ord(y)) 
-                              for x,y in zip(self.bits,m.bits)]))
+     return _mkaddr(self.num | m.num)
   def __xor__(self,m):
-     return IPv4Addr("".join([chr(ord(x)^ord(y)) 
-                              for x,y in zip(self.bits,m.bits)]))
+     return _mkaddr(self.num ^ m.num)
   def __and__(self,m):
-     return IPv4Addr("".join([chr(ord(x)&ord(y)) 
-                              for x,y in zip(self.bits,m.bits)]))
+     return _mkaddr(self.num & m.num)
   def rrot(self,n):
-     a1 = _structunpack("!L",self.bits)[0]
+     a1 = self.num
      a1 = (a1>>(n%32))|(a1<<(32-(n%32))&0xffffffffL)
-     return IPv4Addr(a1)
+     return _mkaddr(a1)
   def lrot(self,n):
-     a1 = _structunpack("!L",self.bits)[0]<<(n%32)
+     a1 = self.num<<(n%32)
      a1 = (a1&0xffffffffL)|(a1&0xffffffff00000000L)>>32
-     return IPv4Addr(a1)
+     return _mkaddr(a1)
 
   def tobin(self):
     return ''.join([ ''.join((_hbits[ord(i)>>4],
@@ -101,7 +137,7 @@ class IPv4Addr(object):
     return ''.join([ ''.join((_hdigs[ord(i)>>4],
                               _hdigs[ord(i)&0xf])) for i in self.bits])
   def tolong(self):
-    return long(_structunpack("!L",self.bits)[0])
+    return long(self.num)
 
   @staticmethod
   def quad2long(ip):
@@ -115,8 +151,16 @@ class IPv4Addr(object):
     "return an array of integer octets"
     return [ord(o) for o in self.bits]
 
+_newaddr = IPv4Addr.__new__
+def _mkaddr(n):
+  "build an IPv4Addr from an int known to be in range, skipping __init__"
+  a = _newaddr(IPv4Addr)
+  a.num = n
+  return a
+
 class IPv4Range(object):
-  __slots__ = ["start","end"] # reduce storage required for an instance
+  "ranges are hashable and ordered by start then end, so treat as immutable"
+  __slots__ = ["start","end","_key"] # reduce storage required for an instance
   def __init__(self,s,e):
     if isinstance(s,IPv4Addr): 
       self.start = s
@@ -126,51 +170,39 @@ class IPv4Range(object):
       self.end = e
     else:
       self.end = IPv4Addr(e)
+    self._key = self.start.num << 32 | self.end.num
   def __str__(self):
     return self.start.long2quad() + " - " + self.end.long2quad()
   def __len__(self):
-    return self.end.tolong() - self.start.tolong() + 1
+    return self.end.num - self.start.num + 1
+  def key(self):
+    "sort key, ordering by start then end"
+    return self._key
   def __cmp__(self,other):
-    if self.start == other.start and self.end == other.end:
-      result = 0
-    elif self.lessthan(other):
-      result = -1
-    else:
-      result = 1
-    return result
+    return cmp(self._key,other._key)
+  def __eq__(self,other):
+    return isinstance(other,IPv4Range) and self._key == other._key
+  def __ne__(self,other):
+    return not (isinstance(other,IPv4Range) and self._key == other._key)
+  def __lt__(self,other):
+    return self._key < other._key
+  def __le__(self,other):
+    return self._key <= other._key
+  def __gt__(self,other):
+    return self._key > other._key
+  def __ge__(self,other):
+    return self._key >= other._key
+  def __hash__(self):
+    return hash(self._key)
   def lessthan(self,other):
-    if self.start == other.start and self.end == other.end:
-      result = False
-    elif self.start < other.start:
-      result = True
-    elif self.start > other.start:
-      result = False
-    elif self.end < other.end: # having eliminated < and > we have starts ==
-      result = True
-    elif self.end > other.end:
-      result = False
-    else:
-      result = False # at this point starts and ends are equal
-    return result
+    return self._key < other._key
   def difference(self,other): 
     "subtract another range returning a list of ranges"
-    if isinstance(self,IPv4Addr):
-      other = IPv4Range(other.bits,other.bits) # create range of 1 addr
-    if self.overlaps(other):
-      if self.start == other.start:
-        if self.end == other.end:
-          return IPv4RangeList() # return empty list
-        else:
-          return IPv4RangeList([IPv4Range(other.end + 1,other.end)])
-      elif self.end == other.end:
-        return IPv4RangeList([IPv4Range(self.start,other.start-1)])
-      elif other.start < self.start and self.end < other.end:
-        return IPv4RangeList() # return empty list
-      else:
-        return IPv4RangeList([IPv4Range(self.start,other.start-1),
-                              IPv4Range(other.end + 1,other.end)])
-    else:
-      return(IPv4RangeList([self])) # return list containing self
+    if not isinstance(other,IPv4Range):
+      other = IPv4Range(other,other) # create range of 1 addr
+    return IPv4RangeList._frompairs(_combine([(self.start.num,
+                                               self.end.num)],
+                                             _pairs(other),_opdiff))
 
   def join(self,other):
     "combine two continuous ranges"
@@ -207,8 +239,8 @@ class IPv4Range(object):
       return False
 
   def __iter__(self): #generate a list of all addrs in range
-    for a in xrange(self.start.tolong(),self.end.tolong()+1):
-      yield IPv4Addr(a)
+    for a in xrange(self.start.num,self.end.num+1):
+      yield _mkaddr(a)
     
   def overlaps(self,r):
     "does self overlap the argument range"
@@ -228,45 +260,46 @@ class IPv4Range(object):
     else:
       return False
   def addrs(self):
-    "returns a list of all addrs in the range"
-    a = []
-    for x in range(_structunpack("!L",self.start.bits)[0],
-                   _structunpack("!L",self.end.bits)[0]):
-      a.append(IPv4Addr(x))
-    a.append(self.end)
-    return a
-  def subtract(self,r): # may be faster to do set ops
+    "returns a lazy sequence of all addrs in the range"
+    return IPv4AddrView(IPv4RangeArray._frompairs([(self.start.num,
+                                                    self.end.num)]))
+  def subtract(self,r):
     "returns a list of all ranges in self not overlapping r"
-    if not isinstance(r,IPv4Range):
-      r = IPv4Range(r,r)
-    if self == r:
-      return self
+    return self.difference(r)
+  def to_cidrs(self):
+    "generate the minimal list of IPv4CIDR blocks covering the range"
+    for s,n in _cidrsplit(self.start.num,self.end.num):
+      yield _mkcidr(s,n)
   # return intersections, unions, spans (smallest supernet containing both)
 
 class IPv4Mask(object):
-  __slots__ = ["bits"] # reduce storage required for an instance
+  __slots__ = ["num"] # reduce storage required for an instance
   def __init__(self,m):
     if isinstance(m,str):
       if len(m) == 4:
-        self.bits = m
+        self.num = _structunpack('!L',m)[0]
       else:
-        self.bits = _sockinetaton(m)
-    elif isinstance(m,long):
-      self.bits = _structpack('!L',m)
+        self.num = _structunpack('!L',_sockinetaton(m))[0]
+    elif isinstance(m,(long,int)):
+      self.num = m & 0xFFFFFFFFL
+  @property
+  def bits(self):
+    "the mask as a 4 byte string in network order"
+    return _structpack('!L',self.num)
   def __str__(self):
     return self.bits.encode("hex_codec")
   def inversemask(self):
       "inverse mask as used for matching in ACLs and firewall rules"
-      # this has to mask off 8 bits due to python's arbitrary length ints
-      return IPv4Mask("".join([chr(~ord(m)&0xff) for m in self.bits]))
+      # this has to mask off 32 bits due to python's arbitrary length ints
+      return IPv4Mask(~self.num & 0xFFFFFFFFL)
 
 class IPv4NetMask(IPv4Mask):
-  __slots__ = ["numbits","bits"] # reduce storage required for an instance
+  __slots__ = ["numbits"] # reduce storage required for an instance
   def __init__(self,b):
     "a mask of n bits as a long integer"
     if b>=0 and b<=32:
       self.numbits = b
-      self.bits = _structpack('!L',0xFFFFFFFFL - ((1L<<(32 - self.numbits))-1))
+      self.num = 0xFFFFFFFFL - ((1L<<(32 - self.numbits))-1)
     else:
       raise ValueError,"IPv4Mask init"
   def __str__(self):
@@ -281,27 +314,151 @@ class IPv4NetMask(IPv4Mask):
     return 2**(32-self.numbits)
 
 class IPv4CIDR(IPv4Range):
-  __slots__ = ["start","end","mask"] # reduce storage required for an instance
+  __slots__ = ["mask"] # start and end come from IPv4Range
   def __init__(self,s,m):
+    """from an address and an IPv4Mask, a mask string, or an int that is
+    a prefix length if 0 to 32 and a netmask if larger"""
     if isinstance(m,IPv4Mask): 
       self.mask = m
+    elif isinstance(m,(int,long)) and 0 <= m <= 32:
+      self.mask = _netmasks[m]
     else:
       self.mask = IPv4Mask(m)
-    if isinstance(s,IPv4Addr): 
-      self.start = s & self.mask
-    else:
-      self.start = IPv4Addr(s) & self.mask
-    self.end = self.start | self.mask.inversemask()
+    if not isinstance(s,IPv4Addr): 
+      s = IPv4Addr(s)
+    m = self.mask.num
+    self.start = _mkaddr(s.num & m)
+    self.end = _mkaddr(s.num & m | (~m & 0xFFFFFFFFL))
+    self._key = self.start.num << 32 | self.end.num
   def usable(self): 
     "return the number of usable IPs in CIDR, i.e. not incl. all 0s, all 1s"
-    return self.end.tolong() - self.start.tolong() - 1
+    return self.end.num - self.start.num - 1
   # is_cidr? is_the_same_range?
 
-class IPv4RangeList(list):
+_netmasks = [IPv4NetMask(n) for n in range(33)] # shared, never modified
+_newcidr = IPv4CIDR.__new__
+
+def _mkcidr(s,n):
+  "build an IPv4CIDR from an aligned start and prefix length"
+  c = _newcidr(IPv4CIDR)
+  c.mask = _netmasks[n]
+  e = s | (0xFFFFFFFFL >> n)
+  c.start = _mkaddr(s)
+  c.end = _mkaddr(e)
+  c._key = s << 32 | e
+  return c
+
+def _cidrsplit(s,e,width=32):
+  "generate (start,nbits) of the largest aligned blocks covering s to e"
+  while s <= e:
+    size = s & -s or 1L << width # largest block aligned at s
+    while size > e - s + 1:
+      size >>= 1
+    yield s, width + 1 - size.bit_length()
+    s += size
+
+# set operations on sorted (start,end) pairs of long ints
+
+def _pairs(x):
+  "sorted (start,end) pairs from a range, range list or range array"
+  if isinstance(x,IPv4RangeArray):
+    return zip(x.starts,x.ends)
+  if isinstance(x,IPv4Range):
+    return [(x.start.num,x.end.num)]
+  return [(r.start.num,r.end.num) for r in x]
+
+def _mergepairs(pairs):
+  "join overlapping and adjacent ranges in one sweep over sorted pairs"
+  out = []
+  for s,e in pairs:
+    if out and s <= out[-1][1] + 1:
+      if e > out[-1][1]:
+        out[-1] = (out[-1][0],e)
+    else:
+      out.append((s,e))
+  return out
+
+def _opunion(a,b): return a or b
+def _opintersection(a,b): return a and b
+def _opdiff(a,b): return a and not b
+def _opsymdiff(a,b): return a != b
+
+def _combine(a,b,op):
+  """merge sweep over two sorted lists of disjoint pairs, keeping the
+  addresses where op(in_a,in_b) is true. Runs in O(n+m)"""
+  ea = [x for s,e in a for x in (s,e + 1)] # edges where coverage flips
+  eb = [x for s,e in b for x in (s,e + 1)]
+  na, nb = len(ea), len(eb)
+  i = j = 0
+  ina = inb = False
+  start = None
+  out = []
+  while i < na or j < nb:
+    if j >= nb or (i < na and ea[i] <= eb[j]):
+      x = ea[i]
+    else:
+      x = eb[j]
+    if i < na and ea[i] == x:
+      ina = not ina
+      i += 1
+    if j < nb and eb[j] == x:
+      inb = not inb
+      j += 1
+    if op(ina,inb):
+      if start is None:
+        start = x
+    elif start is not None:
+      out.append((start,x - 1))
+      start = None
+  return out
+
+class _RangeSetOps(object):
+  "set algebra shared by IPv4RangeList and IPv4RangeArray"
+  __slots__ = ()
+  _topairs = staticmethod(_pairs)
+  def _setop(self,other,op):
+    return self._frompairs(_combine(_mergepairs(self._topairs(self)),
+                                    _mergepairs(self._topairs(other)),op))
+  def union(self,other):
+    "addresses in either list, as a normalized list"
+    return self._setop(other,_opunion)
+  def intersection(self,other):
+    "addresses in both lists, as a normalized list"
+    return self._setop(other,_opintersection)
+  def difference(self,other):
+    "addresses in self but not in other, as a normalized list"
+    return self._setop(other,_opdiff)
+  def symmetric_difference(self,other):
+    "addresses in exactly one of the lists, as a normalized list"
+    return self._setop(other,_opsymdiff)
+  def aggregate(self):
+    "generate the smallest set of IPv4CIDR blocks covering the same addresses"
+    for s,e in _mergepairs(_pairs(self)):
+      for b,n in _cidrsplit(s,e):
+        yield _mkcidr(b,n)
+
+_rangekey = operator.attrgetter("_key") # sort key for ranges, runs in C
+
+class IPv4RangeList(list,_RangeSetOps):
+  version = 0 # bumped by the methods that change the list, for caches
   def __init__(self,items=[]):
+    "collect all the ranges then sort them once"
+    items = list(items)
     for i in items:
-      self.append(i)
-    self.sort()
+      if not isinstance(i,IPv4Range):
+        raise ValueError("Can only append ranges to a rangelist")
+    list.extend(self,items)
+    list.sort(self,key=_rangekey)
+  @classmethod
+  def from_iterable(cls,items):
+    "build from ranges in any order"
+    return cls(items)
+  @classmethod
+  def from_sorted(cls,items):
+    "build from ranges already in sorted order, nothing is checked"
+    r = cls()
+    list.extend(r,items)
+    return r
   def span(self): #return smallest block spanning all ranges
     e = self[-1].end
     for i in self:
@@ -321,21 +478,449 @@ class IPv4RangeList(list):
   def append(self,r):
     if isinstance(r,IPv4Range): #don't add to end, put it where it belongs
       super(IPv4RangeList, self).insert(bisect.bisect(self,r),r)
+      self.version += 1
     else:
       raise ValueError("Can only append ranges to a rangelist")
   def extend(self,x):
-    if isinstance(x,IPv4RangeList): # then merge lists
-      for i in x:
-        super(IPv4RangeList, self).insert(bisect.bisect(self,i),i)
+    if isinstance(x,(IPv4RangeList,IPv4RangeArray)): # then merge lists
+      list.extend(self,x)
+      # both halves are sorted runs so this is a linear time merge
+      list.sort(self,key=_rangekey)
+      self.version += 1
     elif isinstance(x,IPv4Range): #then do an append operation
-      self.append(self,x)
+      self.append(x)
     else:
       raise ValueError("Can only extend rangelists with range or rangelist")
   def sort(self,cmpfunc=None):
     pass # It's already sorted so this is a no-op
   def normalize(self):
-    "we need to join any adjacent or overlapping ranges"
-    pass # this needs to be written yet
+    "join any adjacent or overlapping ranges, in place"
+    self[:] = IPv4RangeList._frompairs(_mergepairs(_pairs(self)))
+    self.version += 1
+  @classmethod
+  def _frompairs(cls,pairs):
+    "build from sorted (start,end) pairs without re-sorting"
+    r = cls()
+    list.extend(r,[IPv4Range(_mkaddr(s),_mkaddr(e)) for s,e in pairs])
+    return r
+  def compact(self):
+    "return an IPv4RangeArray holding the same ranges"
+    return IPv4RangeArray(self)
+  def addrs(self):
+    "lazy sequence of the addrs in all the ranges, see IPv4AddrView"
+    return IPv4AddrView(self.compact())
+  def contains_many(self,addrs):
+    "batch membership, see IPv4RangeArray; compact() once for repeated use"
+    return self.compact().contains_many(addrs)
+  def find_many(self,addrs):
+    "batch range lookup, see IPv4RangeArray; compact() once for repeated use"
+    return self.compact().find_many(addrs)
+
+def _addrlong(a):
+  "convert an address in any of the accepted forms to a long int"
+  if isinstance(a,IPv4Addr):
+    return a.num
+  elif isinstance(a,(long,int)):
+    return a
+  return IPv4Addr(a).num
+
+def _findback(ends,maxends,i,a):
+  "walk back from i to the nearest range whose end reaches a"
+  while i >= 0 and maxends[i] >= a:
+    if ends[i] >= a:
+      return i
+    i -= 1
+  return -1
+
+def _asnumpy(a):
+  "view a column of 32-bit ints as a numpy array without copying"
+  if isinstance(a,array):
+    return numpy.frombuffer(a,dtype=numpy.uint32)
+  return a.asnumpy() # columns that are not arrays must provide this
+
+def _addrarray(addrs):
+  """convert a batch of addresses to a numpy uint32 array if numpy is
+  available, otherwise to an array of 32-bit ints"""
+  if isinstance(addrs,(str,buffer,bytearray)): # packed, network order
+    if numpy is not None:
+      return numpy.frombuffer(addrs,dtype=">u4").astype(numpy.uint32)
+    a = array(_u32)
+    a.fromstring(str(addrs))
+    if sys.byteorder == "little":
+      a.byteswap()
+    return a
+  if numpy is not None:
+    if isinstance(addrs,numpy.ndarray):
+      return addrs.astype(numpy.uint32,copy=False)
+    if isinstance(addrs,array) and addrs.typecode == _u32:
+      return _asnumpy(addrs)
+    return numpy.array([_addrlong(x) for x in addrs],dtype=numpy.uint32)
+  if isinstance(addrs,array):
+    return addrs
+  return array(_u32,[_addrlong(x) for x in addrs])
+
+class IPv4RangeArray(_RangeSetOps):
+  """sorted list of ranges stored as two parallel arrays of 32-bit ints
+
+  Each range costs 8 bytes instead of three objects. Iterating or indexing
+  hands out IPv4Range views built on demand."""
+  __slots__ = ["starts","ends","_maxends","version"] # reduce storage
+  def __init__(self,items=[]):
+    pairs = [(i.start.num,i.end.num) for i in items]
+    if not isinstance(items,(IPv4RangeList,IPv4RangeArray)):
+      pairs.sort()
+    self.starts = array(_u32,[p[0] for p in pairs])
+    self.ends = array(_u32,[p[1] for p in pairs])
+    self._maxends = None
+    self.version = 0 # bumped by the methods that change it, for caches
+  def _prefixmax(self):
+    """running maximum of the ends, so that overlapping ranges can still
+    be searched. For a list with no overlaps this is just self.ends"""
+    if self._maxends is None:
+      starts, ends = self.starts, self.ends
+      m = array(_u32,ends)
+      overlaps = False
+      for i in xrange(1,len(m)):
+        if m[i] < m[i-1]:
+          m[i] = m[i-1]
+        if starts[i] <= ends[i-1]:
+          overlaps = True
+      self._maxends = overlaps and m or ends
+    return self._maxends
+  def __len__(self):
+    return len(self.starts)
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      r = IPv4RangeArray()
+      r.starts = self.starts[i]
+      r.ends = self.ends[i]
+      return r
+    return IPv4Range(_mkaddr(self.starts[i]),_mkaddr(self.ends[i]))
+  def __iter__(self):
+    for s,e in zip(self.starts,self.ends):
+      yield IPv4Range(_mkaddr(s),_mkaddr(e))
+  def __str__(self):
+    return ",".join([_sockinetntoa(_structpack('!L',s)) + "-" +
+                     _sockinetntoa(_structpack('!L',e))
+                     for s,e in zip(self.starts,self.ends)])
+  def __contains__(self,other):
+    "is the address or range inside any one of the ranges"
+    if isinstance(other,IPv4Range):
+      s, e = other.start.num, other.end.num
+    else:
+      s = e = _addrlong(other)
+    i = _bisectright(self.starts,s) - 1
+    return i >= 0 and self._prefixmax()[i] >= e
+  def find(self,a):
+    "index of the last range containing the address, or -1"
+    a = _addrlong(a)
+    return _findback(self.ends,self._prefixmax(),
+                     _bisectright(self.starts,a) - 1,a)
+  def contains_many(self,addrs):
+    """membership mask for a batch of addresses
+
+    addrs may be a numpy array, an array of ints, a string of packed
+    network order addresses or any iterable of addresses. Returns a numpy
+    bool array if numpy is installed, otherwise an array of 0/1 bytes."""
+    a = _addrarray(addrs)
+    if numpy is not None:
+      if not len(self.starts):
+        return numpy.zeros(len(a),dtype=bool)
+      i = numpy.searchsorted(_asnumpy(self.starts),a,side="right") - 1
+      m = _asnumpy(self._prefixmax())[numpy.maximum(i,0)]
+      return (i >= 0) & (m >= a)
+    starts, m = self.starts, self._prefixmax()
+    return array('B',[(i >= 0 and m[i] >= x)
+                      for x,i in ((x,_bisectright(starts,x) - 1) for x in a)])
+  def find_many(self,addrs):
+    """index of the matching range for a batch of addresses, -1 if none
+
+    Takes the same inputs as contains_many. Returns a numpy int64 array if
+    numpy is installed, otherwise an array of longs."""
+    a = _addrarray(addrs)
+    ends, maxends = self.ends, self._prefixmax()
+    if numpy is not None:
+      if not len(self.starts):
+        return numpy.zeros(len(a),dtype=numpy.int64) - 1
+      i = numpy.searchsorted(_asnumpy(self.starts),a,side="right") - 1
+      j = numpy.maximum(i,0)
+      hit = (i >= 0) & (_asnumpy(ends)[j] >= a)
+      result = numpy.where(hit,i,-1)
+      if maxends is not ends: # a range further back may still match
+        for k in numpy.nonzero(~hit & (i >= 0) &
+                               (_asnumpy(maxends)[j] >= a))[0]:
+          result[k] = _findback(ends,maxends,i[k],a[k])
+      return result
+    starts = self.starts
+    return array('l',[_findback(ends,maxends,_bisectright(starts,x) - 1,x)
+                      for x in a])
+  def append(self,r):
+    "insert a range where it belongs"
+    if not isinstance(r,IPv4Range):
+      raise ValueError("Can only append ranges to a rangearray")
+    s, e = r.start.num, r.end.num
+    i = _bisectright(self.starts,s)
+    while i > 0 and self.starts[i-1] == s and self.ends[i-1] > e:
+      i -= 1
+    self.starts.insert(i,s)
+    self.ends.insert(i,e)
+    self._maxends = None
+    self.version += 1
+  def span(self): #return smallest block spanning all ranges
+    return IPv4Range(_mkaddr(self.starts[0]),
+                     _mkaddr(self._prefixmax()[-1]))
+  def normalize(self):
+    "join any adjacent or overlapping ranges, in place"
+    pairs = _mergepairs(zip(self.starts,self.ends))
+    self.starts = array(_u32,[p[0] for p in pairs])
+    self.ends = self._maxends = array(_u32,[p[1] for p in pairs])
+    self.version += 1
+  @classmethod
+  def _frompairs(cls,pairs):
+    "build from sorted (start,end) pairs without re-sorting"
+    r = cls()
+    r.starts = array(_u32,[p[0] for p in pairs])
+    r.ends = array(_u32,[p[1] for p in pairs])
+    return r
+  def torangelist(self):
+    "return an IPv4RangeList of IPv4Range objects"
+    return IPv4RangeList(self)
+  def addrs(self):
+    "lazy sequence of the addrs in all the ranges, see IPv4AddrView"
+    return IPv4AddrView(self)
+
+class IPv4RangeMap(object):
+  """disjoint ranges each mapped to a value, such as a country or an ASN
+
+  Kept as two sorted arrays of 32-bit ints, like IPv4RangeArray, plus a
+  parallel list of payloads, so a lookup is a bisect. Setting a range
+  cuts away whatever part of other ranges it overlaps, and neighbours
+  left with equal payloads are joined into one range, so tables with
+  long runs of the same value shrink as they are loaded."""
+  __slots__ = ["starts","ends","payloads"] # reduce storage required
+  def __init__(self,items=[]):
+    "build from (IPv4Range,value) pairs, later pairs win where they overlap"
+    rows = []
+    for r,v in items:
+      if not isinstance(r,IPv4Range):
+        raise ValueError("IPv4RangeMap keys must be IPv4Range")
+      rows.append((r.start.num,r.end.num,v))
+    self.starts, self.ends, self.payloads = array(_u32), array(_u32), []
+    ordered = sorted(rows,key=operator.itemgetter(0))
+    for k in xrange(1,len(ordered)):
+      if ordered[k][0] <= ordered[k-1][1]: # overlaps, so apply in order
+        for s,e,v in rows:
+          self._splice(s,e,v,True)
+        return
+    starts, ends, payloads = self.starts, self.ends, self.payloads
+    for s,e,v in ordered: # one sweep, joining equal neighbours
+      if payloads and ends[-1] + 1 == s and payloads[-1] == v:
+        ends[-1] = e
+      else:
+        starts.append(s)
+        ends.append(e)
+        payloads.append(v)
+  def __len__(self):
+    return len(self.starts)
+  def __iter__(self):
+    "the ranges in order"
+    for s,e in zip(self.starts,self.ends):
+      yield IPv4Range(_mkaddr(s),_mkaddr(e))
+  def items(self):
+    "generate (IPv4Range,value) in order"
+    for s,e,v in zip(self.starts,self.ends,self.payloads):
+      yield IPv4Range(_mkaddr(s),_mkaddr(e)), v
+  def __str__(self):
+    return ",".join(["%s-%s:%s" % (_sockinetntoa(_structpack('!L',s)),
+                                   _sockinetntoa(_structpack('!L',e)),v)
+                     for s,e,v in zip(self.starts,self.ends,self.payloads)])
+
+  def find(self,a):
+    "index of the range holding the address, or -1"
+    a = _addrlong(a)
+    i = _bisectright(self.starts,a) - 1
+    if i >= 0 and self.ends[i] >= a:
+      return i
+    return -1
+  def __contains__(self,a):
+    return self.find(a) >= 0
+  def __getitem__(self,a):
+    "the value for an address, KeyError if no range holds it"
+    i = self.find(a)
+    if i < 0:
+      raise KeyError(a)
+    return self.payloads[i]
+  def get(self,a,default=None):
+    i = self.find(a)
+    if i < 0:
+      return default
+    return self.payloads[i]
+  def find_many(self,addrs):
+    """index of the matching range for a batch of addresses, -1 if none
+
+    Takes the same inputs and gives the same result types as
+    IPv4RangeArray.find_many"""
+    a = _addrarray(addrs)
+    if numpy is not None:
+      if not len(self.starts):
+        return numpy.zeros(len(a),dtype=numpy.int64) - 1
+      i = numpy.searchsorted(_asnumpy(self.starts),a,side="right") - 1
+      hit = (i >= 0) & (_asnumpy(self.ends)[numpy.maximum(i,0)] >= a)
+      return numpy.where(hit,i,-1)
+    starts, ends = self.starts, self.ends
+    return array('l',[i if i >= 0 and ends[i] >= x else -1
+                      for x,i in ((x,_bisectright(starts,x) - 1) for x in a)])
+  def get_many(self,addrs,default=None):
+    "list of the values for a batch of addresses, default where none"
+    p = self.payloads
+    return [p[i] if i >= 0 else default
+            for i in self.find_many(addrs).tolist()]
+
+  def _splice(self,s,e,v,present):
+    """map s..e to v, or to nothing if not present, trimming or splitting
+    the ranges it overlaps and joining neighbours with the same value"""
+    starts, ends, payloads = self.starts, self.ends, self.payloads
+    i = bisect.bisect_left(ends,s) # first range ending at or after s
+    j = _bisectright(starts,e) # first range starting after e
+    head, tail = [], []
+    if i < j and starts[i] < s: # keep the part before s
+      if present and payloads[i] == v:
+        s = starts[i]
+      else:
+        head = [(starts[i],s - 1,payloads[i])]
+    elif present and i > 0 and ends[i-1] + 1 == s and payloads[i-1] == v:
+      i -= 1
+      s = starts[i]
+    if i < j and ends[j-1] > e: # keep the part after e
+      if present and payloads[j-1] == v:
+        e = ends[j-1]
+      else:
+        tail = [(e + 1,ends[j-1],payloads[j-1])]
+    elif present and j < len(starts) and starts[j] == e + 1 and \
+         payloads[j] == v:
+      e = ends[j]
+      j += 1
+    rows = head + (present and [(s,e,v)] or []) + tail
+    starts[i:j] = array(_u32,[r[0] for r in rows])
+    ends[i:j] = array(_u32,[r[1] for r in rows])
+    payloads[i:j] = [r[2] for r in rows]
+  def set(self,r,v):
+    "map every address in the range to v"
+    self._splice(r.start.num,r.end.num,v,True)
+  def remove(self,r):
+    "unmap every address in the range"
+    self._splice(r.start.num,r.end.num,None,False)
+
+  def ranges(self):
+    "the ranges, without values, as an IPv4RangeArray"
+    r = IPv4RangeArray()
+    r.starts, r.ends = array(_u32,self.starts), array(_u32,self.ends)
+    return r
+
+# offsets into a list of ranges can pass 2**32 so they need 64 bits
+_u64 = [t for t in ('L', 'd') if array(t).itemsize == 8][0]
+
+class IPv4AddrView(object):
+  """read-only sequence of the addresses in an IPv4RangeArray
+
+  Nothing is materialised: len, indexing, slicing and index() are worked
+  out from the range starts and a table of cumulative offsets, so a /8 or
+  a whole routing table costs no more than its ranges. Ranges that overlap
+  are counted once each, so normalize first to view a set of addrs."""
+  __slots__ = ["ranges","offsets","first","step","count"]
+  def __init__(self,ranges):
+    self.ranges = ranges
+    self.offsets = offsets = array(_u64)
+    total = 0
+    for s,e in zip(ranges.starts,ranges.ends):
+      offsets.append(total)
+      total += e - s + 1
+    self.first, self.step, self.count = 0, 1, total
+
+  def __len__(self):
+    return self.count
+  def _addr(self,off):
+    "address at a global offset into the ranges"
+    j = _bisectright(self.offsets,off) - 1
+    return self.ranges.starts[j] + off - long(self.offsets[j])
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      start, stop, step = i.indices(self.count)
+      v = _newview(IPv4AddrView)
+      v.ranges, v.offsets = self.ranges, self.offsets
+      v.first = self.first + start*self.step
+      v.step = self.step*step
+      v.count = len(xrange(start,stop,step))
+      return v
+    if i < 0:
+      i += self.count
+    if i < 0 or i >= self.count:
+      raise IndexError("address view index out of range")
+    return _mkaddr(self._addr(self.first + i*self.step))
+  def index(self,a):
+    "position of an address in the view, raising ValueError if absent"
+    a = _addrlong(a)
+    j = self.ranges.find(a)
+    if j >= 0:
+      i, r = divmod(long(self.offsets[j]) + a - self.ranges.starts[j] -
+                    self.first,self.step)
+      if r == 0 and 0 <= i < self.count:
+        return i
+    raise ValueError("%s is not in the view" % _mkaddr(a))
+  def __contains__(self,a):
+    try:
+      self.index(a)
+    except ValueError:
+      return False
+    return True
+
+  def _pieces(self):
+    "generate (addr,n) for runs of n addrs step apart inside one range"
+    starts, ends, offsets = self.ranges.starts, self.ranges.ends, self.offsets
+    step, off, left = self.step, self.first, self.count
+    while left > 0:
+      j = _bisectright(offsets,off) - 1
+      a = starts[j] + off - long(offsets[j])
+      if step > 0:
+        n = min(left,(ends[j] - a)//step + 1)
+      else:
+        n = min(left,(a - starts[j])//-step + 1)
+      yield a, n
+      left -= n
+      off += n*step
+  def __iter__(self):
+    step = self.step
+    for a,n in self._pieces():
+      for x in xrange(a,a + n*step,step):
+        yield _mkaddr(x)
+  def chunks(self,size=65536):
+    """generate the addresses in blocks of up to size packed 32-bit ints,
+    as numpy uint32 arrays if numpy is installed, otherwise as arrays"""
+    step = self.step
+    buf, n = [], 0
+    for a,k in self._pieces():
+      while k:
+        m = min(k,size - n)
+        if numpy is not None:
+          buf.append(numpy.arange(a,a + m*step,step,dtype=numpy.int64))
+        else:
+          buf.append(xrange(a,a + m*step,step))
+        a, k, n = a + m*step, k - m, n + m
+        if n == size:
+          yield _joinchunk(buf)
+          buf, n = [], 0
+    if n:
+      yield _joinchunk(buf)
+
+_newview = IPv4AddrView.__new__
+
+def _joinchunk(buf):
+  if numpy is not None:
+    return numpy.concatenate(buf).astype(numpy.uint32)
+  a = array(_u32)
+  for x in buf:
+    a.extend(x)
+  return a
 
 if __name__ == "__main__":
   print "This is an import module"
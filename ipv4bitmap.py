@@ -0,0 +1,326 @@
+# ipv4bitmap - compressed bitmap sets of addresses
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import binascii
+from array import array
+from bisect import bisect_left
+from ipv4 import IPv4RangeList, _addrlong, _pairs, _mergepairs, _mkaddr
+
+_ARRAYMAX = 4096 # up to this many uint16s take less room than a bitmap
+_FULL = "full" # marker for a /16 holding every address
+_ONES = "\xff" * 8192
+_BITS = [tuple([k for k in range(8) if x >> k & 1]) for x in range(256)]
+
+class _Bits(object):
+  "bitmap of one /16, bit i of byte j is address 8*j + i"
+  __slots__ = ["bits","card"]
+  def __init__(self,bits,card):
+    self.bits = bits
+    self.card = card
+
+def _values(b):
+  "sorted low 16 bits of the addresses in a bitmap"
+  out = array('H')
+  for i,x in enumerate(b):
+    if x:
+      base = i << 3
+      out.extend([base + k for k in _BITS[x]])
+  return out
+
+def _tobits(c):
+  "a new bytearray bitmap holding what any kind of container holds"
+  if c is _FULL:
+    return bytearray(_ONES)
+  if isinstance(c,_Bits):
+    return bytearray(c.bits)
+  b = bytearray(8192)
+  for v in c:
+    b[v >> 3] |= 1 << (v & 7)
+  return b
+
+def _tolong(c):
+  "the container as one 65536 bit int, whose & | and popcount run in C"
+  return int(binascii.hexlify(c.bits if isinstance(c,_Bits) else _tobits(c)),
+             16)
+
+def _pack(values):
+  "the cheapest container for sorted low 16 bits, None if there are none"
+  n = len(values)
+  if not n:
+    return None
+  if n <= _ARRAYMAX:
+    return array('H',values)
+  if n == 65536:
+    return _FULL
+  b = bytearray(8192)
+  for v in values:
+    b[v >> 3] |= 1 << (v & 7)
+  return _Bits(b,n)
+
+def _fromlong(x):
+  n = bin(x).count("1")
+  if n == 65536:
+    return _FULL
+  b = bytearray(binascii.unhexlify("%016384x" % x))
+  if n <= _ARRAYMAX:
+    return _pack(_values(b))
+  return _Bits(b,n)
+
+def _has(c,v):
+  if c is _FULL:
+    return True
+  if isinstance(c,_Bits):
+    return bool(c.bits[v >> 3] >> (v & 7) & 1)
+  i = bisect_left(c,v)
+  return i < len(c) and c[i] == v
+
+def _copy(c):
+  if c is None or c is _FULL:
+    return c
+  if isinstance(c,_Bits):
+    return _Bits(bytearray(c.bits),c.card)
+  return array('H',c)
+
+def _popcount(b):
+  return bin(int(binascii.hexlify(b),16)).count("1")
+
+def _setrun(b,lo,top):
+  """set bits lo to top of a bytearray bitmap, whole bytes at a time,
+  giving how many of them were not already set"""
+  n = 0
+  while lo <= top and lo & 7:
+    m = 1 << (lo & 7)
+    if not b[lo >> 3] & m:
+      b[lo >> 3] |= m
+      n += 1
+    lo += 1
+  while lo <= top and top & 7 != 7:
+    m = 1 << (top & 7)
+    if not b[top >> 3] & m:
+      b[top >> 3] |= m
+      n += 1
+    top -= 1
+  if lo <= top:
+    i, j = lo >> 3, (top >> 3) + 1
+    n += (j - i) * 8 - _popcount(b[i:j])
+    b[i:j] = _ONES[:j - i]
+  return n
+
+def _addruns(c,runs):
+  """container c with the sorted, disjoint (lo,top) runs added, merging
+  in one pass so a /16 is rebuilt once however many runs land in it"""
+  if c is _FULL:
+    return c
+  if runs[0] == (0,0xFFFF):
+    return _FULL
+  if not isinstance(c,_Bits):
+    if c is None:
+      c = array('H')
+    if len(c) + sum([top - lo + 1 for lo,top in runs]) <= _ARRAYMAX:
+      out, i, n = array('H'), 0, len(c)
+      for lo,top in runs:
+        j = bisect_left(c,lo,i)
+        out.extend(c[i:j])
+        out.extend(xrange(lo,top + 1))
+        i = bisect_left(c,top + 1,j)
+      out.extend(c[i:])
+      return out
+    c = _Bits(_tobits(c),len(c))
+  for lo,top in runs:
+    c.card += _setrun(c.bits,lo,top)
+  if c.card == 65536:
+    return _FULL
+  return c
+
+def _or(a,b):
+  if a is None or b is None:
+    return _copy(a is None and b or a)
+  if a is _FULL or b is _FULL:
+    return _FULL
+  if not isinstance(a,_Bits) and not isinstance(b,_Bits):
+    return _pack(sorted(set(a).union(b)))
+  return _fromlong(_tolong(a) | _tolong(b))
+
+def _and(a,b):
+  if a is _FULL or b is _FULL:
+    return _copy(a is _FULL and b or a)
+  if not isinstance(a,_Bits):
+    return _pack([v for v in a if _has(b,v)])
+  if not isinstance(b,_Bits):
+    return _pack([v for v in b if _has(a,v)])
+  return _fromlong(_tolong(a) & _tolong(b))
+
+def _andnot(a,b):
+  if b is None:
+    return _copy(a)
+  if b is _FULL:
+    return None
+  if not isinstance(a,_Bits) and a is not _FULL:
+    return _pack([v for v in a if not _has(b,v)])
+  return _fromlong(_tolong(a) & ~_tolong(b))
+
+class IPv4Bitmap(object):
+  """set of addresses kept as a two level, roaring style, bitmap
+
+  The top 16 bits of an address pick a /16 and the low 16 bits are kept
+  in that /16's container: a sorted array of up to 4096 uint16s when
+  sparse, an 8KB bitmap when dense, or a marker when every address is
+  present. Millions of scattered /32s cost a few bytes each instead of
+  an IPv4Range apiece, add, discard and membership do not depend on the
+  size of the set, and union and intersection work a /16 at a time."""
+  __slots__ = ["chunks"] # top 16 bits -> container
+  def __init__(self,ranges=()):
+    self.chunks = {}
+    self.update(ranges)
+
+  def update(self,ranges):
+    "add every address in an IPv4Range, IPv4RangeList or IPv4RangeArray"
+    runs = {} # top 16 bits -> (lo,top) runs inside that /16
+    for s,e in _pairs(ranges):
+      while s <= e:
+        last = min(e,s | 0xFFFF)
+        hi = s >> 16
+        if hi in runs:
+          runs[hi].append((s & 0xFFFF,last & 0xFFFF))
+        else:
+          runs[hi] = [(s & 0xFFFF,last & 0xFFFF)]
+        s = last + 1
+    for hi,rs in runs.iteritems():
+      rs.sort() # already in order for range lists and arrays
+      self.chunks[hi] = _addruns(self.chunks.get(hi),_mergepairs(rs))
+
+  def add(self,a):
+    a = _addrlong(a)
+    hi, lo = a >> 16, a & 0xFFFF
+    c = self.chunks.get(hi)
+    if c is None:
+      self.chunks[hi] = array('H',[lo])
+    elif isinstance(c,_Bits):
+      i, m = lo >> 3, 1 << (lo & 7)
+      if not c.bits[i] & m:
+        c.bits[i] |= m
+        c.card += 1
+        if c.card == 65536:
+          self.chunks[hi] = _FULL
+    elif c is not _FULL:
+      i = bisect_left(c,lo)
+      if i < len(c) and c[i] == lo:
+        return
+      if len(c) < _ARRAYMAX:
+        c.insert(i,lo)
+      else:
+        b = _tobits(c)
+        b[lo >> 3] |= 1 << (lo & 7)
+        self.chunks[hi] = _Bits(b,len(c) + 1)
+  def discard(self,a):
+    "remove the address if present"
+    a = _addrlong(a)
+    hi, lo = a >> 16, a & 0xFFFF
+    c = self.chunks.get(hi)
+    if c is None:
+      return
+    if c is _FULL:
+      c = self.chunks[hi] = _Bits(bytearray(_ONES),65536)
+    if isinstance(c,_Bits):
+      i, m = lo >> 3, 1 << (lo & 7)
+      if c.bits[i] & m:
+        c.bits[i] &= ~m & 0xFF
+        c.card -= 1
+        if c.card <= _ARRAYMAX:
+          self.chunks[hi] = _values(c.bits)
+      return
+    i = bisect_left(c,lo)
+    if i < len(c) and c[i] == lo:
+      del c[i]
+      if not c:
+        del self.chunks[hi]
+  def __contains__(self,a):
+    a = _addrlong(a)
+    c = self.chunks.get(a >> 16)
+    return c is not None and _has(c,a & 0xFFFF)
+  def __len__(self):
+    n = 0
+    for c in self.chunks.itervalues():
+      if c is _FULL:
+        n += 65536
+      elif isinstance(c,_Bits):
+        n += c.card
+      else:
+        n += len(c)
+    return n
+  def __iter__(self):
+    "the addresses in order, as IPv4Addr objects"
+    for hi in sorted(self.chunks):
+      c, base = self.chunks[hi], hi << 16
+      if c is _FULL:
+        c = xrange(65536)
+      elif isinstance(c,_Bits):
+        c = _values(c.bits)
+      for v in c:
+        yield _mkaddr(base + v)
+
+  def _combine(self,other,op,keys):
+    r = IPv4Bitmap()
+    mine, theirs = self.chunks, other.chunks
+    for hi in keys:
+      c = op(mine.get(hi),theirs.get(hi))
+      if c is not None:
+        r.chunks[hi] = c
+    return r
+  def union(self,other):
+    return self._combine(other,_or,set(self.chunks).union(other.chunks))
+  def intersection(self,other):
+    return self._combine(other,_and,
+                         set(self.chunks).intersection(other.chunks))
+  def difference(self,other):
+    return self._combine(other,_andnot,list(self.chunks))
+  __or__ = union
+  __and__ = intersection
+  __sub__ = difference
+
+  def torangelist(self):
+    "the addresses as a normalized IPv4RangeList"
+    pairs = []
+    for hi in sorted(self.chunks):
+      c, base = self.chunks[hi], hi << 16
+      if c is _FULL:
+        pairs.append((base,base + 0xFFFF))
+        continue
+      if isinstance(c,_Bits):
+        c = _values(c.bits)
+      for v in c:
+        if pairs and base + v == pairs[-1][1] + 1:
+          pairs[-1] = (pairs[-1][0],base + v)
+        else:
+          pairs.append((base + v,base + v))
+    return IPv4RangeList._frompairs(_mergepairs(pairs))
+
+if __name__ == "__main__":
+  print "This is an import module"
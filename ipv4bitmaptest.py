@@ -0,0 +1,140 @@
+# ipv4bitmaptest - unit test the ipv4bitmap module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+from ipv4bitmap import IPv4Bitmap, _Bits, _FULL
+
+class testBitmap(unittest.TestCase):
+  def testAddDiscard(self):
+    b = IPv4Bitmap()
+    b.add("10.0.0.1")
+    b.add(IPv4Addr("10.0.0.3"))
+    b.add("10.0.0.1")
+    self.assertEqual(2,len(b))
+    self.assertTrue("10.0.0.1" in b)
+    self.assertFalse("10.0.0.2" in b)
+    b.discard("10.0.0.1")
+    b.discard("10.0.0.2")
+    b.discard("11.0.0.0")
+    self.assertEqual(["10.0.0.3"],[str(a) for a in b])
+    b.discard("10.0.0.3")
+    self.assertEqual({},b.chunks)
+  def testContainers(self):
+    "sparse, dense and full /16s change container as they fill and empty"
+    b = IPv4Bitmap()
+    for i in range(0,2 * 4096 + 2,2):
+      b.add((10 << 24) + i)
+    self.assertTrue(isinstance(b.chunks[10 << 8],_Bits))
+    self.assertEqual(4097,len(b))
+    b.discard(10 << 24)
+    self.assertFalse(isinstance(b.chunks[10 << 8],_Bits))
+    self.assertEqual(4096,len(b))
+    b.update(IPv4Range("10.0.0.0","10.0.255.255"))
+    self.assertTrue(b.chunks[10 << 8] is _FULL)
+    b.discard("10.0.1.1")
+    self.assertEqual(65535,len(b))
+    b.add("10.0.1.1")
+    self.assertTrue(b.chunks[10 << 8] is _FULL)
+  def testRanges(self):
+    rl = IPv4RangeList([IPv4Range("10.0.0.0","10.2.0.4"),
+                        IPv4Range("10.2.0.6","10.2.0.6"),
+                        IPv4Range("10.2.1.0","10.2.40.0")])
+    b = IPv4Bitmap(rl)
+    self.assertEqual(sum([len(r) for r in rl]),len(b))
+    self.assertEqual(str(rl),str(b.torangelist()))
+    self.assertTrue("10.1.200.200" in b)
+    self.assertFalse("10.2.0.5" in b)
+    self.assertEqual(str(rl),str(IPv4Bitmap(rl.compact()).torangelist()))
+    self.assertEqual("",str(IPv4Bitmap().torangelist()))
+  def testUpdate(self):
+    "runs merge into sparse, dense and full /16s and keep an exact count"
+    rnd = random.Random(5)
+    s, b = set(), IPv4Bitmap()
+    for hi,n in ((1,100),(2,5000),(3,0)):
+      for i in range(n):
+        v = (hi << 16) + rnd.randrange(65536)
+        s.add(v)
+        b.add(v)
+    rs = [IPv4Range(3 << 16,(4 << 16) - 1)]
+    for i in range(300):
+      v = rnd.randrange(1 << 16,4 << 16)
+      rs.append(IPv4Range(v,min(v + rnd.randrange(40),(4 << 16) - 1)))
+    for r in rs:
+      s.update(range(r.start.num,r.end.num + 1))
+    b.update(rs) # unsorted and overlapping
+    self.assertEqual(len(s),len(b))
+    self.assertEqual(sorted(s),[a.num for a in b])
+    self.assertTrue(b.chunks[3] is _FULL)
+    self.assertTrue(isinstance(b.chunks[2],_Bits))
+    self.assertFalse(isinstance(b.chunks[1],_Bits))
+  def testSetOps(self):
+    a = IPv4Bitmap(IPv4Range("10.0.0.0","10.0.255.255"))
+    b = IPv4Bitmap(IPv4Range("10.0.255.0","10.1.0.255"))
+    self.assertEqual("10.0.0.0-10.1.0.255",str((a | b).torangelist()))
+    self.assertEqual("10.0.255.0-10.0.255.255",str((a & b).torangelist()))
+    self.assertEqual("10.0.0.0-10.0.254.255",str((a - b).torangelist()))
+    self.assertEqual("10.1.0.0-10.1.0.255",str((b - a).torangelist()))
+    self.assertEqual(0,len(a - a))
+  def testRandom(self):
+    "agrees with a set of ints across every kind of container"
+    rnd = random.Random(11)
+    def rbitmap():
+      s, b = set(), IPv4Bitmap()
+      for hi,n in ((1,50),(2,6000),(3,60000),(4,0)):
+        for i in range(n):
+          v = (hi << 16) + rnd.randrange(65536)
+          s.add(v)
+          b.add(v)
+      for i in range(2000):
+        v = (rnd.randrange(1,4) << 16) + rnd.randrange(65536)
+        s.discard(v)
+        b.discard(v)
+      b.update(IPv4Range(4 << 16,(5 << 16) - 1))
+      s.update(range(4 << 16,5 << 16))
+      return s, b
+    s1, b1 = rbitmap()
+    s2, b2 = rbitmap()
+    self.assertEqual(len(s1),len(b1))
+    self.assertEqual(sorted(s1),[a.num for a in b1])
+    for s,b in ((s1 | s2,b1 | b2),(s1 & s2,b1 & b2),(s1 - s2,b1 - b2)):
+      self.assertEqual(len(s),len(b))
+      self.assertEqual(sorted(s),[a.num for a in b])
+    rl = b1.torangelist()
+    self.assertEqual(len(s1),sum([len(r) for r in rl]))
+    self.assertEqual(sorted(s1),[a.num for a in IPv4Bitmap(rl)])
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testBitmap))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,135 @@
+# ipv4cache - an LRU cache in front of range list and trie lookups
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from ipv4 import IPv4RangeArray, _addrlong
+from ipv4parse import _quad, _error
+from ipv4trie import IPv4Trie
+
+_PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3 # fields of a link in the LRU ring
+
+def _key(a):
+  "the address as a 32-bit int, dotted quad strings take a short cut"
+  if a.__class__ is str:
+    try:
+      return _quad(a)
+    except _error:
+      pass
+  return _addrlong(a)
+
+class IPv4LookupCache(object):
+  """remembers the answers to lookups of the most recently used addresses
+
+  ranges may be an IPv4RangeList, an IPv4RangeArray or an IPv4Trie. When
+  traffic is skewed most lookups are then a dict hit instead of a scan or
+  a search. At most size addresses are kept, dropping the least recently
+  used. The cache empties itself when the ranges are changed by their
+  own methods, such as append, extend and normalize, which bump their
+  version; hits, misses and evictions are counted."""
+  __slots__ = ["ranges","size","hits","misses","evictions","_map","_root",
+               "_version","_resolve"]
+  def __init__(self,ranges,size=65536):
+    if size < 1:
+      raise ValueError("cache size must be at least 1")
+    self.ranges = ranges
+    self.size = size
+    self.hits = self.misses = self.evictions = 0
+    if isinstance(ranges,IPv4Trie):
+      self._resolve = ranges.lookup
+    elif isinstance(ranges,IPv4RangeArray):
+      self._resolve = self._findarray
+    else:
+      self._resolve = self._scan
+    self.clear()
+  def clear(self):
+    "drop every cached answer, the counters are kept"
+    self._map = {}
+    root = self._root = []
+    root[:] = [root,root,None,None]
+    self._version = getattr(self.ranges,"version",0)
+  def __len__(self):
+    return len(self._map)
+
+  def _scan(self,a):
+    "the holding range that sorts last, the one IPv4RangeArray.find gives"
+    found = None
+    for r in self.ranges:
+      if r.start.num <= a <= r.end.num and (found is None or
+                                            r._key >= found._key):
+        found = r
+    return found
+  def _findarray(self,a):
+    i = self.ranges.find(a)
+    if i < 0:
+      return None
+    return self.ranges[i]
+
+  def find(self,a):
+    """the range holding the address, or for an IPv4Trie the
+    (IPv4CIDR,payload) of the longest matching prefix, or None"""
+    if getattr(self.ranges,"version",0) != self._version:
+      self.clear()
+    k = _key(a)
+    root = self._root
+    link = self._map.get(k)
+    if link is not None:
+      self.hits += 1
+      # unlink it and put it back at the most recently used end
+      prev, nxt = link[_PREV], link[_NEXT]
+      prev[_NEXT] = nxt
+      nxt[_PREV] = prev
+      last = root[_PREV]
+      last[_NEXT] = root[_PREV] = link
+      link[_PREV] = last
+      link[_NEXT] = root
+      return link[_VALUE]
+    self.misses += 1
+    v = self._resolve(k)
+    if len(self._map) >= self.size: # drop the least recently used
+      old = root[_NEXT]
+      root[_NEXT] = old[_NEXT]
+      old[_NEXT][_PREV] = root
+      del self._map[old[_KEY]]
+      self.evictions += 1
+    last = root[_PREV]
+    link = [last,root,k,v]
+    last[_NEXT] = root[_PREV] = self._map[k] = link
+    return v
+  def __contains__(self,a):
+    "is the address in any of the ranges"
+    return self.find(a) is not None
+
+  def stats(self):
+    "the counters, the number of addresses held and the size bound"
+    return {"hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "entries": len(self._map),
+            "size": self.size}
+
+if __name__ == "__main__":
+  print "This is an import module"
@@ -0,0 +1,111 @@
+# ipv4cachetest - unit test the ipv4cache module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from ipv4 import *
+from ipv4trie import IPv4Trie
+from ipv4cache import IPv4LookupCache
+
+class testLookupCache(unittest.TestCase):
+  def setUp(self):
+    self.rl = IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.255"),
+                             IPv4Range("10.0.2.0","10.0.2.255")])
+  def testFind(self):
+    c = IPv4LookupCache(self.rl)
+    self.assertEqual("10.0.2.0 - 10.0.2.255",str(c.find("10.0.2.9")))
+    self.assertEqual(None,c.find("10.0.1.1"))
+    self.assertTrue("10.0.0.1" in c)
+    self.assertTrue(IPv4Addr("10.0.0.1") in c)
+    self.assertTrue(IPv4Addr("10.0.0.1").num in c)
+    self.assertFalse("10.0.1.1" in c)
+    self.assertEqual({"hits": 3,"misses": 3,"evictions": 0,"entries": 3,
+                      "size": 65536},c.stats())
+    self.assertRaises(ValueError,IPv4LookupCache,self.rl,0)
+  def testEvict(self):
+    "the least recently used address is the one dropped"
+    c = IPv4LookupCache(self.rl,size=2)
+    c.find("10.0.0.1")
+    c.find("10.0.0.2")
+    c.find("10.0.0.1") # now 10.0.0.2 is the oldest
+    c.find("10.0.0.3")
+    self.assertEqual(1,c.evictions)
+    self.assertEqual(2,len(c))
+    c.find("10.0.0.1")
+    self.assertEqual(2,c.hits)
+    c.find("10.0.0.2")
+    self.assertEqual(4,c.misses)
+    self.assertEqual(2,c.evictions)
+  def testInvalidate(self):
+    c = IPv4LookupCache(self.rl)
+    self.assertFalse("10.0.1.1" in c)
+    self.rl.append(IPv4Range("10.0.1.0","10.0.1.255"))
+    self.assertTrue("10.0.1.1" in c)
+    self.rl.normalize()
+    self.assertEqual("10.0.0.0 - 10.0.2.255",str(c.find("10.0.1.1")))
+    self.rl.extend(IPv4RangeList([IPv4Range("10.0.3.0","10.0.3.0")]))
+    self.assertTrue("10.0.3.0" in c)
+    self.assertEqual(4,c.misses)
+    self.assertEqual(1,len(c))
+  def testOverlapping(self):
+    "a list and an array of overlapping ranges give the same answers"
+    rl = IPv4RangeList([IPv4Range("10.0.0.0","10.0.255.255"),
+                        IPv4Range("10.0.1.0","10.0.1.255"),
+                        IPv4Range("10.0.1.0","10.0.1.127"),
+                        IPv4Range("10.0.1.64","10.0.1.64")])
+    c, d = IPv4LookupCache(rl), IPv4LookupCache(rl.compact())
+    for a in ("10.0.0.1","10.0.1.1","10.0.1.64","10.0.1.65","10.0.1.200",
+              "10.0.2.0","10.1.0.0"):
+      self.assertEqual(str(d.find(a)),str(c.find(a)))
+    self.assertEqual("10.0.1.64 - 10.0.1.64",str(c.find("10.0.1.64")))
+    self.assertEqual("10.0.1.0 - 10.0.1.255",str(c.find("10.0.1.65")))
+  def testArray(self):
+    ra = self.rl.compact()
+    c = IPv4LookupCache(ra)
+    self.assertEqual("10.0.2.0 - 10.0.2.255",str(c.find("10.0.2.9")))
+    self.assertFalse("10.0.1.1" in c)
+    ra.append(IPv4Range("10.0.1.0","10.0.1.255"))
+    self.assertTrue("10.0.1.1" in c)
+  def testTrie(self):
+    t = IPv4Trie([("10.0.0.0/8","a"),("10.0.2.0/24","b")])
+    c = IPv4LookupCache(t)
+    cidr, v = c.find("10.0.2.9")
+    self.assertEqual(("10.0.2.0 - 10.0.2.255","b"),(str(cidr),v))
+    self.assertEqual("a",c.find("10.9.9.9")[1])
+    t.delete("10.0.2.0/24")
+    self.assertEqual("a",c.find("10.0.2.9")[1])
+    self.assertEqual(None,c.find("11.0.0.0"))
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testLookupCache))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,116 @@
+# ipv4compare - compare several IPv4 range tables in one sweep.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Find which address ranges are covered by which of several tables,
+for instance full routing tables from several providers.
+
+All the functions here stream over the tables, which must each be sorted
+(IPv4RangeList and IPv4RangeArray always are) but need not be normalized.
+Only one pending edge per table is held in memory at a time.
+"""
+
+import heapq
+from itertools import izip
+from ipv4 import IPv4Addr, IPv4Range, IPv4RangeArray
+
+def _iterpairs(table):
+  "stream (start,end) long pairs from a sorted table"
+  if isinstance(table,IPv4RangeArray):
+    return izip(table.starts,table.ends)
+  return ((r.start.tolong(),r.end.tolong()) for r in table)
+
+def _edges(table,src):
+  """stream (address,src) at each point where coverage by this table flips,
+  joining overlapping and adjacent ranges on the fly"""
+  start = end = None
+  for s,e in _iterpairs(table):
+    if start is not None and s <= end + 1:
+      if e > end:
+        end = e
+    else:
+      if start is not None:
+        yield start,src
+        yield end + 1,src
+      start, end = s, e
+  if start is not None:
+    yield start,src
+    yield end + 1,src
+
+def _labelled(tables):
+  "(labels,tables) from a dict of tables or a sequence of them"
+  if isinstance(tables,dict):
+    items = tables.items()
+    return [k for k,t in items], [t for k,t in items]
+  tables = list(tables)
+  return range(len(tables)), tables
+
+def sweep(tables):
+  """generate (IPv4Range,labels) for every maximal range covered by the same
+  set of tables. labels is a frozenset of dict keys, or of list indices if
+  tables is a sequence. Uncovered gaps are skipped."""
+  labels, tables = _labelled(tables)
+  active = set()
+  prev = None
+  for pos,src in heapq.merge(*[_edges(t,i) for i,t in enumerate(tables)]):
+    if pos != prev:
+      if active:
+        yield (IPv4Range(IPv4Addr(prev),IPv4Addr(pos - 1)),
+               frozenset([labels[i] for i in active]))
+      prev = pos
+    if src in active:
+      active.remove(src)
+    else:
+      active.add(src)
+
+def select(tables,test):
+  "sweep keeping only the ranges whose set of labels passes test(labels)"
+  for r,l in sweep(tables):
+    if test(l):
+      yield r,l
+
+def unique(tables):
+  "ranges found in exactly one table, with that table's label"
+  for r,l in select(tables,lambda l: len(l) == 1):
+    yield r,iter(l).next()
+
+def common(tables):
+  "ranges found in every table"
+  n = len(tables)
+  for r,l in select(tables,lambda l: len(l) == n):
+    yield r
+
+def exactly(tables,subset):
+  "ranges found in all of the chosen tables and in no others"
+  subset = frozenset(subset)
+  for r,l in select(tables,lambda l: l == subset):
+    yield r
+
+if __name__ == "__main__":
+  print "This is an import module"
@@ -0,0 +1,77 @@
+# ipv4comparetest - unit test the ipv4compare module
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from ipv4 import *
+from ipv4compare import *
+
+class testCompare(unittest.TestCase):
+  def setUp(self):
+    self.tables = {
+      "a": IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.255"),
+                          IPv4Range("10.0.0.16","10.0.0.31"),
+                          IPv4Range("10.0.2.0","10.0.2.255")]),
+      "b": IPv4RangeList([IPv4Range("10.0.0.128","10.0.1.255")]).compact(),
+      "c": IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.199"),
+                          IPv4Range("10.0.2.0","10.0.2.255")])}
+  def testSweep(self):
+    result = [(str(r),"".join(sorted(l))) for r,l in sweep(self.tables)]
+    self.assertEqual([("10.0.0.0 - 10.0.0.127","ac"),
+                      ("10.0.0.128 - 10.0.0.199","abc"),
+                      ("10.0.0.200 - 10.0.0.255","ab"),
+                      ("10.0.1.0 - 10.0.1.255","b"),
+                      ("10.0.2.0 - 10.0.2.255","ac")],result)
+  def testUnique(self):
+    self.assertEqual([("10.0.1.0 - 10.0.1.255","b")],
+                     [(str(r),l) for r,l in unique(self.tables)])
+  def testCommon(self):
+    self.assertEqual(["10.0.0.128 - 10.0.0.199"],
+                     [str(r) for r in common(self.tables)])
+  def testExactly(self):
+    self.assertEqual(["10.0.0.0 - 10.0.0.127","10.0.2.0 - 10.0.2.255"],
+                     [str(r) for r in exactly(self.tables,"ac")])
+  def testSequence(self):
+    tables = [self.tables["a"],self.tables["b"]]
+    self.assertEqual([("10.0.0.0 - 10.0.0.127",0),
+                      ("10.0.1.0 - 10.0.1.255",1),
+                      ("10.0.2.0 - 10.0.2.255",0)],
+                     [(str(r),l) for r,l in unique(tables)])
+  def testEndOfSpace(self):
+    tables = [IPv4RangeList([IPv4Range("255.255.255.0","255.255.255.255")]),
+              IPv4RangeList()]
+    self.assertEqual(["255.255.255.0 - 255.255.255.255"],
+                     [str(r) for r,l in unique(tables)])
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testCompare))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,187 @@
+# ipv4file - compact binary files of IPv4 ranges, loaded with mmap.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Save an IPv4RangeArray or IPv4RangeList to a binary file and map it
+back into memory without parsing anything.
+
+The file is a 32 byte header followed by packed little endian uint32
+columns, each holding one value per range in sorted order:
+
+  header    "IPV4RNG\0", version, flags, count, reserved
+  starts    first address of each range
+  ends      last address of each range
+  maxends   running maximum of ends, only if the ranges overlap
+  payloads  an optional uint32 per range, e.g. an ASN or a table index
+
+Loading maps the file read-only, so it costs O(1) whatever the size and
+every process mapping the same file shares one copy in the page cache.
+"""
+
+import os, mmap, struct, sys
+from array import array
+from ipv4 import IPv4RangeArray, IPv4RangeList, _u32, numpy
+
+_magic = "IPV4RNG\0"
+_version = 1
+_header = struct.Struct("<8sIIQQ")
+HAS_MAXENDS = 1
+HAS_PAYLOADS = 2
+
+class _Column(object):
+  "read-only sequence of little endian uint32 values in a buffer"
+  __slots__ = ["buf","offset","count"]
+  _item = struct.Struct("<I")
+  def __init__(self,buf,offset,count):
+    self.buf = buf
+    self.offset = offset
+    self.count = count
+  def __len__(self):
+    return self.count
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return array(_u32,[self[j] for j in xrange(*i.indices(self.count))])
+    if i < 0:
+      i += self.count
+    if i < 0 or i >= self.count:
+      raise IndexError("column index out of range")
+    return self._item.unpack_from(self.buf,self.offset + 4*i)[0]
+  def __iter__(self):
+    for i in xrange(0,self.count,65536): # unpack a block at a time
+      k = min(65536,self.count - i)
+      for x in struct.unpack_from("<%dI" % k,self.buf,self.offset + 4*i):
+        yield x
+  def asnumpy(self):
+    "zero copy numpy view of the column"
+    if not self.count:
+      return numpy.zeros(0,dtype=numpy.uint32)
+    return numpy.frombuffer(self.buf,dtype="<u4",count=self.count,
+                            offset=self.offset)
+
+def _writecolumn(f,values):
+  a = array(_u32,values)
+  if sys.byteorder == "big":
+    a.byteswap()
+  a.tofile(f)
+
+def save(path,ranges,payloads=None):
+  """write a sorted IPv4RangeArray or IPv4RangeList, and optionally one
+  uint32 payload per range, to path. The file is written under a
+  temporary name and renamed into place, so readers never see half of it.
+  Any other sequence of ranges is sorted first, along with its payloads"""
+  if not isinstance(ranges,(IPv4RangeArray,IPv4RangeList)):
+    ranges = list(ranges)
+  if payloads is not None:
+    payloads = list(payloads)
+    if len(payloads) != len(ranges):
+      raise ValueError("need exactly one payload per range")
+    if not isinstance(ranges,(IPv4RangeArray,IPv4RangeList)):
+      pairs = sorted(zip(ranges,payloads),key=lambda p: p[0]._key)
+      ranges = IPv4RangeList.from_sorted([p[0] for p in pairs])
+      payloads = [p[1] for p in pairs]
+  if not isinstance(ranges,IPv4RangeArray):
+    ranges = IPv4RangeArray(ranges)
+  n = len(ranges)
+  maxends = ranges._prefixmax()
+  flags = 0
+  if maxends is not ranges.ends:
+    flags |= HAS_MAXENDS
+  if payloads is not None:
+    flags |= HAS_PAYLOADS
+  tmp = "%s.%d.tmp" % (path,os.getpid())
+  f = open(tmp,"wb")
+  try:
+    f.write(_header.pack(_magic,_version,flags,n,0))
+    _writecolumn(f,ranges.starts)
+    _writecolumn(f,ranges.ends)
+    if flags & HAS_MAXENDS:
+      _writecolumn(f,maxends)
+    if flags & HAS_PAYLOADS:
+      _writecolumn(f,payloads)
+  finally:
+    f.close()
+  os.rename(tmp,path)
+
+class IPv4RangeFile(IPv4RangeArray):
+  """a read-only IPv4RangeArray whose columns live in a mapped file
+
+  All the IPv4RangeArray lookups (in, find, contains_many, find_many,
+  addrs) run straight against the mapped buffers: the columns are small
+  sequence objects that unpack values on demand, and the batch lookups
+  take zero copy numpy views of them."""
+  __slots__ = ["payloads","_map"]
+  def __init__(self,path):
+    f = open(path,"rb")
+    try:
+      self._map = m = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    finally:
+      f.close()
+    magic, version, flags, n, reserved = _header.unpack_from(m,0)
+    if magic != _magic or version != _version:
+      raise ValueError("%s is not an IPv4 range file" % path)
+    if len(m) < _header.size + 4*n*(2 + bin(flags).count("1")):
+      raise ValueError("%s is truncated" % path)
+    offset = _header.size
+    self.starts = _Column(m,offset,n)
+    self.ends = _Column(m,offset + 4*n,n)
+    offset += 8*n
+    if flags & HAS_MAXENDS:
+      self._maxends = _Column(m,offset,n)
+      offset += 4*n
+    else:
+      self._maxends = self.ends
+    self.payloads = None
+    self.version = 0
+    if flags & HAS_PAYLOADS:
+      self.payloads = _Column(m,offset,n)
+  def get(self,a,default=None):
+    "payload of the last range containing the address, or default"
+    i = self.find(a)
+    if i < 0 or self.payloads is None:
+      return default
+    return self.payloads[i]
+  def append(self,r):
+    raise TypeError("mapped range files are read-only")
+  def normalize(self):
+    raise TypeError("mapped range files are read-only")
+  @classmethod
+  def _frompairs(cls,pairs):
+    "set operations on a mapped file give an ordinary IPv4RangeArray"
+    return IPv4RangeArray._frompairs(pairs)
+  def close(self):
+    "unmap the file; the columns must not be used afterwards"
+    self.starts = self.ends = self._maxends = self.payloads = None
+    self._map.close()
+
+def load(path):
+  "map a range file into memory, see IPv4RangeFile"
+  return IPv4RangeFile(path)
+
+if __name__ == "__main__":
+  print "This is an import module"
@@ -0,0 +1,102 @@
+# ipv4filetest - unit test the ipv4file module
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, tempfile, os, shutil
+from ipv4 import *
+import ipv4file
+
+class testIPv4File(unittest.TestCase):
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.dir,"ranges.bin")
+    self.rl = IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.255"),
+                             IPv4Range("192.168.1.0","192.168.1.127"),
+                             IPv4Range("172.16.0.0","172.16.255.255")])
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+  def testRoundTrip(self):
+    ipv4file.save(self.path,self.rl,[65001,65002,65003])
+    f = ipv4file.load(self.path)
+    self.assertEqual(32 + 3*12,os.path.getsize(self.path))
+    self.assertEqual(3,len(f))
+    self.assertEqual(str(self.rl),str(f))
+    self.assertTrue("172.16.4.4" in f)
+    self.assertFalse("172.17.0.0" in f)
+    self.assertEqual(2,f.find("192.168.1.1"))
+    self.assertEqual(65002,f.get("172.16.0.1"))
+    self.assertEqual(None,f.get("1.1.1.1"))
+    self.assertEqual([1,0],[int(x) for x in f.contains_many(["10.0.0.1",
+                                                            "10.0.1.1"])])
+    self.assertEqual("10.0.0.0 - 192.168.1.127",str(f.span()))
+    self.assertEqual(256 + 65536 + 128,len(f.addrs()))
+    self.assertRaises(TypeError,f.append,IPv4Range("1.0.0.0","1.0.0.1"))
+    f.close()
+  def testUnsortedPayloads(self):
+    "payloads of a plain list stay with their ranges when it is sorted"
+    ipv4file.save(self.path,list(reversed(list(self.rl))),[3,2,1])
+    f = ipv4file.load(self.path)
+    self.assertEqual(str(self.rl),str(f))
+    self.assertEqual([1,2,3],list(f.payloads))
+    self.assertEqual(1,f.get("10.0.0.7"))
+    self.assertRaises(TypeError,f.normalize)
+    u = f.union(IPv4RangeList([IPv4Range("10.0.1.0","10.0.1.255")]))
+    self.assertTrue(isinstance(u,IPv4RangeArray))
+    self.assertEqual("10.0.0.0-10.0.1.255",str(u[:1]))
+    f.close()
+  def testOverlapping(self):
+    self.rl.extend(IPv4Range("10.0.0.0","10.255.255.255"))
+    ipv4file.save(self.path,self.rl.compact())
+    f = ipv4file.load(self.path)
+    self.assertEqual(32 + 4*12,os.path.getsize(self.path))
+    self.assertTrue("10.200.0.0" in f)
+    self.assertEqual([1],[int(x) for x in f.find_many(["10.0.1.0"])])
+    self.assertEqual(None,f.payloads)
+    f.close()
+  def testEmpty(self):
+    ipv4file.save(self.path,IPv4RangeList())
+    f = ipv4file.load(self.path)
+    self.assertEqual(0,len(f))
+    self.assertFalse("10.0.0.0" in f)
+    self.assertEqual([0],[int(x) for x in f.contains_many(["10.0.0.0"])])
+    f.close()
+  def testBadFile(self):
+    open(self.path,"wb").write("x"*64)
+    self.assertRaises(ValueError,ipv4file.load,self.path)
+    ipv4file.save(self.path,self.rl)
+    open(self.path,"r+b").truncate(40)
+    self.assertRaises(ValueError,ipv4file.load,self.path)
+    self.assertRaises(ValueError,ipv4file.save,self.path,self.rl,[1])
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testIPv4File))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
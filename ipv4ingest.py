@@ -0,0 +1,193 @@
+# ipv4ingest - pull the address space in use out of router configs and dumps
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Read router configurations and route table dumps, many files at once,
+and merge every block they mention into one normalized IPv4RangeList.
+
+Each block found is one of these kinds
+
+  interface   ip address a.b.c.d m.m.m.m, address a.b.c.d/n; under
+              family inet, set interfaces ... family inet address
+  static      ip route a.b.c.d m.m.m.m ..., route a.b.c.d/n under static,
+              set routing-options static route a.b.c.d/n
+  prefixlist  ip prefix-list ... permit a.b.c.d/n, a.b.c.d/n; inside a
+              prefix-list, set policy-options prefix-list NAME a.b.c.d/n
+  route       a line of show ip route or show route output
+
+Interface addresses give the subnet they sit in. Lines of other kinds,
+deny entries and non contiguous masks are skipped.
+"""
+
+import re, heapq, multiprocessing
+from array import array
+from ipv4 import IPv4RangeList, _mergepairs, _u32
+from ipv4parse import _quad
+
+KINDS = ("interface","static","prefixlist","route")
+
+_q = r"(\d{1,3}(?:\.\d{1,3}){3})"
+_ciscoaddr = re.compile(r"ip(?:v4)? address %s(?:/(\d+)| %s)" % (_q,_q))
+_ciscoroute = re.compile(r"ip route (?:vrf \S+ )?%s(?:/(\d+)| %s)" % (_q,_q))
+_ciscoprefix = re.compile(r"ip prefix-list \S+ (?:seq \d+ )?permit %s/(\d+)"
+                          % _q)
+_setaddr = re.compile(r"set interfaces \S+ .*family inet address %s/(\d+)"
+                      % _q)
+_setroute = re.compile(r"set (?:routing-instances \S+ )?routing-options "
+                       r"static route %s/(\d+)" % _q)
+_setprefix = re.compile(r"set policy-options prefix-list \S+ %s/(\d+)" % _q)
+_junaddr = re.compile(r"address %s/(\d+)\s*[;{]" % _q)
+_junroute = re.compile(r"route %s/(\d+)[\s;{]" % _q)
+_junprefix = re.compile(r"%s/(\d+);" % _q)
+_subnetted = re.compile(r"%s/(\d+) is (variably )?subnetted" % _q)
+_dump = re.compile(r"(?:[A-Za-z*+%%]{1,3}(?: [A-Z0-9*+%%]{1,3})?\s+)?%s"
+                   r"(?:/(\d+))?\s+(?:\*?\[|is directly connected|"
+                   r"is a summary|via )" % _q)
+
+def _block(a,n=None,m=None):
+  "(start,end) of the block of the address a with length n or netmask m"
+  if m is not None:
+    host = ~_quad(m) & 0xFFFFFFFFL
+    if host & (host + 1):
+      raise ValueError(m) # not contiguous, a wildcard mask perhaps
+  else:
+    n = int(n)
+    if n > 32:
+      raise ValueError(n)
+    host = 0xFFFFFFFFL >> n
+  s = _quad(a) & ~host & 0xFFFFFFFFL
+  return s, s | host
+
+def _within(stack,name):
+  "is the line inside a { } block with name in its header"
+  for words in stack:
+    if name in words:
+      return True
+  return False
+
+def extract(lines,kinds=None):
+  """generate (kind,start,end) for every block found in the lines of one
+  file, keeping only the kinds listed if kinds is given"""
+  stack = [] # headers of the enclosing { } blocks of a Junos config
+  subnet = None # prefix length from an "is subnetted" route table header
+  for line in lines:
+    line = line.strip()
+    if not line:
+      continue
+    found = None
+    try:
+      if line.startswith("ip"):
+        m = _ciscoaddr.match(line)
+        if m:
+          found = "interface", _block(*m.groups())
+        else:
+          m = _ciscoroute.match(line)
+          if m:
+            found = "static", _block(*m.groups())
+          else:
+            m = _ciscoprefix.match(line)
+            if m:
+              found = "prefixlist", _block(*m.groups())
+      elif line.startswith("set "):
+        for kind,r in (("interface",_setaddr),("static",_setroute),
+                       ("prefixlist",_setprefix)):
+          m = r.match(line)
+          if m:
+            found = kind, _block(*m.groups())
+            break
+      elif stack and line[-1] in ";{":
+        m = _within(stack,"inet") and _junaddr.match(line)
+        if m:
+          found = "interface", _block(*m.groups())
+        else:
+          m = _within(stack,"static") and _junroute.match(line)
+          if m:
+            found = "static", _block(*m.groups())
+          else:
+            m = _within(stack,"prefix-list") and _junprefix.match(line)
+            if m:
+              found = "prefixlist", _block(*m.groups())
+      else:
+        m = _subnetted.match(line)
+        if m:
+          subnet = not m.group(3) and int(m.group(2)) or None
+        else:
+          m = _dump.match(line)
+          if m and (m.group(2) is not None or subnet is not None):
+            found = "route", _block(m.group(1),m.group(2) or subnet)
+    except ValueError:
+      found = None
+    if line[-1] == "{":
+      stack.append(line[:-1].split())
+    elif line[0] == "}" and stack:
+      stack.pop()
+    if found is not None and (kinds is None or found[0] in kinds):
+      yield found[0], found[1][0], found[1][1]
+
+def _filestask(task):
+  "parse a batch of files into sorted, merged start and end columns"
+  paths, kinds = task
+  pairs = []
+  for p in paths:
+    f = open(p)
+    try:
+      pairs.extend([(s,e) for k,s,e in extract(f,kinds)])
+    finally:
+      f.close()
+  pairs.sort()
+  pairs = _mergepairs(pairs)
+  return (array(_u32,[p[0] for p in pairs]),
+          array(_u32,[p[1] for p in pairs]))
+
+def ingest(paths,kinds=None,processes=None,batch=64):
+  """parse config and dump files in a process pool and return the blocks
+  found as one normalized IPv4RangeList
+
+  Each task parses batch files and hands back its blocks sorted and
+  merged; the partial lists are then merged k ways, with no sort of the
+  whole. processes defaults to the number of cpus and processes=1 parses
+  in this process. A file that cannot be read raises IOError."""
+  paths = list(paths)
+  tasks = [(paths[i:i + batch],kinds) for i in xrange(0,len(paths),batch)]
+  if processes is None:
+    processes = multiprocessing.cpu_count()
+  if processes > 1 and len(tasks) > 1:
+    pool = multiprocessing.Pool(min(processes,len(tasks)))
+    try:
+      parts = list(pool.imap_unordered(_filestask,tasks))
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    parts = map(_filestask,tasks)
+  return IPv4RangeList._frompairs(_mergepairs(heapq.merge(*[zip(s,e)
+                                                           for s,e in parts])))
+
+if __name__ == "__main__":
+  print "This is an import module"
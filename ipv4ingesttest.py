@@ -0,0 +1,157 @@
+# ipv4ingesttest - unit test the ipv4ingest module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, os, shutil, tempfile
+from ipv4 import *
+from ipv4ingest import extract, ingest
+
+ios = """!
+interface GigabitEthernet0/0
+ ip address 10.0.0.1 255.255.255.0
+ ip address 10.0.9.1 255.255.255.252 secondary
+interface Loopback0
+ ip address 192.0.2.1 255.255.255.255
+interface Vlan5
+ ip address dhcp
+ip route 10.1.0.0 255.255.0.0 10.0.0.254
+ip route vrf CUST 172.16.0.0 255.240.0.0 Null0
+ip route 10.9.0.0 0.0.255.255 10.0.0.254
+ip prefix-list OUT seq 5 permit 198.51.100.0/24 le 32
+ip prefix-list OUT seq 10 deny 203.0.113.0/24
+"""
+
+junos = """interfaces {
+    ge-0/0/0 {
+        unit 0 {
+            family inet {
+                address 10.2.0.1/24;
+            }
+            family inet6 {
+                address 2001:db8::1/64;
+            }
+        }
+    }
+}
+routing-options {
+    static {
+        route 10.3.0.0/16 next-hop 10.2.0.254;
+        route 10.4.0.0/16 {
+            discard;
+        }
+    }
+}
+policy-options {
+    prefix-list CUST {
+        10.5.0.0/16;
+    }
+}
+set interfaces ge-0/0/1 unit 0 family inet address 10.6.0.1/30
+set routing-options static route 10.7.0.0/16 next-hop 10.6.0.2
+set policy-options prefix-list CUST 10.8.0.0/24
+"""
+
+dump = """Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP
+Gateway of last resort is 192.0.2.9 to network 0.0.0.0
+
+S*    0.0.0.0/0 [1/0] via 192.0.2.9
+      10.0.0.0/8 is variably subnetted, 3 subnets, 2 masks
+C        10.0.0.0/24 is directly connected, GigabitEthernet0/0
+L        10.0.0.1/32 is directly connected, GigabitEthernet0/0
+O IA     10.20.0.0/16 [110/2] via 10.0.0.2, 00:01:02, GigabitEthernet0/0
+     172.31.0.0/24 is subnetted, 2 subnets
+C       172.31.1.0 is directly connected, Serial0
+D EX    172.31.2.0 [170/2] via 10.0.0.3, 00:00:10, Serial0
+100.64.0.0/10      *[Static/5] 2d 03:01:02
+                    > to 192.0.2.9 via ge-0/0/0.0
+"""
+
+def _blocks(text,kinds=None):
+  return [(k,str(IPv4Range(s,e))) for k,s,e in extract(text.splitlines(),
+                                                       kinds)]
+
+class testIngest(unittest.TestCase):
+  def testCisco(self):
+    self.assertEqual([("interface","10.0.0.0 - 10.0.0.255"),
+                      ("interface","10.0.9.0 - 10.0.9.3"),
+                      ("interface","192.0.2.1 - 192.0.2.1"),
+                      ("static","10.1.0.0 - 10.1.255.255"),
+                      ("static","172.16.0.0 - 172.31.255.255"),
+                      ("prefixlist","198.51.100.0 - 198.51.100.255")],
+                     _blocks(ios))
+  def testJunos(self):
+    self.assertEqual([("interface","10.2.0.0 - 10.2.0.255"),
+                      ("static","10.3.0.0 - 10.3.255.255"),
+                      ("static","10.4.0.0 - 10.4.255.255"),
+                      ("prefixlist","10.5.0.0 - 10.5.255.255"),
+                      ("interface","10.6.0.0 - 10.6.0.3"),
+                      ("static","10.7.0.0 - 10.7.255.255"),
+                      ("prefixlist","10.8.0.0 - 10.8.0.255")],
+                     _blocks(junos))
+    self.assertEqual(["10.2.0.0 - 10.2.0.255","10.6.0.0 - 10.6.0.3"],
+                     [r for k,r in _blocks(junos,["interface"])])
+  def testDump(self):
+    self.assertEqual(["0.0.0.0 - 255.255.255.255","10.0.0.0 - 10.0.0.255",
+                      "10.0.0.1 - 10.0.0.1","10.20.0.0 - 10.20.255.255",
+                      "172.31.1.0 - 172.31.1.255","172.31.2.0 - 172.31.2.255",
+                      "100.64.0.0 - 100.127.255.255"],
+                     [r for k,r in _blocks(dump)])
+  def testIngest(self):
+    tmp = tempfile.mkdtemp()
+    try:
+      paths = []
+      for i in range(10):
+        for name,text in (("ios",ios),("junos",junos)):
+          paths.append(os.path.join(tmp,"%s%d.cfg" % (name,i)))
+          f = open(paths[-1],"w")
+          f.write(text.replace("10.","%d." % (20 + i)))
+          f.close()
+      serial = ingest(paths,processes=1)
+      self.assertEqual(str(serial),str(ingest(paths,processes=2,batch=3)))
+      self.assertTrue(isinstance(serial,IPv4RangeList))
+      rl = IPv4RangeList([IPv4Range(s,e) for p in paths
+                          for k,s,e in extract(open(p))])
+      rl.normalize()
+      self.assertEqual(str(rl),str(serial))
+      self.assertEqual("20.0.0.0-20.0.0.255,20.0.9.0-20.0.9.3,"
+                       "192.0.2.1-192.0.2.1",
+                       str(ingest(paths[:1],kinds=["interface"])))
+      self.assertEqual([],list(ingest([])))
+      self.assertRaises(IOError,ingest,[os.path.join(tmp,"missing")],
+                        processes=1)
+    finally:
+      shutil.rmtree(tmp)
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testIngest))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,200 @@
+# ipv4interval - an interval index for ranges that overlap each other
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import random
+from ipv4 import IPv4Range, IPv4RangeList, _addrlong, _rangekey
+
+def _bounds(q):
+  "(start,end) of an IPv4Range or of a single address"
+  if isinstance(q,IPv4Range):
+    return q.start.num, q.end.num
+  a = _addrlong(q)
+  return a, a
+
+class _Node(object):
+  __slots__ = ["range","key","start","end","prio","left","right",
+               "maxend","minend"] # keep nodes small
+  def __init__(self,r,prio):
+    self.range = r
+    self.key = r._key
+    self.start = r.start.num
+    self.end = r.end.num
+    self.prio = prio
+    self.left = self.right = None
+    self.maxend = self.minend = self.end
+
+def _fix(n):
+  "recompute the end bounds of n's subtree from its children"
+  mx = mn = n.end
+  l, r = n.left, n.right
+  if l is not None:
+    if l.maxend > mx: mx = l.maxend
+    if l.minend < mn: mn = l.minend
+  if r is not None:
+    if r.maxend > mx: mx = r.maxend
+    if r.minend < mn: mn = r.minend
+  n.maxend, n.minend = mx, mn
+  return n
+
+def _split(n,k):
+  "split a subtree into nodes with key < k and nodes with key >= k"
+  if n is None:
+    return None, None
+  if n.key < k:
+    n.right, r = _split(n.right,k)
+    return _fix(n), r
+  l, n.left = _split(n.left,k)
+  return l, _fix(n)
+
+def _merge(a,b):
+  "join two subtrees where every key in a is <= every key in b"
+  if a is None:
+    return b
+  if b is None:
+    return a
+  if a.prio > b.prio:
+    a.right = _merge(a.right,b)
+    return _fix(a)
+  b.left = _merge(a,b.left)
+  return _fix(b)
+
+def _build(nodes,lo,hi):
+  "balanced subtree from the sorted nodes[lo:hi]"
+  if lo >= hi:
+    return None
+  mid = (lo + hi) // 2
+  n = nodes[mid]
+  n.left = _build(nodes,lo,mid)
+  n.right = _build(nodes,mid+1,hi)
+  return _fix(n)
+
+class IPv4IntervalIndex(object):
+  """index over ranges that may overlap or repeat, for tables that cannot
+  be normalized, such as an allocation with assignments inside it
+
+  Ranges are kept in a treap ordered by start then end, with every node
+  knowing the lowest and highest end in its subtree. A query only visits
+  subtrees that can hold an answer, so it costs O(log n) plus the ranges
+  found, and insert and delete are O(log n) on average. Queries take an
+  IPv4Range or an address and give the stored ranges in sorted order."""
+  __slots__ = ["root","count"]
+  def __init__(self,ranges=[]):
+    rs = list(ranges)
+    for r in rs:
+      if not isinstance(r,IPv4Range):
+        raise ValueError("IPv4IntervalIndex items must be IPv4Range")
+    rs.sort(key=_rangekey)
+    # a balanced tree with priorities that fall with depth is a valid treap
+    prios = sorted([random.random() for r in rs],reverse=True)
+    nodes = [_Node(r,0.0) for r in rs]
+    self.count = len(nodes)
+    self.root = _build(nodes,0,len(nodes))
+    level = self.root is not None and [self.root] or []
+    i = 0
+    while level:
+      nxt = []
+      for n in level:
+        n.prio = prios[i]
+        i += 1
+        if n.left is not None: nxt.append(n.left)
+        if n.right is not None: nxt.append(n.right)
+      level = nxt
+  def __len__(self):
+    return self.count
+  def __iter__(self):
+    return self._walk(0,0xFFFFFFFFL,0,0xFFFFFFFFL)
+
+  def insert(self,r):
+    "add a range, even if an equal one is already present"
+    if not isinstance(r,IPv4Range):
+      raise ValueError("IPv4IntervalIndex items must be IPv4Range")
+    # equal keys go after the ones already present
+    l, g = _split(self.root,r._key + 1)
+    self.root = _merge(_merge(l,_Node(r,random.random())),g)
+    self.count += 1
+  def delete(self,r):
+    "remove one range equal to r, raising KeyError if there is none"
+    k = _rangekey(r)
+    l, g = _split(self.root,k)
+    m, g = _split(g,k + 1)
+    if m is None:
+      self.root = _merge(l,g)
+      raise KeyError(r)
+    m = _merge(m.left,m.right) # drop one of the equal ranges
+    self.root = _merge(_merge(l,m),g)
+    self.count -= 1
+  def __contains__(self,r):
+    "is a range equal to r stored"
+    k = _rangekey(r)
+    n = self.root
+    while n is not None:
+      if n.key == k:
+        return True
+      if k < n.key:
+        n = n.left
+      else:
+        n = n.right
+    return False
+
+  def _walk(self,lo,hi,endmin,endmax):
+    "generate ranges with lo <= start <= hi and endmin <= end <= endmax"
+    stack = []
+    n = self.root
+    while True:
+      while n is not None:
+        if n.maxend < endmin or n.minend > endmax:
+          break # nothing in this subtree can match
+        stack.append(n)
+        n = n.start >= lo and n.left or None # left starts are all <= this
+      if not stack:
+        return
+      n = stack.pop()
+      if n.start > hi:
+        return # in order, so every later start is bigger still
+      if n.start >= lo and endmin <= n.end <= endmax:
+        yield n.range
+      n = n.right
+  def overlapping(self,q):
+    "generate the stored ranges sharing at least one address with q"
+    s,e = _bounds(q)
+    return self._walk(0,e,s,0xFFFFFFFFL)
+  def containing(self,q):
+    "generate the stored ranges that contain all of q"
+    s,e = _bounds(q)
+    return self._walk(0,s,e,0xFFFFFFFFL)
+  def within(self,q):
+    "generate the stored ranges that are contained by q"
+    s,e = _bounds(q)
+    return self._walk(s,e,s,e)
+  def torangelist(self):
+    return IPv4RangeList.from_sorted(list(self))
+
+if __name__ == "__main__":
+  print "This is an import module"
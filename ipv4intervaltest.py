@@ -0,0 +1,123 @@
+# ipv4intervaltest - unit test the ipv4interval module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+from ipv4interval import IPv4IntervalIndex
+
+def _strs(rs):
+  return [str(r) for r in rs]
+
+class testIntervalIndex(unittest.TestCase):
+  def setUp(self):
+    self.alloc = IPv4Range("10.0.0.0","10.0.255.255")
+    self.cust1 = IPv4Range("10.0.1.0","10.0.1.255")
+    self.cust2 = IPv4Range("10.0.1.128","10.0.2.127")
+    self.other = IPv4Range("192.168.0.0","192.168.0.255")
+    self.ix = IPv4IntervalIndex([self.other,self.cust2,self.alloc,self.cust1])
+  def testCreate(self):
+    self.assertEqual(4,len(self.ix))
+    self.assertEqual(_strs(sorted([self.alloc,self.cust1,self.cust2,
+                                   self.other])),_strs(self.ix))
+    self.assertEqual(0,len(IPv4IntervalIndex()))
+    self.assertEqual([],list(IPv4IntervalIndex()))
+    self.assertRaises(ValueError,IPv4IntervalIndex,["10.0.0.0"])
+  def testOverlapping(self):
+    self.assertEqual(_strs([self.alloc,self.cust1,self.cust2]),
+                     _strs(self.ix.overlapping("10.0.1.200")))
+    self.assertEqual(_strs([self.alloc,self.cust2]),
+                     _strs(self.ix.overlapping(IPv4Range("10.0.2.0",
+                                                         "10.0.2.0"))))
+    self.assertEqual(_strs([self.alloc,self.cust2,self.other]),
+                     _strs(self.ix.overlapping(IPv4Range("10.0.2.100",
+                                                         "192.168.0.0"))))
+    self.assertEqual([],list(self.ix.overlapping("11.0.0.0")))
+  def testContaining(self):
+    self.assertEqual(_strs([self.alloc,self.cust1]),
+                     _strs(self.ix.containing(IPv4Range("10.0.1.0",
+                                                        "10.0.1.127"))))
+    self.assertEqual(_strs([self.alloc]),
+                     _strs(self.ix.containing(IPv4Range("10.0.1.0",
+                                                        "10.0.2.0"))))
+  def testWithin(self):
+    self.assertEqual(_strs([self.alloc,self.cust1,self.cust2]),
+                     _strs(self.ix.within(self.alloc)))
+    self.assertEqual(_strs([self.cust1]),
+                     _strs(self.ix.within(IPv4Range("10.0.0.255",
+                                                    "10.0.2.0"))))
+  def testInsertDelete(self):
+    self.ix.insert(IPv4Range("10.0.1.0","10.0.1.255")) # a duplicate
+    self.assertEqual(5,len(self.ix))
+    self.assertEqual(3,len(list(self.ix.overlapping("10.0.1.1"))))
+    self.ix.delete(self.cust1)
+    self.assertTrue(self.cust1 in self.ix)
+    self.ix.delete(self.cust1)
+    self.assertFalse(self.cust1 in self.ix)
+    self.assertRaises(KeyError,self.ix.delete,self.cust1)
+    self.assertEqual(3,len(self.ix))
+    self.assertEqual(_strs([self.alloc,self.cust2,self.other]),
+                     _strs(self.ix))
+    self.assertRaises(ValueError,self.ix.insert,"10.0.0.0")
+  def testRandom(self):
+    "compare against a brute force scan while inserting and deleting"
+    rnd = random.Random(17)
+    def rrange():
+      s = rnd.randrange(1 << 16)
+      return IPv4Range(s,s + rnd.randrange(1 << rnd.randrange(1,14)))
+    rs = [rrange() for i in range(300)]
+    ix = IPv4IntervalIndex(rs[:150])
+    for r in rs[150:]:
+      ix.insert(r)
+    for r in rs[::3]:
+      ix.delete(r)
+    del rs[::3]
+    self.assertEqual(sorted(rs),list(ix))
+    for i in range(100):
+      q = rrange()
+      s,e = q.start.num, q.end.num
+      self.assertEqual(sorted([r for r in rs if r.start.num <= e and
+                                                r.end.num >= s]),
+                       list(ix.overlapping(q)))
+      self.assertEqual(sorted([r for r in rs if q in r]),
+                       list(ix.containing(q)))
+      self.assertEqual(sorted([r for r in rs if r in q]),
+                       list(ix.within(q)))
+  def testToRangeList(self):
+    self.assertEqual(4,len(self.ix.torangelist()))
+    self.assertEqual(str(self.ix.torangelist()),
+                     str(IPv4RangeList(list(self.ix))))
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testIntervalIndex))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,107 @@
+# ipv4live - a range set kept up to date from a stream of updates
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from ipv4 import IPv4Range, IPv4RangeList, _mergepairs, _combine, _opdiff
+from ipv4interval import IPv4IntervalIndex
+
+class IPv4LiveSet(object):
+  """set of ranges, such as the prefixes of a BGP feed, updated in place
+
+  Members sit in an IPv4IntervalIndex, so adding or removing one costs
+  O(log n) instead of the O(n) of IPv4RangeList.append. apply() takes a
+  batch of updates and reports how the coverage, the union of the
+  members, changed. It only looks at the members overlapping the ranges
+  in the batch, so the cost does not grow with the size of the table.
+  Adding a range already present or removing one that is not does
+  nothing, as with a route that is announced again or withdrawn twice."""
+  __slots__ = ["index"]
+  def __init__(self,ranges=[]):
+    self.index = IPv4IntervalIndex(set(ranges))
+  def __len__(self):
+    return len(self.index)
+  def __iter__(self):
+    return iter(self.index)
+
+  def _coverage(self,s,e):
+    "merged (start,end) pairs of the coverage inside s..e"
+    out = []
+    for r in self.index._walk(0,e,s,0xFFFFFFFFL): # in order of start
+      a, b = max(r.start.num,s), min(r.end.num,e)
+      if out and a <= out[-1][1] + 1:
+        if b > out[-1][1]:
+          out[-1] = (out[-1][0],b)
+      else:
+        out.append((a,b))
+      if out[-1][1] == e:
+        break # the rest start later and end by e, so add nothing
+    return out
+  def __contains__(self,q):
+    "is the address or range covered, possibly by several members"
+    if isinstance(q,IPv4Range):
+      s, e = q.start.num, q.end.num
+    else:
+      s = e = IPv4Range(q,q).start.num
+    return self._coverage(s,e) == [(s,e)]
+
+  def apply(self,announce=(),withdraw=()):
+    """remove the withdrawn ranges then add the announced ones, in the
+    order of a BGP UPDATE, and return (covered,uncovered): IPv4RangeLists
+    of the addresses the batch newly covered and no longer covers"""
+    announce, withdraw = list(announce), list(withdraw)
+    for r in announce + withdraw:
+      if not isinstance(r,IPv4Range):
+        raise ValueError("IPv4LiveSet items must be IPv4Range")
+    regions = _mergepairs(sorted([(r.start.num,r.end.num)
+                                  for r in announce + withdraw]))
+    before = _mergepairs([p for s,e in regions for p in self._coverage(s,e)])
+    ix = self.index
+    for r in withdraw:
+      if r in ix:
+        ix.delete(r)
+    for r in announce:
+      if r not in ix:
+        ix.insert(r)
+    after = _mergepairs([p for s,e in regions for p in self._coverage(s,e)])
+    return (IPv4RangeList._frompairs(_combine(after,before,_opdiff)),
+            IPv4RangeList._frompairs(_combine(before,after,_opdiff)))
+  def add(self,r):
+    "add one range, returning (covered,uncovered) as apply() does"
+    return self.apply(announce=[r])
+  def discard(self,r):
+    "remove one range if present, returning (covered,uncovered)"
+    return self.apply(withdraw=[r])
+
+  def covered(self):
+    "the coverage as a normalized IPv4RangeList"
+    return IPv4RangeList._frompairs(_mergepairs([(r.start.num,r.end.num)
+                                                 for r in self.index]))
+
+if __name__ == "__main__":
+  print "This is an import module"
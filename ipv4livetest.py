@@ -0,0 +1,98 @@
+# ipv4livetest - unit test the ipv4live module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+from ipv4live import IPv4LiveSet
+
+class testLiveSet(unittest.TestCase):
+  def setUp(self):
+    self.s = IPv4LiveSet([IPv4CIDR("10.0.0.0",IPv4NetMask(16)),
+                          IPv4CIDR("10.0.1.0",IPv4NetMask(24)),
+                          IPv4CIDR("192.168.0.0",IPv4NetMask(24)),
+                          IPv4CIDR("10.0.1.0",IPv4NetMask(24))])
+  def testCreate(self):
+    self.assertEqual(3,len(self.s))
+    self.assertEqual("10.0.0.0-10.0.255.255,192.168.0.0-192.168.0.255",
+                     str(self.s.covered()))
+    self.assertTrue("10.0.200.1" in self.s)
+    self.assertFalse("10.1.0.0" in self.s)
+    self.assertRaises(ValueError,IPv4LiveSet,["10.0.0.0"])
+  def testMoreSpecific(self):
+    "more specifics inside a covering prefix change nothing"
+    cov, unc = self.s.apply(announce=[IPv4CIDR("10.0.2.0",IPv4NetMask(24))],
+                            withdraw=[IPv4CIDR("10.0.1.0",IPv4NetMask(24))])
+    self.assertEqual([],cov)
+    self.assertEqual([],unc)
+    self.assertEqual(3,len(self.s))
+  def testWithdrawCovering(self):
+    cov, unc = self.s.discard(IPv4CIDR("10.0.0.0",IPv4NetMask(16)))
+    self.assertEqual([],cov)
+    self.assertEqual("10.0.0.0-10.0.0.255,10.0.2.0-10.0.255.255",str(unc))
+    cov, unc = self.s.add(IPv4CIDR("10.0.0.0",IPv4NetMask(23)))
+    self.assertEqual("10.0.0.0-10.0.0.255",str(cov))
+    self.assertEqual([],unc)
+  def testCoveredBySeveral(self):
+    self.s.apply(announce=[IPv4CIDR("192.168.1.0",IPv4NetMask(24))])
+    self.assertTrue(IPv4Range("192.168.0.200","192.168.1.5") in self.s)
+    self.assertFalse(IPv4Range("192.168.0.200","192.168.2.5") in self.s)
+  def testNetZero(self):
+    "a range withdrawn and announced again in one batch is no change"
+    r = IPv4CIDR("192.168.0.0",IPv4NetMask(24))
+    cov, unc = self.s.apply(announce=[r],withdraw=[r])
+    self.assertEqual(([],[]),(list(cov),list(unc)))
+    cov, unc = self.s.apply(withdraw=[r,IPv4CIDR("172.16.0.0",
+                                                 IPv4NetMask(12))])
+    self.assertEqual("192.168.0.0-192.168.0.255",str(unc))
+    self.assertEqual(2,len(self.s))
+  def testRandom(self):
+    "the deltas match diffing full snapshots"
+    rnd = random.Random(5)
+    def rcidr():
+      n = rnd.randrange(14,25)
+      return IPv4CIDR(rnd.randrange(1 << 18) << 8,IPv4NetMask(n))
+    pool = [rcidr() for i in range(60)]
+    s = IPv4LiveSet(pool[:30])
+    for i in range(40):
+      old = s.covered()
+      cov, unc = s.apply(announce=rnd.sample(pool,4),
+                         withdraw=rnd.sample(pool,4))
+      new = s.covered()
+      self.assertEqual(str(new.difference(old)),str(cov))
+      self.assertEqual(str(old.difference(new)),str(unc))
+    self.assertEqual(sorted(set(s)),list(s))
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testLiveSet))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
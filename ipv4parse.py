@@ -0,0 +1,133 @@
+# ipv4parse - bulk parsing of IPv4 addresses, ranges and CIDR blocks.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Parse large files of addresses, one per line, straight into packed
+columns instead of building an IPv4Addr or IPv4CIDR per line.
+
+Each line may hold any one of
+
+  a.b.c.d                a single address
+  a.b.c.d/nn             a CIDR block, host bits are masked off
+  a.b.c.d - e.f.g.h      a range, with or without the spaces
+  a.b.c.d m.m.m.m        an address and a dotted netmask
+
+Blank lines and lines starting with # are skipped. Lines that do not
+parse are not fatal; their numbers are handed back instead.
+"""
+
+import re, socket, struct
+from array import array
+from ipv4 import IPv4RangeArray, _u32, numpy
+
+_aton = socket.inet_aton
+_unpack = struct.Struct("!L").unpack
+_error = (socket.error,ValueError,struct.error)
+
+# inet_aton stops at whitespace and takes octal, hex and short forms, so
+# only four plain decimal octets are handed to it
+_octet = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_isquad = re.compile(r"%s(?:\.%s){3}\Z" % (_octet,_octet)).match
+
+def _quad(q):
+  "strict dotted quad to an int"
+  if _isquad(q) is None:
+    raise ValueError(q)
+  return _unpack(_aton(q))[0]
+
+def parse(lines):
+  """parse an iterable of lines, such as an open file, returning
+  (starts,ends,rejected). starts and ends are arrays of 32-bit ints in
+  input order and rejected is a list of 1-based line numbers"""
+  starts, ends, rejected = array(_u32), array(_u32), []
+  addstart, addend, reject = starts.append, ends.append, rejected.append
+  aton, unpack, quad, error, isquad = _aton, _unpack, _quad, _error, _isquad
+  lineno = 0
+  for line in lines:
+    lineno += 1
+    line = line.strip()
+    if not line or line[0] == "#":
+      continue
+    try:
+      if "/" in line: # the common cases are inlined
+        a, n = line.split("/")
+        a = a.rstrip()
+        n = int(n)
+        if n < 0 or n > 32 or isquad(a) is None:
+          raise ValueError(line)
+        host = 0xFFFFFFFFL >> n
+        s = unpack(aton(a))[0] & ~host
+        e = s | host
+      elif "-" in line:
+        a, b = line.split("-")
+        s, e = quad(a.rstrip()), quad(b.lstrip())
+        if e < s:
+          raise ValueError(line)
+      elif " " not in line and "\t" not in line:
+        if isquad(line) is None:
+          raise ValueError(line)
+        s = e = unpack(aton(line))[0]
+      else:
+        words = line.split()
+        if len(words) != 2:
+          raise ValueError(line)
+        host = ~quad(words[1]) & 0xFFFFFFFFL
+        if host & (host + 1): # netmask bits must be contiguous
+          raise ValueError(line)
+        s = quad(words[0]) & ~host
+        e = s | host
+    except error:
+      reject(lineno)
+      continue
+    addstart(s)
+    addend(e)
+  return starts, ends, rejected
+
+def parse_file(path):
+  "parse a file by name, see parse"
+  f = open(path)
+  try:
+    return parse(f)
+  finally:
+    f.close()
+
+def torangearray(starts,ends):
+  "sort parsed columns into an IPv4RangeArray"
+  if numpy is not None and len(starts):
+    s = numpy.frombuffer(starts,dtype=numpy.uint32)
+    e = numpy.frombuffer(ends,dtype=numpy.uint32)
+    order = numpy.lexsort((e,s))
+    r = IPv4RangeArray()
+    r.starts = array(_u32,s[order].tostring())
+    r.ends = array(_u32,e[order].tostring())
+    return r
+  return IPv4RangeArray._frompairs(sorted(zip(starts,ends)))
+
+if __name__ == "__main__":
+  print "This is an import module"
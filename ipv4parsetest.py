@@ -0,0 +1,75 @@
+# ipv4parsetest - unit test the ipv4parse module
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from ipv4 import *
+from ipv4parse import *
+
+class testParse(unittest.TestCase):
+  def setUp(self):
+    self.lines = ["10.1.2.3\n",
+                  "  192.168.0.77/24 \n",
+                  "# a comment\n",
+                  "\n",
+                  "172.16.0.10 - 172.16.0.20\n",
+                  "172.16.1.0-172.16.1.9\n",
+                  "204.17.22.5 255.255.255.224\n",
+                  "300.1.1.1\n",
+                  "10.1\n",
+                  "10.0.0.0/33\n",
+                  "10.0.0.9 - 10.0.0.1\n",
+                  "10.0.0.0 255.0.255.0\n",
+                  "hello world\n",
+                  "1.2.3.4 5.6.7.8 9.10.11.12\n",
+                  "1.2.3.4 junk/24\n",
+                  "1.2.3.4 - 5.6.7.8 junk\n",
+                  "010.0.0.1\n",
+                  "0x1.2.3.4 - 1.2.3.5\n"]
+  def testParse(self):
+    starts, ends, rejected = parse(self.lines)
+    self.assertEqual([8,9,10,11,12,13,14,15,16,17,18],rejected)
+    self.assertEqual(["10.1.2.3","192.168.0.0","172.16.0.10","172.16.1.0",
+                      "204.17.22.0"],[str(IPv4Addr(s)) for s in starts])
+    self.assertEqual(["10.1.2.3","192.168.0.255","172.16.0.20","172.16.1.9",
+                      "204.17.22.31"],[str(IPv4Addr(e)) for e in ends])
+  def testRangeArray(self):
+    ra = torangearray(*parse(self.lines)[:2])
+    self.assertEqual("10.1.2.3-10.1.2.3,172.16.0.10-172.16.0.20,"
+                     "172.16.1.0-172.16.1.9,192.168.0.0-192.168.0.255,"
+                     "204.17.22.0-204.17.22.31",str(ra))
+    self.assertTrue("192.168.0.12" in ra)
+    self.assertEqual(0,len(torangearray(*parse([])[:2])))
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testParse))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
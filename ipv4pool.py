@@ -0,0 +1,182 @@
+# ipv4pool - hand out CIDR blocks from a pool of address space
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import heapq
+from ipv4 import IPv4Range, IPv4RangeList, _mkcidr, _pairs, _mergepairs, \
+                 _cidrsplit
+
+def _block(c):
+  "(start,prefix length) of an aligned IPv4Range such as an IPv4CIDR"
+  s, e = c.start.num, c.end.num
+  n = 32 - (e - s).bit_length()
+  if s & (0xFFFFFFFFL >> n) or e - s + 1 != 1 << (32 - n):
+    raise ValueError("%s is not a CIDR block" % c)
+  return s, n
+
+class IPv4Pool(object):
+  """buddy allocator over a pool of address space
+
+  Free space is held as aligned blocks, in one free list per prefix
+  length. Each free list is a set, for finding a buddy, and a heap, for
+  finding the lowest block. Allocating splits a larger block in halves
+  down to the size asked for, and releasing joins a block with its buddy
+  again as long as the buddy is free, so no operation costs more than
+  O(log n) for each of the 33 prefix lengths."""
+  __slots__ = ["free","heaps","allocs","nfree","nalloc"]
+  def __init__(self,ranges):
+    self.free = [set() for n in range(33)] # starts of free blocks
+    self.heaps = [[] for n in range(33)] # the same, may hold stale starts
+    self.allocs = {} # start -> prefix length of allocated blocks
+    self.nfree = 0L # addresses free and allocated
+    self.nalloc = 0L
+    if isinstance(ranges,IPv4Range):
+      ranges = [ranges]
+    for s,e in _mergepairs(sorted(_pairs(ranges))):
+      for b,n in _cidrsplit(s,e):
+        self._addfree(b,n)
+  def _addfree(self,s,n):
+    self.free[n].add(s)
+    heapq.heappush(self.heaps[n],s)
+    self.nfree += 1L << (32 - n)
+  def _takefree(self,s,n):
+    f, h = self.free[n], self.heaps[n]
+    f.remove(s)
+    self.nfree -= 1L << (32 - n)
+    if len(h) > 2 * len(f): # more stale starts than live ones
+      h[:] = f
+      heapq.heapify(h)
+  def _lowest(self,n):
+    "lowest free block of prefix length n, or None"
+    h, f = self.heaps[n], self.free[n]
+    while h and h[0] not in f:
+      heapq.heappop(h) # drop starts that were taken since being pushed
+    if h:
+      return h[0]
+    return None
+
+  def allocate(self,plen,fit="best"):
+    """allocate a block of prefix length plen and return it as an IPv4CIDR,
+    or None if there is no room. fit="best" splits the smallest free block
+    that is big enough, fit="first" the lowest addressed one"""
+    if not 0 <= plen <= 32:
+      raise ValueError("prefix length must be 0-32")
+    found = None
+    if fit == "best":
+      for n in xrange(plen,-1,-1):
+        s = self._lowest(n)
+        if s is not None:
+          found = s, n
+          break
+    elif fit == "first":
+      for n in xrange(plen + 1):
+        s = self._lowest(n)
+        if s is not None and (found is None or s < found[0]):
+          found = s, n
+    else:
+      raise ValueError("fit must be 'best' or 'first'")
+    if found is None:
+      return None
+    s, n = found
+    self._takefree(s,n)
+    while n < plen: # keep the lower half, free the upper
+      n += 1
+      self._addfree(s | 1L << (32 - n),n)
+    return self._alloc(s,plen)
+  def _alloc(self,s,n):
+    self.allocs[s] = n
+    self.nalloc += 1L << (32 - n)
+    return _mkcidr(s,n)
+
+  def reserve(self,c):
+    "allocate this exact block, raising ValueError if any of it is not free"
+    s, plen = _block(c)
+    for n in xrange(plen,-1,-1):
+      b = s & (0xFFFFFFFFL << (32 - n)) & 0xFFFFFFFFL
+      if b in self.free[n]:
+        break
+    else:
+      raise ValueError("%s is not free" % c)
+    self._takefree(b,n)
+    while n < plen: # keep the half holding s, free the other
+      n += 1
+      half = 1L << (32 - n)
+      if s & half:
+        self._addfree(b,n)
+        b |= half
+      else:
+        self._addfree(b | half,n)
+    return self._alloc(s,plen)
+
+  def release(self,c):
+    "return an allocated block, joining it with free buddies"
+    s, n = _block(c)
+    if self.allocs.get(s) != n:
+      raise KeyError(c)
+    del self.allocs[s]
+    self.nalloc -= 1L << (32 - n)
+    while n > 0:
+      buddy = s ^ (1L << (32 - n))
+      if buddy not in self.free[n]:
+        break
+      self._takefree(buddy,n)
+      s &= buddy
+      n -= 1
+    self._addfree(s,n)
+
+  def __len__(self):
+    "number of blocks allocated"
+    return len(self.allocs)
+  def __contains__(self,c):
+    "is this exact block allocated"
+    s, n = _block(c)
+    return self.allocs.get(s) == n
+  def allocated(self):
+    "the allocated blocks as IPv4CIDRs in address order"
+    return [_mkcidr(s,self.allocs[s]) for s in sorted(self.allocs)]
+  def available(self):
+    "the free space as a normalized IPv4RangeList"
+    pairs = sorted([(s,s + (1L << (32 - n)) - 1)
+                    for n in range(33) for s in self.free[n]])
+    return IPv4RangeList._frompairs(_mergepairs(pairs))
+
+  def stats(self):
+    """fragmentation figures: addresses free and allocated, the count of
+    free blocks of each prefix length, the largest free block, and
+    fragmentation, the share of free space outside the largest block"""
+    counts = dict([(n,len(self.free[n])) for n in range(33) if self.free[n]])
+    largest = min(counts) if counts else None
+    big = 1L << (32 - largest) if largest is not None else 0
+    return {"free": self.nfree, "allocated": self.nalloc,
+            "freeblocks": counts, "largest": largest,
+            "fragmentation": self.nfree and 1.0 - float(big) / self.nfree
+                             or 0.0}
+
+if __name__ == "__main__":
+  print "This is an import module"
@@ -0,0 +1,133 @@
+# ipv4pooltest - unit test the ipv4pool module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+from ipv4pool import IPv4Pool
+
+class testPool(unittest.TestCase):
+  def setUp(self):
+    self.p = IPv4Pool(IPv4CIDR("10.0.0.0",IPv4NetMask(24)))
+  def testAllocate(self):
+    a = self.p.allocate(26)
+    self.assertEqual("10.0.0.0 - 10.0.0.63",str(a))
+    self.assertEqual("10.0.0.64 - 10.0.0.127",str(self.p.allocate(26)))
+    self.assertEqual("10.0.0.128 - 10.0.0.255",str(self.p.allocate(25)))
+    self.assertEqual(None,self.p.allocate(32))
+    self.assertEqual(3,len(self.p))
+    self.assertTrue(a in self.p)
+    self.assertRaises(ValueError,self.p.allocate,33)
+    self.assertRaises(ValueError,self.p.allocate,26,"worst")
+  def testBestFirst(self):
+    "best fit splits the smallest block, first fit the lowest"
+    p = IPv4Pool(IPv4RangeList([IPv4CIDR("10.0.0.0",IPv4NetMask(24)),
+                                IPv4CIDR("10.0.1.0",IPv4NetMask(28))]))
+    self.assertEqual("10.0.1.0 - 10.0.1.7",str(p.allocate(29,"best")))
+    self.assertEqual("10.0.0.0 - 10.0.0.7",str(p.allocate(29,"first")))
+    self.assertEqual("10.0.0.8 - 10.0.0.15",str(p.allocate(29)))
+  def testRelease(self):
+    a = self.p.allocate(26)
+    b = self.p.allocate(26)
+    self.p.release(a)
+    self.assertRaises(KeyError,self.p.release,a)
+    self.assertEqual({"free": 192,"allocated": 64,"freeblocks": {25: 1,26: 1},
+                      "largest": 25,"fragmentation": 1 - 128.0 / 192},
+                     self.p.stats())
+    self.p.release(b)
+    s = self.p.stats()
+    self.assertEqual({24: 1},s["freeblocks"])
+    self.assertEqual(0.0,s["fragmentation"])
+    self.assertEqual("10.0.0.0-10.0.0.255",str(self.p.available()))
+  def testReserve(self):
+    r = self.p.reserve(IPv4CIDR("10.0.0.192",IPv4NetMask(27)))
+    self.assertEqual("10.0.0.192 - 10.0.0.223",str(r))
+    self.assertRaises(ValueError,self.p.reserve,
+                      IPv4CIDR("10.0.0.192",IPv4NetMask(26)))
+    self.assertRaises(ValueError,self.p.reserve,
+                      IPv4CIDR("10.0.1.0",IPv4NetMask(27)))
+    self.assertRaises(ValueError,self.p.reserve,
+                      IPv4Range("10.0.0.1","10.0.0.2"))
+    self.assertEqual("10.0.0.0-10.0.0.191,10.0.0.224-10.0.0.255",
+                     str(self.p.available()))
+    self.assertEqual({25: 1,26: 1,27: 1},self.p.stats()["freeblocks"])
+    self.p.reserve(IPv4CIDR("10.0.0.0",IPv4NetMask(32)))
+    self.p.release(r)
+    self.assertEqual("10.0.0.1-10.0.0.255",str(self.p.available()))
+  def testUnaligned(self):
+    "a pool that is not one block never joins buddies outside it"
+    p = IPv4Pool(IPv4Range("10.0.0.0","10.0.0.191"))
+    a = p.allocate(26)
+    self.assertEqual("10.0.0.128 - 10.0.0.191",str(a))
+    p.release(a)
+    self.assertEqual({25: 1,26: 1},p.stats()["freeblocks"])
+    self.assertEqual(None,p.allocate(24))
+  def testChurn(self):
+    "heaps drop stale starts instead of growing with every release"
+    p = IPv4Pool(IPv4CIDR("10.0.0.0",IPv4NetMask(16)))
+    for i in range(2000):
+      held = [p.allocate(24) for j in range(8)]
+      held.append(p.reserve(IPv4CIDR("10.0.200.0",IPv4NetMask(30))))
+      for c in held:
+        p.release(c)
+    for n in range(33):
+      self.assertTrue(len(p.heaps[n]) <= 2 * len(p.free[n]) + 1)
+    self.assertEqual({16: 1},p.stats()["freeblocks"])
+    p = IPv4Pool(IPv4CIDR("0.0.0.0",IPv4NetMask(0)))
+    self.assertEqual(0,p.stats()["largest"])
+  def testRandom(self):
+    "allocations never overlap and releasing all restores the pool"
+    rnd = random.Random(3)
+    p = IPv4Pool(IPv4Range("10.0.0.0","10.0.11.255"))
+    held = []
+    for i in range(500):
+      if held and rnd.random() < 0.4:
+        p.release(held.pop(rnd.randrange(len(held))))
+      else:
+        c = p.allocate(rnd.randrange(22,31),rnd.choice(["best","first"]))
+        if c is not None:
+          held.append(c)
+      s = p.stats()
+      self.assertEqual(12 * 256,s["free"] + s["allocated"])
+    rl = IPv4RangeList(held)
+    rl.normalize()
+    self.assertEqual(sum([len(c) for c in held]),sum([len(r) for r in rl]))
+    self.assertEqual(sum([len(c) for c in held]),p.stats()["allocated"])
+    for c in held:
+      p.release(c)
+    self.assertEqual("10.0.0.0-10.0.11.255",str(p.available()))
+    self.assertEqual({21: 1,22: 1},p.stats()["freeblocks"])
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testPool))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -0,0 +1,178 @@
+# ipv4shard - spread IPv4 range lookups over a pool of processes.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Split a range list into shards by the top bits of the address, for
+instance one shard per /8, and fan bulk work on the shards out to a
+multiprocessing pool.
+
+The shards are handed to the pool once, as the worker initializer
+arguments, so with fork they are simply inherited by the workers and
+never pickled. Each task carries only a shard number and its slice of
+the query; results are put back together in input order.
+"""
+
+import multiprocessing
+from array import array
+from ipv4 import IPv4RangeArray, _addrarray, _addrlong, _pairs, _u32, \
+                 _mergepairs, _combine, _opunion, _opintersection, \
+                 _opdiff, _opsymdiff, numpy
+
+_shards = None # the shards, as seen by a worker process
+
+def _initworker(shards):
+  global _shards
+  _shards = shards
+
+def _containstask(task):
+  i, addrs = task
+  return _shards[i].contains_many(addrs)
+
+def _setoptask(task):
+  i, other, op = task
+  return _combine(_mergepairs(_pairs(_shards[i])),_mergepairs(other),op)
+
+def _split(ranges,bits):
+  "cut sorted ranges at shard boundaries, giving one pair list per shard"
+  shift = 32 - bits
+  low = (1L << shift) - 1
+  shards = [[] for i in xrange(1 << bits)]
+  for s,e in _pairs(ranges):
+    while s >> shift != e >> shift:
+      shards[s >> shift].append((s,s | low))
+      s = (s | low) + 1
+    shards[s >> shift].append((s,e))
+  return shards
+
+class IPv4ShardedRanges(object):
+  """a sorted range list cut into 2**bits shards, queried in parallel
+
+  processes is the pool size, defaulting to the number of cpus; with
+  processes=1 everything runs in this process, which is handy for
+  debugging. Call close() when done, or use it in a with statement."""
+  def __init__(self,ranges,bits=8,processes=None):
+    if bits < 0 or bits > 16:
+      raise ValueError("shard bits must be 0-16")
+    self.bits = bits
+    self.shards = [IPv4RangeArray._frompairs(p) for p in _split(ranges,bits)]
+    if processes is None:
+      processes = multiprocessing.cpu_count()
+    self.pool = None
+    if processes > 1:
+      self.pool = multiprocessing.Pool(processes,_initworker,(self.shards,))
+  def _map(self,func,tasks):
+    if self.pool is None:
+      _initworker(self.shards)
+      return map(func,tasks)
+    return self.pool.map(func,tasks,chunksize=1)
+  def close(self):
+    if self.pool is not None:
+      self.pool.close()
+      self.pool.join()
+      self.pool = None
+  def __enter__(self):
+    return self
+  def __exit__(self,*exc):
+    self.close()
+
+  def __len__(self):
+    return sum([len(s) for s in self.shards])
+  def __contains__(self,a):
+    "single lookups are cheaper done here than in a worker"
+    a = _addrlong(a)
+    return a in self.shards[a >> (32 - self.bits)]
+
+  def _groups(self,a):
+    "(shard,positions) for each shard with addresses in the batch a"
+    shift = 32 - self.bits
+    if numpy is not None:
+      sid = a.astype(numpy.int64) >> shift # uint32 >> 32 is not 0
+      order = numpy.argsort(sid,kind="mergesort")
+      bounds = numpy.cumsum(numpy.bincount(sid,minlength=len(self.shards)))
+      lo = 0
+      for i,hi in enumerate(bounds):
+        if hi > lo:
+          yield i, order[lo:hi]
+        lo = hi
+    else:
+      groups = {}
+      for j,x in enumerate(a):
+        groups.setdefault(x >> shift,[]).append(j)
+      for i in sorted(groups):
+        yield i, groups[i]
+  def contains_many(self,addrs):
+    """membership mask for a batch of addresses, in input order. Takes the
+    same inputs and gives the same result types as
+    IPv4RangeArray.contains_many"""
+    a = _addrarray(addrs)
+    groups = list(self._groups(a))
+    if numpy is not None:
+      results = self._map(_containstask,[(i,a[p]) for i,p in groups])
+      mask = numpy.zeros(len(a),dtype=bool)
+      for (i,p),r in zip(groups,results):
+        mask[p] = r
+    else:
+      results = self._map(_containstask,
+                          [(i,array(_u32,[a[j] for j in p])) for i,p in groups])
+      mask = array('B',[0])*len(a)
+      for (i,p),r in zip(groups,results):
+        for j,x in zip(p,r):
+          mask[j] = x
+    return mask
+  def count(self,addrs):
+    "how many of a batch of addresses are covered"
+    mask = self.contains_many(addrs)
+    if numpy is not None:
+      return int(mask.sum())
+    return sum(mask)
+
+  def _setop(self,other,op):
+    other = _split(other,self.bits)
+    tasks = [(i,other[i],op) for i in xrange(len(self.shards))
+             if other[i] or len(self.shards[i])]
+    pairs = []
+    for r in self._map(_setoptask,tasks):
+      pairs.extend(r)
+    # pieces that were cut at shard boundaries are joined up again here
+    return IPv4RangeArray._frompairs(_mergepairs(pairs))
+  def union(self,other):
+    "addresses in either, as a normalized IPv4RangeArray"
+    return self._setop(other,_opunion)
+  def intersection(self,other):
+    "addresses in both, as a normalized IPv4RangeArray"
+    return self._setop(other,_opintersection)
+  def difference(self,other):
+    "addresses in self but not in other, as a normalized IPv4RangeArray"
+    return self._setop(other,_opdiff)
+  def symmetric_difference(self,other):
+    "addresses in exactly one of the two, as a normalized IPv4RangeArray"
+    return self._setop(other,_opsymdiff)
+
+if __name__ == "__main__":
+  print "This is an import module"
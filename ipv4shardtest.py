@@ -0,0 +1,85 @@
+# ipv4shardtest - unit test the ipv4shard module
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+from ipv4shard import *
+
+class testShards(unittest.TestCase):
+  processes = 1
+  def setUp(self):
+    self.rl = IPv4RangeList([IPv4Range("9.255.255.0","10.0.0.255"),
+                             IPv4Range("10.0.0.128","10.0.1.255"),
+                             IPv4Range("172.16.0.0","172.31.255.255"),
+                             IPv4Range("192.168.1.0","192.168.1.127")])
+    self.sr = IPv4ShardedRanges(self.rl,processes=self.processes)
+  def tearDown(self):
+    self.sr.close()
+  def testSplit(self):
+    self.assertEqual(256,len(self.sr.shards))
+    self.assertEqual("9.255.255.0-9.255.255.255",str(self.sr.shards[9]))
+    self.assertEqual(5,len(self.sr))
+    self.assertTrue("10.0.0.200" in self.sr)
+    self.assertFalse("10.0.2.0" in self.sr)
+  def testContainsMany(self):
+    rnd = random.Random(7)
+    addrs = [rnd.choice([IPv4Addr("10.0.0.0").num,IPv4Addr("172.16.0.0").num,
+                         IPv4Addr("192.168.1.0").num]) + rnd.randint(0,2000)
+             for i in range(500)] + [rnd.getrandbits(32) for i in range(500)]
+    expect = [int(x) for x in self.rl.compact().contains_many(addrs)]
+    self.assertEqual(expect,[int(x) for x in self.sr.contains_many(addrs)])
+    self.assertEqual(sum(expect),self.sr.count(addrs))
+  def testOneShard(self):
+    "bits=0 keeps every range in a single shard"
+    sr = IPv4ShardedRanges(self.rl,bits=0,processes=self.processes)
+    try:
+      self.assertEqual(1,len(sr.shards))
+      addrs = ["10.0.0.200","10.0.2.0","172.20.0.1","255.255.255.255"]
+      self.assertEqual([1,0,1,0],[int(x) for x in sr.contains_many(addrs)])
+      self.assertEqual(2,sr.count(addrs))
+      self.assertTrue("192.168.1.1" in sr)
+    finally:
+      sr.close()
+  def testSetOps(self):
+    other = IPv4RangeList([IPv4Range("10.0.1.0","172.16.0.255")])
+    for op in ("union","intersection","difference","symmetric_difference"):
+      self.assertEqual(str(getattr(self.rl,op)(other)),
+                       str(getattr(self.sr,op)(other)))
+
+class testShardsPool(testShards):
+  processes = 2
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testShards))
+  suite.addTest(unittest.makeSuite(testShardsPool))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
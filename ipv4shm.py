@@ -0,0 +1,109 @@
+# ipv4shm - share one range table between many processes on a host
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Publish a range table once and let any number of processes attach to
+it by name, all sharing one copy of the packed columns.
+
+Python 2 has no multiprocessing.shared_memory, so a table is published
+as an ipv4file range file in /dev/shm, a memory backed file system, and
+attaching maps that file read-only. Nothing is pickled or parsed, and
+every process mapping it shares the same pages.
+
+Publishing again under the same name swaps in a new generation. The new
+file is renamed over the old one in a single step, so readers never see
+a half written table and never wait. Readers keep the generation they
+mapped until they call refresh(), which costs one stat.
+
+  ipv4shm.publish("bogons",ranges,asns)        # in the loader
+  t = ipv4shm.IPv4SharedRanges("bogons")       # in each worker
+  t.refresh(); t.get(addr)
+"""
+
+import os, tempfile
+import ipv4file
+
+SHMDIR = os.path.isdir("/dev/shm") and "/dev/shm" or tempfile.gettempdir()
+
+def _path(name):
+  if not name or "/" in name or name[0] == ".":
+    raise ValueError("bad table name %r" % (name,))
+  return os.path.join(SHMDIR,"ipv4-%s.rng" % name)
+
+def publish(name,ranges,payloads=None):
+  """publish a sorted IPv4RangeList or IPv4RangeArray, and optionally one
+  uint32 payload per range, under name, replacing any earlier generation"""
+  ipv4file.save(_path(name),ranges,payloads)
+
+def unpublish(name):
+  "remove a published table, processes attached to it keep their mapping"
+  os.remove(_path(name))
+
+class IPv4SharedRanges(object):
+  """read-only view of a published table, see IPv4RangeFile for lookups
+
+  Raises OSError if nothing is published under the name."""
+  __slots__ = ["name","table","_ident"]
+  def __init__(self,name):
+    self.name = name
+    self._attach()
+  def _attach(self):
+    path = _path(self.name)
+    st = os.stat(path) # before mapping, so a swap in between is seen later
+    self.table = ipv4file.load(path)
+    self._ident = st.st_dev, st.st_ino
+  def refresh(self):
+    """move to the newest generation if one was published since attaching,
+    returning True if it did. The old mapping is dropped once nothing
+    refers to it, so ranges already handed out stay valid"""
+    st = os.stat(_path(self.name))
+    if (st.st_dev,st.st_ino) == self._ident:
+      return False
+    self._attach()
+    return True
+
+  def __len__(self):
+    return len(self.table)
+  def __iter__(self):
+    return iter(self.table)
+  def __getitem__(self,i):
+    return self.table[i]
+  def __contains__(self,a):
+    return a in self.table
+  def find(self,a):
+    return self.table.find(a)
+  def get(self,a,default=None):
+    return self.table.get(a,default)
+  def contains_many(self,addrs):
+    return self.table.contains_many(addrs)
+  def find_many(self,addrs):
+    return self.table.find_many(addrs)
+
+if __name__ == "__main__":
+  print "This is an import module"
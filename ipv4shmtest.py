@@ -0,0 +1,100 @@
+# ipv4shmtest - unit test the ipv4shm module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, os, multiprocessing
+from ipv4 import *
+import ipv4shm
+
+_name = "ipv4shmtest-%d" % os.getpid()
+_table = None # a worker's attachment
+
+def _initworker():
+  global _table
+  _table = ipv4shm.IPv4SharedRanges(_name)
+
+def _lookup(a):
+  _table.refresh()
+  return _table.get(a)
+
+class testShared(unittest.TestCase):
+  def setUp(self):
+    self.rl = IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.255"),
+                             IPv4Range("10.0.2.0","10.0.2.255")])
+    ipv4shm.publish(_name,self.rl,[64500,64501])
+  def tearDown(self):
+    if os.path.exists(ipv4shm._path(_name)):
+      ipv4shm.unpublish(_name)
+  def testAttach(self):
+    t = ipv4shm.IPv4SharedRanges(_name)
+    self.assertEqual(2,len(t))
+    self.assertEqual(str(self.rl),",".join([str(r).replace(" ","")
+                                             for r in t]))
+    self.assertTrue("10.0.2.1" in t)
+    self.assertFalse("10.0.1.1" in t)
+    self.assertEqual(1,t.find("10.0.2.1"))
+    self.assertEqual(64500,t.get("10.0.0.1"))
+    self.assertEqual(None,t.get("10.0.1.1"))
+    self.assertEqual([True,False],[bool(x) for x in
+                                   t.contains_many(["10.0.0.1","10.0.1.1"])])
+    self.assertEqual([1,-1],list(t.find_many(["10.0.2.1","10.0.1.1"])))
+    self.assertEqual("10.0.2.0 - 10.0.2.255",str(t[1]))
+    self.assertRaises(OSError,ipv4shm.IPv4SharedRanges,_name + "-none")
+    self.assertRaises(ValueError,ipv4shm.publish,"../x",self.rl)
+  def testGenerations(self):
+    t = ipv4shm.IPv4SharedRanges(_name)
+    r = t[0]
+    self.assertFalse(t.refresh())
+    self.rl.append(IPv4Range("10.0.1.0","10.0.1.255"))
+    ipv4shm.publish(_name,self.rl,[1,2,3])
+    self.assertEqual(None,t.get("10.0.1.1")) # still the old generation
+    self.assertTrue(t.refresh())
+    self.assertEqual(2,t.get("10.0.1.1"))
+    self.assertEqual(3,len(t))
+    self.assertEqual("10.0.0.0 - 10.0.0.255",str(r))
+    ipv4shm.unpublish(_name)
+    self.assertEqual(2,t.get("10.0.1.1")) # the mapping outlives the file
+  def testWorkers(self):
+    pool = multiprocessing.Pool(2,_initworker)
+    try:
+      self.assertEqual([64500,None,64501],
+                       pool.map(_lookup,["10.0.0.1","10.0.1.1","10.0.2.1"]))
+      ipv4shm.publish(_name,self.rl,[7,8])
+      self.assertEqual([7,8],pool.map(_lookup,["10.0.0.1","10.0.2.1"]))
+    finally:
+      pool.close()
+      pool.join()
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testShared))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
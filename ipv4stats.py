@@ -0,0 +1,160 @@
+# ipv4stats - utilisation and prefix length figures for range lists
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""Capacity report figures, each computed in one pass over the sorted
+start and end columns. With numpy installed the passes are vectorized,
+so a full routing table is summarised in a fraction of a second.
+
+  covered(ranges)      addresses covered, counting overlaps once
+  prefixlens(ranges)   ({prefix length: count},count of non-CIDR ranges)
+  gaps(ranges,top)     (count,addresses,largest gaps) between the ranges
+  buckets(ranges,plen) addresses covered in each block of length plen
+  summary(ranges)      all of the above in a dict, sharing the work
+
+ranges may be an IPv4RangeList, an IPv4RangeArray, an IPv4RangeFile or
+any iterable of IPv4Range objects.
+"""
+
+from array import array
+from ipv4 import IPv4Range, IPv4RangeArray, numpy, _mkaddr, _asnumpy, \
+                 _mergepairs, _u64
+
+def _columns(ranges):
+  "(starts,ends) columns sorted by start"
+  if not isinstance(ranges,IPv4RangeArray):
+    ranges = IPv4RangeArray(ranges)
+  if numpy is not None:
+    return (_asnumpy(ranges.starts).astype(numpy.int64),
+            _asnumpy(ranges.ends).astype(numpy.int64))
+  return ranges.starts, ranges.ends
+
+def _merged(s,e):
+  "columns of the disjoint blocks covered, joining overlaps and neighbours"
+  if numpy is None:
+    m = _mergepairs(zip(s,e))
+    return [p[0] for p in m], [p[1] for p in m]
+  if not len(s):
+    return s, e
+  m = numpy.maximum.accumulate(e) # the end of the block so far
+  first = numpy.flatnonzero(numpy.r_[True,s[1:] > m[:-1] + 1])
+  return s[first], m[numpy.r_[first[1:] - 1,len(s) - 1]]
+
+def _covered(ms,me):
+  if numpy is None:
+    return sum([e - s + 1 for s,e in zip(ms,me)])
+  return int((me - ms + 1).sum())
+
+def _prefixlens(s,e):
+  if numpy is None:
+    counts, other = {}, 0
+    for a,b in zip(s,e):
+      size = b - a + 1
+      if size & (size - 1) or a & (size - 1):
+        other += 1
+      else:
+        n = 33 - size.bit_length()
+        counts[n] = counts.get(n,0) + 1
+    return counts, other
+  size = e - s + 1
+  cidr = ((size & (size - 1)) == 0) & ((s & (size - 1)) == 0)
+  n = 32 - numpy.log2(size[cidr]).astype(numpy.int64) # exact for 2**k
+  c = numpy.bincount(n,minlength=33)
+  return (dict([(i,int(c[i])) for i in numpy.flatnonzero(c)]),
+          int(len(s) - cidr.sum()))
+
+def _gaps(ms,me,top):
+  "(count,addresses,largest) for the holes between the merged blocks"
+  if numpy is None:
+    g = [(b - a - 1,a + 1) for a,b in zip(me[:-1],ms[1:])]
+    g.sort(key=lambda x: (-x[0],x[1]))
+    return (len(g),sum([x[0] for x in g]),
+            [IPv4Range(_mkaddr(a),_mkaddr(a + n - 1)) for n,a in g[:top]])
+  size = ms[1:] - me[:-1] - 1
+  at = me[:-1] + 1
+  best = numpy.lexsort((at,-size))[:top]
+  return (len(size),int(size.sum()),
+          [IPv4Range(_mkaddr(int(at[i])),_mkaddr(int(at[i] + size[i] - 1)))
+           for i in best])
+
+def _buckets(ms,me,plen):
+  if not 0 <= plen <= 32:
+    raise ValueError("prefix length must be 0-32")
+  width = 1 << (32 - plen)
+  if numpy is None:
+    out = array(_u64,[0]) * (1 << plen)
+    for s,e in zip(ms,me):
+      while s <= e: # split each block at the bucket edges
+        b = s // width
+        x = min(e,(b + 1) * width - 1)
+        out[b] += x - s + 1
+        s = x + 1
+    return out
+  edges = numpy.arange((1 << plen) + 1,dtype=numpy.int64) * width
+  if not len(ms):
+    return numpy.zeros(1 << plen,dtype=numpy.int64)
+  # addresses covered below each edge
+  cum = numpy.r_[0,numpy.cumsum(me - ms + 1)]
+  i = numpy.searchsorted(ms,edges)
+  last = me[numpy.maximum(i - 1,0)]
+  below = cum[i] - numpy.where(i > 0,numpy.maximum(last + 1 - edges,0),0)
+  return numpy.diff(below)
+
+def covered(ranges):
+  "number of addresses in the ranges, counting overlaps once"
+  return _covered(*_merged(*_columns(ranges)))
+def prefixlens(ranges):
+  """({prefix length: count},other) for the ranges that are CIDR blocks,
+  other counting those that are not"""
+  return _prefixlens(*_columns(ranges))
+def gaps(ranges,top=10):
+  """(count,addresses,largest) for the holes between the ranges, largest
+  being the top biggest as IPv4Ranges, biggest and then lowest first"""
+  ms, me = _merged(*_columns(ranges))
+  return _gaps(ms,me,top)
+def buckets(ranges,plen=8):
+  """addresses covered in each of the 2**plen blocks of prefix length plen,
+  so buckets(r,8)[10] is the coverage of 10.0.0.0/8. Returns a numpy
+  int64 array if numpy is installed, otherwise an array of 64-bit ints"""
+  ms, me = _merged(*_columns(ranges))
+  return _buckets(ms,me,plen)
+
+def summary(ranges,bucket=8,top=10):
+  "all the figures for one table in a dict, reading the columns once"
+  s, e = _columns(ranges)
+  ms, me = _merged(s,e)
+  lens, other = _prefixlens(s,e)
+  ngaps, gapaddrs, largest = _gaps(ms,me,top)
+  return {"ranges": len(s), "blocks": len(ms), "covered": _covered(ms,me),
+          "prefixlens": lens, "noncidr": other, "gaps": ngaps,
+          "gapaddrs": gapaddrs, "largestgaps": largest,
+          "buckets": _buckets(ms,me,bucket)}
+
+if __name__ == "__main__":
+  print "This is an import module"
@@ -0,0 +1,111 @@
+# ipv4statstest - unit test the ipv4stats module
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+import ipv4stats
+
+class testStats(unittest.TestCase):
+  def setUp(self):
+    self.rl = IPv4RangeList([IPv4CIDR("10.0.0.0",IPv4NetMask(16)),
+                             IPv4CIDR("10.0.1.0",IPv4NetMask(24)),
+                             IPv4CIDR("10.2.0.0",IPv4NetMask(24)),
+                             IPv4Range("10.2.1.0","10.2.1.9"),
+                             IPv4CIDR("192.168.0.0",IPv4NetMask(24)),
+                             IPv4CIDR("192.168.1.0",IPv4NetMask(24))])
+  def testCovered(self):
+    self.assertEqual(65536 + 256 + 10 + 512,ipv4stats.covered(self.rl))
+    self.assertEqual(ipv4stats.covered(self.rl),
+                     ipv4stats.covered(self.rl.compact()))
+    self.assertEqual(0,ipv4stats.covered(IPv4RangeList()))
+  def testPrefixLens(self):
+    self.assertEqual(({16: 1,24: 4},1),ipv4stats.prefixlens(self.rl))
+    self.assertEqual(({0: 1},0),ipv4stats.prefixlens(
+                     [IPv4Range("0.0.0.0","255.255.255.255")]))
+  def testGaps(self):
+    n, total, largest = ipv4stats.gaps(self.rl,top=5)
+    self.assertEqual(2,n)
+    self.assertEqual(["10.2.1.10 - 192.167.255.255",
+                      "10.1.0.0 - 10.1.255.255"],[str(r) for r in largest])
+    self.assertEqual(sum([len(r) for r in largest]),total)
+    self.assertEqual(1,len(ipv4stats.gaps(self.rl,top=1)[2]))
+    self.assertEqual((0,0,[]),ipv4stats.gaps(IPv4RangeList()))
+  def testBuckets(self):
+    b = ipv4stats.buckets(self.rl,8)
+    self.assertEqual(256,len(b))
+    self.assertEqual(65536 + 256 + 10,b[10])
+    self.assertEqual(512,b[192])
+    self.assertEqual(ipv4stats.covered(self.rl),sum(b))
+    b = ipv4stats.buckets(self.rl,24)
+    self.assertEqual(10,b[(10 << 16) + 513])
+    self.assertEqual(256,b[(10 << 16) + 200])
+    self.assertEqual(0,b[(10 << 16) + 514])
+    self.assertEqual([ipv4stats.covered(self.rl)],
+                     list(ipv4stats.buckets(self.rl,0)))
+    self.assertRaises(ValueError,ipv4stats.buckets,self.rl,33)
+  def testSummary(self):
+    s = ipv4stats.summary(self.rl,bucket=16,top=1)
+    self.assertEqual(6,s["ranges"])
+    self.assertEqual(3,s["blocks"])
+    self.assertEqual(ipv4stats.covered(self.rl),s["covered"])
+    self.assertEqual(({16: 1,24: 4},1),(s["prefixlens"],s["noncidr"]))
+    self.assertEqual(2,s["gaps"])
+    self.assertEqual(1,len(s["largestgaps"]))
+    self.assertEqual(65536,s["buckets"][10 << 8])
+  def testRandom(self):
+    "the figures match a count done one range at a time"
+    rnd = random.Random(9)
+    rl = IPv4RangeList()
+    for i in range(200):
+      s = rnd.randrange(1 << 20) << 8
+      rl.append(IPv4Range(s,s + rnd.randrange(1 << 20)))
+    blocks = IPv4RangeList(rl)
+    blocks.normalize()
+    inside = sum([len(r) for r in blocks])
+    self.assertEqual(inside,ipv4stats.covered(rl))
+    n, total, largest = ipv4stats.gaps(rl,top=1000)
+    self.assertEqual(len(blocks) - 1,n)
+    self.assertEqual(blocks[-1].end.num - blocks[0].start.num + 1 - inside,
+                     total)
+    sizes = [len(r) for r in largest]
+    self.assertEqual(sorted(sizes,reverse=True),sizes)
+    b = ipv4stats.buckets(rl,12)
+    for i in rnd.sample(range(1 << 12),50):
+      s, e = i << 20, (i << 20) + (1 << 20) - 1
+      self.assertEqual(sum([max(0,min(r.end.num,e) - max(r.start.num,s) + 1)
+                            for r in blocks]),b[i])
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testStats))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -47,6 +47,25 @@ class testIPv4Addr(unittest.TestCase):
     ri = a1 & m1.inversemask()
     self.assertEqual(r.bits,IPv4Addr("234.10.117.0").bits)
     self.assertEqual(ri.bits,IPv4Addr("0.0.0.3").bits)
+  def testArith(self):
+    a = IPv4Addr("10.0.0.255")
+    self.assertEqual("10.0.1.4",str(a + 5))
+    self.assertEqual("10.0.0.250",str(a - 5))
+    self.assertEqual(255,a - IPv4Addr("10.0.0.0"))
+    self.assertEqual("0.0.0.1",str(IPv4Addr("255.255.255.255") + 2))
+    self.assertEqual("0.0.255.0",str(a << 8))
+    self.assertEqual("0.0.10.0",str(a >> 16))
+    self.assertEqual("10.0.0.0",str(a ^ IPv4Addr("0.0.0.255")))
+    self.assertEqual("255.10.0.0",str(a.rrot(8)))
+    self.assertEqual("0.0.255.10",str(a.lrot(8)))
+    self.assertRaises(ValueError,IPv4Addr,1L << 32)
+  def testHash(self):
+    a1 = IPv4Addr("0.0.1.2")
+    d = {a1: "x"}
+    self.assertEqual("x",d[IPv4Addr(258)])
+    self.assertEqual(1,len(set([a1,IPv4Addr(258),IPv4Addr(a1)])))
+    self.assertTrue(a1 < IPv4Addr("0.0.1.3") <= IPv4Addr(259))
+    self.assertTrue(a1 != "0.0.1.2")
 
 class testIPv4Mask(unittest.TestCase):
   def setUp(self):
@@ -104,6 +123,17 @@ class testIPv4Range(unittest.TestCase):
     self.assertTrue(r.__contains__(self.a4))
     self.assertFalse(r.__contains__(IPv4Range("204.16.22.0","204.17.22.63")))
     self.assertTrue(IPv4Range("204.16.22.0","204.17.22.63").__contains__(r))
+  def testOrder(self):
+    "ordered by start then end, the same as the sort key"
+    r = IPv4Range(self.a1,self.a2)
+    rs = [IPv4Range(self.a3,self.a4),r,IPv4Range(self.a1,self.a4)]
+    self.assertEqual([x.key() for x in sorted(rs)],
+                     sorted([x.key() for x in rs]))
+    self.assertEqual(sorted(rs),sorted(rs,key=IPv4Range.key))
+    self.assertTrue(IPv4Range(self.a1,self.a4) < r)
+    self.assertTrue(r.lessthan(IPv4Range(self.a3,self.a4)))
+    self.assertFalse(r.lessthan(IPv4Range(self.a1,self.a2)))
+    self.assertEqual(0,cmp(r,IPv4Range(self.a1,self.a2)))
   def testOverlaps(self):
     "test left, right, full (like contains) and no overlap"
     r = IPv4Range(self.a1,self.a2)
@@ -114,6 +144,41 @@ class testIPv4Range(unittest.TestCase):
   def testAddrs(self):
     r = IPv4Range(self.a1,self.a2)
     self.assertEqual(32,len(r.addrs()))
+  def testAddrView(self):
+    v = IPv4Range("10.0.0.0","10.255.255.255").addrs()
+    self.assertEqual(1 << 24,len(v))
+    self.assertEqual("10.0.1.4",str(v[260]))
+    self.assertEqual("10.255.255.255",str(v[-1]))
+    self.assertEqual(260,v.index("10.0.1.4"))
+    self.assertRaises(ValueError,v.index,"11.0.0.0")
+    self.assertRaises(IndexError,v.__getitem__,1 << 24)
+    w = v[1000:2000:7]
+    self.assertEqual(len(range(1000,2000,7)),len(w))
+    self.assertEqual("10.0.3.239",str(w[1]))
+    self.assertEqual(1,w.index("10.0.3.239"))
+    self.assertFalse("10.0.3.240" in w)
+    self.assertEqual([str(a) for a in w],[str(a) for a in list(w)])
+    self.assertEqual(["10.0.0.3","10.0.0.2","10.0.0.1","10.0.0.0"],
+                     [str(a) for a in v[3::-1]])
+  def testAddrChunks(self):
+    v = IPv4Range("10.0.0.0","10.0.3.255").addrs()
+    chunks = list(v.chunks(300))
+    self.assertEqual([300,300,300,124],[len(c) for c in chunks])
+    self.assertEqual(IPv4Addr("10.0.1.44").num,chunks[1][0])
+    self.assertEqual([int(x) for x in chunks[3][-2:]],
+                     [IPv4Addr("10.0.3.254").num,IPv4Addr("10.0.3.255").num])
+  def testToCIDRs(self):
+    r = IPv4Range("10.0.0.1","10.0.1.6")
+    self.assertEqual(["10.0.0.1 - 10.0.0.1","10.0.0.2 - 10.0.0.3",
+                      "10.0.0.4 - 10.0.0.7","10.0.0.8 - 10.0.0.15",
+                      "10.0.0.16 - 10.0.0.31","10.0.0.32 - 10.0.0.63",
+                      "10.0.0.64 - 10.0.0.127","10.0.0.128 - 10.0.0.255",
+                      "10.0.1.0 - 10.0.1.3","10.0.1.4 - 10.0.1.5",
+                      "10.0.1.6 - 10.0.1.6"],[str(c) for c in r.to_cidrs()])
+    c = list(IPv4Range("0.0.0.0","255.255.255.255").to_cidrs())
+    self.assertEqual([0],[x.mask.nbits() for x in c])
+    c = list(IPv4Range("204.17.22.0","204.17.22.31").to_cidrs())
+    self.assertEqual(["255.255.255.224"],[x.mask.netmask() for x in c])
 
 class testIPv4CIDR(unittest.TestCase):
   def setUp(self):
@@ -125,6 +190,237 @@ class testIPv4CIDR(unittest.TestCase):
     r = IPv4CIDR(self.a1,self.m)
     self.assertEqual(self.a1,r.start.__str__())
     self.assertEqual(self.a3,r.end.__str__())
+  def testCreateNetMask(self):
+    r = IPv4CIDR("204.17.22.77",IPv4NetMask(26))
+    self.assertEqual("204.17.22.64 - 204.17.22.127",str(r))
+    self.assertEqual(62,r.usable())
+  def testCreatePrefixLength(self):
+    r = IPv4CIDR("10.1.2.3",24)
+    self.assertEqual("10.1.2.0 - 10.1.2.255",str(r))
+    self.assertEqual(24,r.mask.nbits())
+    self.assertEqual("0.0.0.0 - 255.255.255.255",str(IPv4CIDR("10.1.2.3",0L)))
+    self.assertEqual("10.1.2.0 - 10.1.2.255",
+                     str(IPv4CIDR("10.1.2.3",0xFFFFFF00L)))
+  def testHashKey(self):
+    r = IPv4CIDR("10.1.0.0",IPv4NetMask(16))
+    c = list(r.to_cidrs())[0]
+    self.assertEqual(IPv4Range("10.1.0.0","10.1.255.255"),r)
+    self.assertEqual(r,c)
+    self.assertEqual(r.key(),c.key())
+    self.assertEqual(1,len(set([r,c,IPv4Range("10.1.0.0","10.1.255.255")])))
+    d = {r: "x"}
+    self.assertEqual("x",d[IPv4Range("10.1.0.0","10.1.255.255")])
+    self.assertFalse(r == "10.1.0.0/16")
+    self.assertTrue(r != IPv4Range("10.1.0.0","10.1.0.0"))
+
+class testIPv4RangeList(unittest.TestCase):
+  def setUp(self):
+    self.a = IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.255"),
+                            IPv4Range("10.0.1.0","10.0.1.255"),
+                            IPv4Range("10.0.0.128","10.0.0.200"),
+                            IPv4Range("10.0.5.0","10.0.5.255")])
+    self.b = IPv4RangeList([IPv4Range("10.0.1.128","10.0.5.15"),
+                            IPv4Range("192.168.0.0","192.168.0.255")])
+  def testCreate(self):
+    self.assertEqual("10.0.0.0-10.0.0.255,10.0.0.128-10.0.0.200,"
+                     "10.0.1.0-10.0.1.255,10.0.5.0-10.0.5.255",str(self.a))
+    self.assertRaises(ValueError,IPv4RangeList,["10.0.0.0"])
+  def testFromSorted(self):
+    r = IPv4RangeList.from_sorted(list(self.a))
+    self.assertEqual(str(self.a),str(r))
+    self.assertEqual(str(self.a),str(IPv4RangeList.from_iterable(self.a[::-1])))
+  def testExtend(self):
+    self.a.extend(self.b)
+    self.a.extend(IPv4Range("10.0.0.0","10.0.0.1"))
+    self.assertEqual(7,len(self.a))
+    self.assertEqual(sorted(self.a),list(self.a))
+    self.assertEqual("10.0.0.1",str(self.a[0].end))
+    self.assertRaises(ValueError,self.a.extend,"10.0.0.0")
+  def testNormalize(self):
+    self.a.normalize()
+    self.assertEqual("10.0.0.0-10.0.1.255,10.0.5.0-10.0.5.255",str(self.a))
+  def testAggregate(self):
+    l = IPv4RangeList([IPv4CIDR("10.0.0.0",IPv4NetMask(25)),
+                       IPv4CIDR("10.0.0.128",IPv4NetMask(25)),
+                       IPv4CIDR("10.0.1.0",IPv4NetMask(24)),
+                       IPv4CIDR("10.0.1.64",IPv4NetMask(26)),
+                       IPv4CIDR("10.0.3.0",IPv4NetMask(24))])
+    self.assertEqual(["10.0.0.0 - 10.0.1.255","10.0.3.0 - 10.0.3.255"],
+                     [str(c) for c in l.aggregate()])
+    self.assertEqual([23,24],[c.mask.nbits() for c in l.compact().aggregate()])
+  def testUnion(self):
+    self.assertEqual("10.0.0.0-10.0.5.255,192.168.0.0-192.168.0.255",
+                     str(self.a.union(self.b)))
+  def testIntersection(self):
+    self.assertEqual("10.0.1.128-10.0.1.255,10.0.5.0-10.0.5.15",
+                     str(self.a.intersection(self.b)))
+  def testDifference(self):
+    self.assertEqual("10.0.0.0-10.0.1.127,10.0.5.16-10.0.5.255",
+                     str(self.a.difference(self.b)))
+  def testSymmetricDifference(self):
+    self.assertEqual("10.0.0.0-10.0.1.127,10.0.2.0-10.0.4.255,"
+                     "10.0.5.16-10.0.5.255,192.168.0.0-192.168.0.255",
+                     str(self.a.symmetric_difference(self.b)))
+  def testEdges(self):
+    "ranges touching the top and bottom of the address space"
+    a = IPv4RangeList([IPv4Range("0.0.0.0","255.255.255.255")])
+    b = IPv4RangeList([IPv4Range("0.0.0.0","0.0.0.0"),
+                       IPv4Range("255.255.255.255","255.255.255.255")])
+    self.assertEqual("0.0.0.1-255.255.255.254",str(a.difference(b)))
+    self.assertEqual(str(b),str(a.intersection(b.compact())))
+  def testRangeDifference(self):
+    r = IPv4Range("10.0.0.0","10.0.0.255")
+    self.assertEqual("10.0.0.0-10.0.0.9,10.0.0.21-10.0.0.255",
+           str(r.difference(IPv4Range("10.0.0.10","10.0.0.20"))))
+    self.assertEqual("10.0.0.0-10.0.0.4,10.0.0.6-10.0.0.255",
+           str(r.subtract("10.0.0.5")))
+    self.assertEqual("",str(r.difference(IPv4Range("9.0.0.0","11.0.0.0"))))
+
+class testIPv4RangeArray(unittest.TestCase):
+  def setUp(self):
+    self.rl = IPv4RangeList([IPv4Range("10.0.0.0","10.0.0.255"),
+                             IPv4Range("192.168.1.0","192.168.1.127"),
+                             IPv4Range("172.16.0.0","172.16.255.255")])
+    self.ra = self.rl.compact()
+  def testCreate(self):
+    self.assertEqual(3,len(self.ra))
+    self.assertEqual(str(self.rl),str(self.ra))
+    self.assertEqual(4,self.ra.starts.itemsize)
+  def testIter(self):
+    self.assertEqual([str(r) for r in self.rl],[str(r) for r in self.ra])
+    self.assertEqual("172.16.0.0",str(self.ra[1].start))
+  def testContains(self):
+    self.assertTrue("10.0.0.7" in self.ra)
+    self.assertTrue(IPv4Addr("172.16.3.4") in self.ra)
+    self.assertTrue(IPv4Range("192.168.1.0","192.168.1.5") in self.ra)
+    self.assertFalse("192.168.1.128" in self.ra)
+    self.assertFalse("9.255.255.255" in self.ra)
+    self.assertFalse(IPv4Range("10.0.0.0","10.0.1.0") in self.ra)
+  def testOverlapping(self):
+    "a small range after a big one must not hide the big one"
+    self.ra.append(IPv4Range("10.0.0.0","10.255.255.255"))
+    self.ra.append(IPv4Range("10.1.0.0","10.1.0.3"))
+    self.assertTrue("10.2.0.0" in self.ra)
+    self.assertEqual("10.0.0.0",str(self.ra[0].start))
+    self.assertEqual("10.0.0.255",str(self.ra[0].end))
+  def testSpan(self):
+    self.assertEqual("10.0.0.0 - 192.168.1.127",str(self.ra.span()))
+  def testFind(self):
+    self.assertEqual(2,self.ra.find("192.168.1.1"))
+    self.assertEqual(-1,self.ra.find("192.168.2.1"))
+  def testBulk(self):
+    addrs = ["10.0.0.1","1.2.3.4","172.16.9.9","192.168.1.200"]
+    longs = [IPv4Addr(a).tolong() for a in addrs]
+    packed = "".join([IPv4Addr(a).bits for a in addrs])
+    for batch in (addrs,longs,packed):
+      self.assertEqual([1,0,1,0],[int(x) for x in self.ra.contains_many(batch)])
+      self.assertEqual([0,-1,1,-1],[int(x) for x in self.ra.find_many(batch)])
+    self.assertEqual([0,-1,1,-1],[int(x) for x in self.rl.find_many(addrs)])
+  def testAddrView(self):
+    v = self.ra.addrs()
+    self.assertEqual(256 + 65536 + 128,len(v))
+    self.assertEqual("172.16.0.0",str(v[256]))
+    self.assertEqual("192.168.1.127",str(v[-1]))
+    self.assertEqual(256 + 65536 + 5,v.index("192.168.1.5"))
+    w = v[250::10000]
+    self.assertEqual(["10.0.0.250","172.16.39.10","172.16.78.26"],
+                     [str(a) for a in w][:3])
+    self.assertEqual([int(a) for a in w],
+                     [int(x) for c in w.chunks(2) for x in c])
+    self.assertEqual(len(v),len(self.rl.addrs()))
+  def testSetOps(self):
+    other = IPv4RangeList([IPv4Range("10.0.0.128","10.0.1.255")])
+    self.assertEqual("10.0.0.0-10.0.1.255,172.16.0.0-172.16.255.255,"
+                     "192.168.1.0-192.168.1.127",str(self.ra.union(other)))
+    self.assertTrue(isinstance(self.ra.union(other),IPv4RangeArray))
+  def testBulkOverlapping(self):
+    self.ra.append(IPv4Range("10.0.0.0","10.255.255.255"))
+    self.ra.append(IPv4Range("10.1.0.0","10.1.0.3"))
+    addrs = ["10.0.0.1","10.1.0.2","10.2.0.0","11.0.0.0"]
+    self.assertEqual([1,1,1,0],[int(x) for x in self.ra.contains_many(addrs)])
+    self.assertEqual([1,2,1,-1],[int(x) for x in self.ra.find_many(addrs)])
+
+class testIPv4RangeMap(unittest.TestCase):
+  def setUp(self):
+    self.m = IPv4RangeMap([(IPv4Range("10.0.1.0","10.0.1.255"),"b"),
+                           (IPv4Range("10.0.0.0","10.0.0.255"),"a"),
+                           (IPv4Range("10.0.2.0","10.0.2.255"),"b"),
+                           (IPv4Range("10.0.4.0","10.0.4.255"),0)])
+  def testCreate(self):
+    "sorted and equal neighbours joined"
+    self.assertEqual("10.0.0.0-10.0.0.255:a,10.0.1.0-10.0.2.255:b,"
+                     "10.0.4.0-10.0.4.255:0",str(self.m))
+    self.assertEqual(3,len(self.m))
+    self.assertEqual(["10.0.1.0 - 10.0.2.255"],[str(r) for r in self.m][1:2])
+    self.assertEqual(["a","b",0],[v for r,v in self.m.items()])
+    self.assertRaises(ValueError,IPv4RangeMap,[("10.0.0.0","a")])
+  def testOverlappingCreate(self):
+    "later pairs win"
+    m = IPv4RangeMap([(IPv4Range("10.0.0.0","10.0.0.255"),"a"),
+                      (IPv4Range("10.0.0.16","10.0.0.31"),"b")])
+    self.assertEqual("10.0.0.0-10.0.0.15:a,10.0.0.16-10.0.0.31:b,"
+                     "10.0.0.32-10.0.0.255:a",str(m))
+  def testLookup(self):
+    self.assertEqual("b",self.m["10.0.2.9"])
+    self.assertEqual(0,self.m.get("10.0.4.0"))
+    self.assertEqual(None,self.m.get("10.0.3.0"))
+    self.assertEqual("x",self.m.get("10.0.3.0","x"))
+    self.assertRaises(KeyError,self.m.__getitem__,"10.0.3.0")
+    self.assertTrue("10.0.0.0" in self.m)
+    self.assertFalse("9.255.255.255" in self.m)
+    self.assertEqual(0,self.m.find("10.0.0.0"))
+    addrs = ["10.0.0.1","10.0.3.1","10.0.4.1","11.0.0.0"]
+    self.assertEqual([0,-1,2,-1],[int(x) for x in self.m.find_many(addrs)])
+    self.assertEqual(["a",None,0,None],self.m.get_many(addrs))
+    self.assertEqual([None],IPv4RangeMap().get_many(["10.0.0.1"]))
+  def testSet(self):
+    "setting splits what it overlaps and joins equal neighbours"
+    self.m.set(IPv4Range("10.0.1.128","10.0.1.255"),"c")
+    self.assertEqual("10.0.0.0-10.0.0.255:a,10.0.1.0-10.0.1.127:b,"
+                     "10.0.1.128-10.0.1.255:c,10.0.2.0-10.0.2.255:b,"
+                     "10.0.4.0-10.0.4.255:0",str(self.m))
+    self.m.set(IPv4Range("10.0.1.128","10.0.1.255"),"b")
+    self.assertEqual(3,len(self.m))
+    self.m.set(IPv4Range("10.0.3.0","10.0.3.255"),"b")
+    self.assertEqual("10.0.0.0-10.0.0.255:a,10.0.1.0-10.0.3.255:b,"
+                     "10.0.4.0-10.0.4.255:0",str(self.m))
+    self.m.set(IPv4Range("10.0.0.128","10.0.4.127"),"a")
+    self.assertEqual("10.0.0.0-10.0.4.127:a,10.0.4.128-10.0.4.255:0",
+                     str(self.m))
+    self.m.set(IPv4Range("0.0.0.0","255.255.255.255"),1)
+    self.assertEqual("0.0.0.0-255.255.255.255:1",str(self.m))
+  def testRemove(self):
+    self.m.remove(IPv4Range("10.0.2.0","10.0.4.127"))
+    self.assertEqual("10.0.0.0-10.0.0.255:a,10.0.1.0-10.0.1.255:b,"
+                     "10.0.4.128-10.0.4.255:0",str(self.m))
+    self.m.remove(IPv4Range("10.0.0.16","10.0.0.31"))
+    self.assertEqual(None,self.m.get("10.0.0.20"))
+    self.assertEqual("a",self.m.get("10.0.0.32"))
+    self.assertEqual("10.0.0.0-10.0.0.15,10.0.0.32-10.0.0.255,"
+                     "10.0.1.0-10.0.1.255,10.0.4.128-10.0.4.255",
+                     str(self.m.ranges()))
+  def testRandom(self):
+    "agrees with a dict of addresses after random sets and removes"
+    import random
+    rnd = random.Random(4)
+    m, d = IPv4RangeMap(), {}
+    for k in range(300):
+      s = rnd.randrange(200)
+      e = min(199,s + rnd.randrange(30))
+      v = rnd.randrange(3)
+      if rnd.random() < 0.2:
+        m.remove(IPv4Range(s,e))
+        for a in range(s,e + 1):
+          d.pop(a,None)
+      else:
+        m.set(IPv4Range(s,e),v)
+        for a in range(s,e + 1):
+          d[a] = v
+    self.assertEqual([d.get(a) for a in range(200)],m.get_many(range(200)))
+    rows = list(m.items())
+    for (r1,v1),(r2,v2) in zip(rows,rows[1:]):
+      self.assertTrue(r1.end.num < r2.start.num)
+      self.assertFalse(r1.end.num + 1 == r2.start.num and v1 == v2)
 
 def suite():
   suite = unittest.TestSuite()
@@ -133,6 +429,9 @@ def suite():
   suite.addTest(unittest.makeSuite(testIPv4NetMask))
   suite.addTest(unittest.makeSuite(testIPv4Range))
   suite.addTest(unittest.makeSuite(testIPv4CIDR))
+  suite.addTest(unittest.makeSuite(testIPv4RangeList))
+  suite.addTest(unittest.makeSuite(testIPv4RangeArray))
+  suite.addTest(unittest.makeSuite(testIPv4RangeMap))
   return suite
 
 if __name__ == "__main__":
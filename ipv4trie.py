@@ -0,0 +1,225 @@
+# ipv4trie - longest prefix match over IPv4 CIDR blocks.
+
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+from ipv4 import IPv4Addr, IPv4CIDR, IPv4NetMask, IPv4Range, _addrlong
+
+def _prefix(c):
+  "(start,nbits) for an IPv4CIDR or an 'a.b.c.d/n' string"
+  if isinstance(c,IPv4Range):
+    s = c.start.tolong()
+    return s, 32 - (c.end.tolong() - s).bit_length()
+  a,n = c.split("/")
+  n = int(n)
+  if n < 0 or n > 32:
+    raise ValueError("prefix length must be 0-32")
+  return IPv4Addr(a).tolong() & (0xFFFFFFFFL << (32 - n)) & 0xFFFFFFFFL, n
+
+def _common(a,b,n):
+  "length of the common prefix of a and b, at most n bits"
+  x = (a ^ b).bit_length()
+  return min(n,32 - x)
+
+class _Node(object):
+  __slots__ = ["key","plen","value","hasvalue","child"] # keep nodes small
+  def __init__(self,key,plen):
+    self.key = key
+    self.plen = plen
+    self.value = None
+    self.hasvalue = False
+    self.child = [None,None]
+  def cidr(self):
+    return IPv4CIDR(IPv4Addr(self.key),IPv4NetMask(self.plen))
+
+class IPv4Trie(object):
+  """path compressed binary (Patricia) trie of CIDR blocks with payloads
+
+  Every node branches on a bit, so a lookup visits at most 32 nodes, and
+  there are fewer than two nodes per stored prefix. Prefixes may be given
+  as IPv4CIDR objects or as 'a.b.c.d/n' strings."""
+  __slots__ = ["root","count","version"]
+  def __init__(self,items=[]):
+    self.root = None
+    self.count = 0
+    self.version = 0 # bumped by insert and delete, for caches
+    for c,v in items:
+      self.insert(c,v)
+  def __len__(self):
+    return self.count
+
+  def insert(self,c,value=None):
+    "add a prefix, or replace the payload of one already present"
+    k,l = _prefix(c)
+    link, i = self, None # where the current node hangs from
+    n = self.root
+    while n is not None:
+      m = _common(k,n.key,min(l,n.plen))
+      if m < n.plen: # n is not a prefix of k/l so split above n
+        if m == l:
+          new = _Node(k,l)
+        else:
+          new = _Node(k & ~(0xFFFFFFFFL >> m) & 0xFFFFFFFFL,m)
+        new.child[(n.key >> (31 - m)) & 1] = n
+        self._setlink(link,i,new)
+        if m != l:
+          leaf = _Node(k,l)
+          new.child[(k >> (31 - m)) & 1] = leaf
+          new = leaf
+        n = new
+        break
+      if l == n.plen:
+        break
+      link, i = n, (k >> (31 - n.plen)) & 1
+      n = n.child[i]
+    else:
+      n = _Node(k,l)
+      self._setlink(link,i,n)
+    if not n.hasvalue:
+      self.count += 1
+    n.value = value
+    n.hasvalue = True
+    self.version += 1
+
+  def _setlink(self,link,i,n):
+    if i is None:
+      self.root = n
+    else:
+      link.child[i] = n
+
+  def delete(self,c):
+    "remove a prefix, raising KeyError if it is not present"
+    k,l = _prefix(c)
+    path = [] # (parent,index) pairs down to n
+    link, i = self, None
+    n = self.root
+    while n is not None and n.plen <= l:
+      if _common(k,n.key,n.plen) < n.plen:
+        break
+      if n.plen == l:
+        if not n.hasvalue:
+          break
+        n.hasvalue = False
+        n.value = None
+        self.count -= 1
+        self.version += 1
+        # drop nodes left with no payload and fewer than two children
+        while n is not None and not n.hasvalue:
+          kids = [x for x in n.child if x is not None]
+          if len(kids) == 2:
+            break
+          self._setlink(link,i,kids and kids[0] or None)
+          n = link is not self and link or None
+          link, i = path and path.pop() or (self,None)
+        return
+      path.append((link,i))
+      link, i = n, (k >> (31 - n.plen)) & 1
+      n = n.child[i]
+    raise KeyError(c)
+
+  def _find(self,k,l):
+    n = self.root
+    while n is not None and n.plen <= l:
+      if _common(k,n.key,n.plen) < n.plen:
+        return None
+      if n.plen == l:
+        return n.hasvalue and n or None
+      n = n.child[(k >> (31 - n.plen)) & 1]
+    return None
+  def __contains__(self,c):
+    "is this exact prefix stored"
+    return self._find(*_prefix(c)) is not None
+  def __getitem__(self,c):
+    "payload of this exact prefix"
+    n = self._find(*_prefix(c))
+    if n is None:
+      raise KeyError(c)
+    return n.value
+
+  def _match(self,a):
+    "most specific node holding a payload that contains address a"
+    best = None
+    n = self.root
+    while n is not None:
+      if (a ^ n.key) >> (32 - n.plen):
+        break
+      if n.hasvalue:
+        best = n
+      if n.plen == 32:
+        break
+      n = n.child[(a >> (31 - n.plen)) & 1]
+    return best
+  def lookup(self,a):
+    "(IPv4CIDR,payload) of the longest prefix containing a, or None"
+    n = self._match(_addrlong(a))
+    return n is not None and (n.cidr(),n.value) or None
+  def get(self,a,default=None):
+    "payload of the longest prefix containing a, without building objects"
+    n = self._match(_addrlong(a))
+    if n is None:
+      return default
+    return n.value
+
+  def covering(self,c):
+    "generate (IPv4CIDR,payload) for stored prefixes containing c, widest first"
+    k,l = _prefix(c)
+    n = self.root
+    while n is not None and n.plen <= l:
+      if _common(k,n.key,n.plen) < n.plen:
+        break
+      if n.hasvalue:
+        yield n.cidr(),n.value
+      if n.plen == 32:
+        break
+      n = n.child[(k >> (31 - n.plen)) & 1]
+  def covered(self,c):
+    "generate (IPv4CIDR,payload) for stored prefixes inside c, in order"
+    k,l = _prefix(c)
+    n = self.root
+    while n is not None and n.plen < l:
+      if _common(k,n.key,n.plen) < n.plen:
+        return
+      n = n.child[(k >> (31 - n.plen)) & 1]
+    if n is not None and _common(k,n.key,l) == l:
+      for x in self._walk(n):
+        yield x
+  def _walk(self,n):
+    stack = [n]
+    while stack:
+      n = stack.pop()
+      if n.hasvalue:
+        yield n.cidr(),n.value
+      stack.extend([x for x in reversed(n.child) if x is not None])
+  def __iter__(self):
+    "generate (IPv4CIDR,payload) for every prefix in address order"
+    if self.root is not None:
+      return self._walk(self.root)
+    return iter([])
+
+if __name__ == "__main__":
+  print "This is an import module"
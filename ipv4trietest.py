@@ -0,0 +1,105 @@
+# ipv4trietest - unit test the ipv4trie module
+
+# Copyright (c) 2007,2011 Michael Dillon
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+
+#  -  Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  -  Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the distribution.
+#  -  Neither the name of the developing organization nor the names of its
+#     contributors may be used to endorse or promote products derived from
+#     this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest, random
+from ipv4 import *
+from ipv4trie import *
+
+class testIPv4Trie(unittest.TestCase):
+  def setUp(self):
+    self.t = IPv4Trie([("10.0.0.0/8","a"),
+                       ("10.1.0.0/16","b"),
+                       ("10.1.2.0/24","c"),
+                       ("10.1.3.0/24","d"),
+                       ("192.168.0.0/16","e")])
+  def testLookup(self):
+    self.assertEqual(5,len(self.t))
+    c,v = self.t.lookup("10.1.2.3")
+    self.assertEqual(("10.1.2.0 - 10.1.2.255","c"),(str(c),v))
+    self.assertEqual("b",self.t.get("10.1.4.1"))
+    self.assertEqual("a",self.t.get(IPv4Addr("10.200.0.1")))
+    self.assertEqual(None,self.t.lookup("11.0.0.0"))
+    self.assertEqual("x",self.t.get("11.0.0.0","x"))
+  def testCIDR(self):
+    c = IPv4CIDR("10.1.2.0",IPv4NetMask(24))
+    self.assertTrue(c in self.t)
+    self.assertEqual("c",self.t[c])
+    self.assertFalse("10.1.0.0/17" in self.t)
+  def testDefaultRoute(self):
+    self.t.insert("0.0.0.0/0","default")
+    self.assertEqual("default",self.t.get("8.8.8.8"))
+    self.t.insert("8.8.8.8/32","host")
+    self.assertEqual("host",self.t.get("8.8.8.8"))
+    self.assertEqual("default",self.t.get("8.8.8.9"))
+  def testDelete(self):
+    self.t.delete("10.1.0.0/16")
+    self.assertEqual("a",self.t.get("10.1.4.1"))
+    self.assertEqual("c",self.t.get("10.1.2.1"))
+    self.t.delete("10.1.2.0/24")
+    self.t.delete("10.1.3.0/24")
+    self.assertEqual("a",self.t.get("10.1.2.1"))
+    self.assertEqual(2,len(self.t))
+    self.assertRaises(KeyError,self.t.delete,"10.1.3.0/24")
+    self.assertRaises(KeyError,self.t.delete,"10.0.0.0/9")
+  def testCovering(self):
+    self.assertEqual(["a","b","c"],
+                     [v for c,v in self.t.covering("10.1.2.128/25")])
+  def testCovered(self):
+    self.assertEqual(["b","c","d"],
+                     [v for c,v in self.t.covered("10.1.0.0/16")])
+    self.assertEqual(["a","b","c","d","e"],[v for c,v in self.t])
+    self.assertEqual([],list(self.t.covered("11.0.0.0/8")))
+  def testRandom(self):
+    "compare against a brute force longest match"
+    rnd = random.Random(42)
+    prefixes = {}
+    t = IPv4Trie()
+    for i in range(300):
+      n = rnd.randint(0,32)
+      k = rnd.getrandbits(32) & (0xFFFFFFFFL << (32 - n)) & 0xFFFFFFFFL
+      prefixes[(k,n)] = i
+      t.insert("%s/%d" % (IPv4Addr(k),n),i)
+    for (k,n) in list(prefixes)[::3]:
+      t.delete("%s/%d" % (IPv4Addr(k),n))
+      del prefixes[(k,n)]
+    self.assertEqual(len(prefixes),len(t))
+    keys = [k for k,n in prefixes]
+    for i in range(300):
+      a = rnd.choice(keys) | rnd.getrandbits(rnd.randint(1,32))
+      best = [(n,v) for (k,n),v in prefixes.items()
+              if (a ^ k) >> (32 - n) == 0]
+      self.assertEqual(max(best)[1] if best else None,t.get(a))
+
+def suite():
+  suite = unittest.TestSuite()
+  suite.addTest(unittest.makeSuite(testIPv4Trie))
+  return suite
+
+if __name__ == "__main__":
+  unittest.TextTestRunner(verbosity=2).run(suite())
@@ -27,8 +27,14 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-import socket
+import socket, struct, bisect
+from array import array
+from ipv4 import _mergepairs, _combine, _cidrsplit, _RangeSetOps
 
+_structunpack = struct.unpack
+_structpack = struct.pack
+_bisectright = bisect.bisect_right
+_bisectleft = bisect.bisect_left
 _hdigs = ('0', '1', '2', '3', # hex digits for storing
           '4', '5', '6', '7', # numbers as hex strings
           '8', '9', 'A', 'B',
@@ -37,51 +43,501 @@ _hbits = ('0000', '0001', '0010', '0011', # hex bits for printing
           '0100', '0101', '0110', '0111', # numbers in binary format
           '1000', '1001', '1010', '1011',
           '1100', '1101', '1110', '1111')
+_all = (1L << 128) - 1
+_low = (1L << 64) - 1
+# addresses are stored as two unsigned 64-bit halves. Python 2 arrays have
+# no 'Q', and 'L' is only 32 bits on Windows and 32 bit builds, so there
+# the halves go in lists of longs instead
+if array('L').itemsize == 8:
+  def _col(values):
+    return array('L',values)
+else:
+  _col = list
 
 class IPv6Addr(object):
   "128 bit IPv6 addresses"
+  __slots__ = ["num"] # one native long, keeps instances small and fast
+
   def __init__(self,a):
-    "initialize from either a bit array or colon hex notation"
-    if isinstance(a,(list,tuple)):
-      self.addr = ""
-    elif isinstance(a,str):
-      self.addr = v6_inet_aton(a)
-
-#  def tobin(self):
-#    return ''.join([ ''.join((_hbits[ord(i)>>4],
-#                              _hbits[ord(i)&0xf])) for i in self.bits])
+    """initialize from colon hex notation, a 16 byte packed string, a long
+    int, or a list or tuple of 8 16-bit groups or 16 octets"""
+    if isinstance(a,str):
+      if len(a) == 16 and a.strip(_textchars):
+        self.num = _packedlong(a)
+      else:
+        self.num = _v6long(a)
+    elif isinstance(a,(long,int)):
+      if a < 0 or a > _all:
+        raise ValueError("IPv6 address out of range")
+      self.num = a
+    elif isinstance(a,(list,tuple)):
+      if len(a) == 8:
+        width = 16
+      elif len(a) == 16:
+        width = 8
+      else:
+        raise ValueError("need 8 groups or 16 octets for an IPv6 address")
+      n = 0L
+      for x in a:
+        if x < 0 or x >> width:
+          raise ValueError("IPv6 address group out of range")
+        n = n << width | x
+      self.num = n
+    elif isinstance(a,IPv6Addr):
+      self.num = a.num
+    else:
+      raise ValueError("cannot make an IPv6 address from %r" % (a,))
+
+  @property
+  def bits(self):
+    "the address as a 16 byte string in network order"
+    return _structpack("!QQ",self.num >> 64,self.num & _low)
+  addr = bits # older name for the packed form
+
+  def __str__(self):
+    "show it in the RFC 5952 compressed form"
+    return _v6str(self.num)
+
+  def __cmp__(self,other):
+    "make comparisons work"
+    return cmp(self.num,other.num)
+  def __eq__(self,other):
+    return isinstance(other,IPv6Addr) and self.num == other.num
+  def __ne__(self,other):
+    return not isinstance(other,IPv6Addr) or self.num != other.num
+  def __lt__(self,other):
+    return self.num < other.num
+  def __le__(self,other):
+    return self.num <= other.num
+  def __gt__(self,other):
+    return self.num > other.num
+  def __ge__(self,other):
+    return self.num >= other.num
+  def __hash__(self):
+    return hash(self.num)
+  def __long__(self):
+    return self.num
+  def __int__(self):
+    return self.num
+
+  def __add__(self,n):
+    return _mkaddr((self.num + n) & _all)
+  __radd__ = __add__
+  def __sub__(self,n):
+    "address minus an int is an address, minus an address is an int"
+    if isinstance(n,IPv6Addr):
+      return self.num - n.num
+    return _mkaddr((self.num - n) & _all)
+  def __lshift__(self,n):
+    return _mkaddr((self.num << n) & _all)
+  def __rshift__(self,n):
+    return _mkaddr(self.num >> n)
+  def __or__(self,m):
+    return _mkaddr(self.num | m.num)
+  def __xor__(self,m):
+    return _mkaddr(self.num ^ m.num)
+  def __and__(self,m):
+    return _mkaddr(self.num & m.num)
+
+  def tobin(self):
+    return ''.join([_hbits[int(i,16)] for i in self.tohex()])
   def tohex(self):
-    return ''.join([ ''.join((_hdigs[ord(i)>>4],
-                              _hdigs[ord(i)&0xf])) for i in self.addr])
+    return '%032X' % self.num
   def tonorm(self):
     abytes = self.tohex()
     return ':'.join([abytes[i:i+4] for i in range(0,32,4)])
+  def tolong(self):
+    return long(self.num)
+
+_newaddr = IPv6Addr.__new__
+def _mkaddr(n):
+  "build an IPv6Addr from a long known to be in range, skipping __init__"
+  a = _newaddr(IPv6Addr)
+  a.num = n
+  return a
+
+class IPv6NetMask(object):
+  __slots__ = ["numbits","num"] # reduce storage required for an instance
+  def __init__(self,b):
+    "a mask of the first b of 128 bits"
+    if b>=0 and b<=128:
+      self.numbits = b
+      self.num = _all - ((1L<<(128 - b))-1)
+    else:
+      raise ValueError("IPv6NetMask init")
+  def __str__(self):
+    return "/%d" % self.numbits
+  def nbits(self):
+    return self.numbits
+  def inversemask(self):
+    "the host part of the mask, as a long int"
+    return ~self.num & _all
+  def __len__(self):
+    return 2**(128-self.numbits)
+
+_netmasks = [IPv6NetMask(n) for n in range(129)] # shared, never modified
+
+class IPv6Range(object):
+  __slots__ = ["start","end"] # reduce storage required for an instance
+  def __init__(self,s,e):
+    if isinstance(s,IPv6Addr):
+      self.start = s
+    else:
+      self.start = IPv6Addr(s)
+    if isinstance(e,IPv6Addr):
+      self.end = e
+    else:
+      self.end = IPv6Addr(e)
+  def __str__(self):
+    return str(self.start) + " - " + str(self.end)
+  def size(self):
+    "number of addresses, which may be too big for len()"
+    return self.end.num - self.start.num + 1
+  def __len__(self):
+    return self.size()
+  def key(self):
+    "sort key, ordering by start then end"
+    return self.start.num << 128 | self.end.num
+  def __cmp__(self,other):
+    return cmp(self.key(),other.key())
+  def __eq__(self,other):
+    return isinstance(other,IPv6Range) and self.key() == other.key()
+  def __ne__(self,other):
+    return not self == other
+  def __hash__(self):
+    return hash(self.key())
+  def __contains__(self,r):
+    "does self contain the argument range or address"
+    if not isinstance(r,IPv6Range):
+      if not isinstance(r,IPv6Addr):
+        r = IPv6Addr(r)
+      return self.start.num <= r.num <= self.end.num
+    return self.start.num <= r.start.num and r.end.num <= self.end.num
+  def __iter__(self): #generate all addrs in range
+    n = self.start.num
+    while n <= self.end.num:
+      yield _mkaddr(n)
+      n += 1
+  def overlaps(self,r):
+    "does self overlap the argument range"
+    return self.start.num <= r.end.num and r.start.num <= self.end.num
+  def adjacent(self,r):
+    "are the two ranges adjacent"
+    return self.end.num + 1 == r.start.num or r.end.num + 1 == self.start.num
+  def join(self,other):
+    "combine two continuous ranges"
+    if self.overlaps(other) or self.adjacent(other):
+      return IPv6Range(_mkaddr(min(self.start.num,other.start.num)),
+                       _mkaddr(max(self.end.num,other.end.num)))
+    raise ArithmeticError("Cannot join Ranges that are not continuous.")
+  def difference(self,other):
+    "subtract another range returning a list of ranges"
+    if not isinstance(other,IPv6Range):
+      other = IPv6Range(other,other) # create range of 1 addr
+    return IPv6RangeList._frompairs(_combine([(self.start.num,self.end.num)],
+                                             [(other.start.num,other.end.num)],
+                                             _opdiff))
+  subtract = difference
+  def to_cidrs(self):
+    "generate the minimal list of IPv6CIDR blocks covering the range"
+    for s,n in _cidrsplit(self.start.num,self.end.num,128):
+      yield _mkcidr(s,n)
+
+def _opdiff(a,b): return a and not b
+
+class IPv6CIDR(IPv6Range):
+  __slots__ = ["mask"] # start and end come from IPv6Range
+  def __init__(self,s,m):
+    "from an address and an IPv6NetMask or prefix length"
+    if not isinstance(m,IPv6NetMask):
+      if m < 0 or m > 128:
+        raise ValueError("IPv6CIDR prefix length must be 0 to 128")
+      m = _netmasks[m]
+    self.mask = m
+    if not isinstance(s,IPv6Addr):
+      s = IPv6Addr(s)
+    self.start = _mkaddr(s.num & m.num)
+    self.end = _mkaddr(s.num & m.num | m.inversemask())
+  def __str__(self):
+    return str(self.start) + str(self.mask)
+
+_newcidr = IPv6CIDR.__new__
+def _mkcidr(s,n):
+  "build an IPv6CIDR from an aligned start and prefix length"
+  c = _newcidr(IPv6CIDR)
+  c.mask = _netmasks[n]
+  c.start = _mkaddr(s)
+  c.end = _mkaddr(s | (_all >> n))
+  return c
+
+def _addrlong(a):
+  "convert an address in any of the accepted forms to a long int"
+  if isinstance(a,IPv6Addr):
+    return a.num
+  elif isinstance(a,(long,int)):
+    return a
+  return IPv6Addr(a).num
+
+def _pairs(x):
+  "sorted (start,end) pairs from a range, range list or range array"
+  if isinstance(x,IPv6RangeArray):
+    return x._iterpairs()
+  if isinstance(x,IPv6Range):
+    return [(x.start.num,x.end.num)]
+  return [(r.start.num,r.end.num) for r in x]
+
+class _Range6SetOps(_RangeSetOps):
+  "the IPv4 set algebra, which only needs sorted pairs of longs"
+  __slots__ = ()
+  _topairs = staticmethod(_pairs)
+  def aggregate(self):
+    "generate the smallest set of IPv6CIDR blocks covering the same addresses"
+    for s,e in _mergepairs(_pairs(self)):
+      for b,n in _cidrsplit(s,e,128):
+        yield _mkcidr(b,n)
+
+def _rangekey(r):
+  "cheap sort key for ranges, orders the same as IPv6Range.__cmp__"
+  return r.start.num << 128 | r.end.num
+
+class IPv6RangeList(list,_Range6SetOps):
+  def __init__(self,items=[]):
+    "collect all the ranges then sort them once"
+    items = list(items)
+    for i in items:
+      if not isinstance(i,IPv6Range):
+        raise ValueError("Can only append ranges to a rangelist")
+    list.extend(self,items)
+    list.sort(self,key=_rangekey)
+  @classmethod
+  def from_iterable(cls,items):
+    "build from ranges in any order"
+    return cls(items)
+  @classmethod
+  def from_sorted(cls,items):
+    "build from ranges already in sorted order, nothing is checked"
+    r = cls()
+    list.extend(r,items)
+    return r
+  @classmethod
+  def _frompairs(cls,pairs):
+    "build from sorted (start,end) pairs without re-sorting"
+    r = cls()
+    list.extend(r,[IPv6Range(_mkaddr(s),_mkaddr(e)) for s,e in pairs])
+    return r
+  def span(self): #return smallest block spanning all ranges
+    return IPv6Range(self[0].start,
+                     _mkaddr(max([r.end.num for r in self])))
+  def __str__(self):
+    return ",".join([str(i.start) + "-" + str(i.end) for i in self])
+  def __contains__(self,other):
+    for i in self:
+      if other in i:
+        return True
+    return False
+  def append(self,r):
+    if isinstance(r,IPv6Range): #don't add to end, put it where it belongs
+      super(IPv6RangeList, self).insert(bisect.bisect(self,r),r)
+    else:
+      raise ValueError("Can only append ranges to a rangelist")
+  def extend(self,x):
+    if isinstance(x,(IPv6RangeList,IPv6RangeArray)): # then merge lists
+      list.extend(self,x)
+      # both halves are sorted runs so this is a linear time merge
+      list.sort(self,key=_rangekey)
+    elif isinstance(x,IPv6Range): #then do an append operation
+      self.append(x)
+    else:
+      raise ValueError("Can only extend rangelists with range or rangelist")
+  def sort(self,cmpfunc=None):
+    pass # It's already sorted so this is a no-op
+  def normalize(self):
+    "join any adjacent or overlapping ranges, in place"
+    self[:] = IPv6RangeList._frompairs(_mergepairs(_pairs(self)))
+  def compact(self):
+    "return an IPv6RangeArray holding the same ranges"
+    return IPv6RangeArray(self)
+
+def _bisect128(hi,lo,n):
+  """index after the last (hi,lo) pair <= n in two sorted columns, using
+  one C bisect on the high halves and one inside the run of equal ones"""
+  h, l = n >> 64, n & _low
+  i = _bisectright(hi,h)
+  return _bisectright(lo,l,_bisectleft(hi,h,0,i),i)
+
+class IPv6RangeArray(_Range6SetOps):
+  """sorted list of ranges stored as parallel arrays of 64-bit halves
+
+  Each range costs 32 bytes. Membership is a binary search over the
+  starts; iterating or indexing hands out IPv6Range views built on
+  demand."""
+  __slots__ = ["starthi","startlo","endhi","endlo","_maxhi","_maxlo"]
+  def __init__(self,items=[]):
+    pairs = [(i.start.num,i.end.num) for i in items]
+    if not isinstance(items,(IPv6RangeList,IPv6RangeArray)):
+      pairs.sort()
+    self._setpairs(pairs)
+  def _setpairs(self,pairs):
+    self.starthi = _col([s >> 64 for s,e in pairs])
+    self.startlo = _col([s & _low for s,e in pairs])
+    self.endhi = _col([e >> 64 for s,e in pairs])
+    self.endlo = _col([e & _low for s,e in pairs])
+    self._maxhi = self._maxlo = None
+  @classmethod
+  def _frompairs(cls,pairs):
+    "build from sorted (start,end) pairs without re-sorting"
+    r = cls()
+    r._setpairs(list(pairs))
+    return r
+  def _start(self,i):
+    return self.starthi[i] << 64 | self.startlo[i]
+  def _end(self,i):
+    return self.endhi[i] << 64 | self.endlo[i]
+  def _iterpairs(self):
+    for sh,sl,eh,el in zip(self.starthi,self.startlo,self.endhi,self.endlo):
+      yield sh << 64 | sl, eh << 64 | el
+  def _maxend(self,i):
+    "running maximum of the ends, so overlapping ranges can be searched"
+    if self._maxhi is None:
+      m, overlaps, prev = [], False, -1
+      for s,e in self._iterpairs():
+        if s <= prev:
+          overlaps = True
+        prev = max(prev,e)
+        m.append(prev)
+      if overlaps:
+        self._maxhi = _col([x >> 64 for x in m])
+        self._maxlo = _col([x & _low for x in m])
+      else:
+        self._maxhi, self._maxlo = self.endhi, self.endlo
+    return self._maxhi[i] << 64 | self._maxlo[i]
+  def __len__(self):
+    return len(self.starthi)
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return IPv6RangeArray._frompairs(list(self._iterpairs())[i])
+    return IPv6Range(_mkaddr(self._start(i)),_mkaddr(self._end(i)))
+  def __iter__(self):
+    for s,e in self._iterpairs():
+      yield IPv6Range(_mkaddr(s),_mkaddr(e))
+  def __str__(self):
+    return ",".join([_v6str(s) + "-" + _v6str(e) for s,e in self._iterpairs()])
+  def __contains__(self,other):
+    "is the address or range inside any one of the ranges"
+    if isinstance(other,IPv6Range):
+      s, e = other.start.num, other.end.num
+    else:
+      s = e = _addrlong(other)
+    i = _bisect128(self.starthi,self.startlo,s) - 1
+    return i >= 0 and self._maxend(i) >= e
+  def find(self,a):
+    "index of the last range containing the address, or -1"
+    a = _addrlong(a)
+    i = _bisect128(self.starthi,self.startlo,a) - 1
+    while i >= 0 and self._maxend(i) >= a:
+      if self._end(i) >= a:
+        return i
+      i -= 1
+    return -1
+  def contains_many(self,addrs):
+    """membership for a batch of addresses, given as any iterable of
+    addresses or a string of packed 16 byte addresses"""
+    return array('B',[self.find(a) >= 0 for a in _addrlongs(addrs)])
+  def find_many(self,addrs):
+    "index of the matching range for a batch of addresses, -1 if none"
+    return array('l',[self.find(a) for a in _addrlongs(addrs)])
+  def append(self,r):
+    "insert a range where it belongs"
+    if not isinstance(r,IPv6Range):
+      raise ValueError("Can only append ranges to a rangearray")
+    s, e = r.start.num, r.end.num
+    i = _bisect128(self.starthi,self.startlo,s)
+    while i > 0 and self._start(i-1) == s and self._end(i-1) > e:
+      i -= 1
+    self.starthi.insert(i,s >> 64)
+    self.startlo.insert(i,s & _low)
+    self.endhi.insert(i,e >> 64)
+    self.endlo.insert(i,e & _low)
+    self._maxhi = self._maxlo = None
+  def span(self): #return smallest block spanning all ranges
+    return IPv6Range(_mkaddr(self._start(0)),_mkaddr(self._maxend(-1)))
+  def normalize(self):
+    "join any adjacent or overlapping ranges, in place"
+    self._setpairs(_mergepairs(self._iterpairs()))
+  def torangelist(self):
+    "return an IPv6RangeList of IPv6Range objects"
+    return IPv6RangeList(self)
+
+def _addrlongs(addrs):
+  "long ints from an iterable of addresses or a packed string of them"
+  if isinstance(addrs,(str,buffer,bytearray)):
+    addrs = str(addrs)
+    return [_packedlong(addrs[i:i+16]) for i in xrange(0,len(addrs),16)]
+  return [_addrlong(a) for a in addrs]
 
 # IPv6 helper functions
 
-_zeroaddr = ["0000", "0000", "0000", "0000", "0000", "0000", "0000", "0000"]
+_textchars = "0123456789abcdefABCDEF:."
+def _packedlong(b):
+  "16 byte network order string to a long int"
+  hi, lo = _structunpack("!QQ",b)
+  return hi << 64 | lo
+
 _sockinetaton = socket.inet_aton
-def v6_inet_aton(a):
-  "converts RFC 4291 string format to internal binary octets"
+_inetpton = getattr(socket,"inet_pton",None)
+def _v6long(a):
+  "RFC 4291 text to a long int, through the C library when it has one"
+  if _inetpton is not None:
+    try:
+      return _packedlong(_inetpton(socket.AF_INET6,a))
+    except (socket.error,ValueError,TypeError):
+      raise ValueError("%r is not an IPv6 address" % (a,))
+  return _v6parse(a)
+
+def _v6parse(a):
+  "RFC 4291 text to a long int, in python"
   c = a.split("::")
   if len(c) > 2: raise ValueError("Only one :: allowed by RFC 4291")
-  if len(c) == 1: c.insert(0,"")
-  if c[1].rfind(".") >= 0: # if dots in second part, parse out IPv4 quad
-    rightparts = c[1].rsplit(":") 
-    if len(rightparts) == 1:
-      rbits = _sockinetaton(rightparts[0]).encode("hex_codec")
-      c[1] = [rbits[:4],rbits[4:]]
+  parts = []
+  for p in c:
+    groups = p and p.split(":") or []
+    if groups and "." in groups[-1]: # trailing IPv4 dotted quad
+      q = _structunpack("!L",_sockinetaton(groups.pop()))[0]
+      groups = [int(g,16) for g in groups] + [q >> 16,q & 0xffff]
     else:
-      rbits = _sockinetaton(rightparts[-1]).encode("hex_codec")
-      c[1] = [ b.zfill(4) for b in rightparts[0:-1]] +\
-             [rbits[:4],rbits[4:]]
+      groups = [int(g,16) for g in groups]
+    parts.append(groups)
+  if len(parts) == 2:
+    groups = parts[0] + [0]*(8 - len(parts[0]) - len(parts[1])) + parts[1]
   else:
-    c[1] = [ b.zfill(4) for b in c[1].split(":")]
-  if c[0] != "": c[0] = [ b.zfill(4) for b in c[0].split(":")]
-  #print " @ ",c[0]," @ ",c[1]
-  return "".join(["".join(c[0]),
-                  "".join(_zeroaddr[0:8-(len(c[0])+len(c[1]))]),
-                  "".join(c[1])]).decode("hex_codec")
+    groups = parts[0]
+  if len(groups) != 8 or [g for g in groups if g < 0 or g > 0xffff]:
+    raise ValueError("%r is not an IPv6 address" % (a,))
+  n = 0L
+  for g in groups:
+    n = n << 16 | g
+  return n
+
+def v6_inet_aton(a):
+  "converts RFC 4291 string format to internal binary octets"
+  n = _v6long(a)
+  return _structpack("!QQ",n >> 64,n & _low)
+
+def _v6str(n):
+  "RFC 5952 text, with the longest run of two or more zero groups as ::"
+  g = [(n >> s) & 0xffff for s in range(112,-1,-16)]
+  best, bestlen, i = -1, 1, 0
+  while i < 8:
+    j = i
+    while j < 8 and g[j] == 0:
+      j += 1
+    if j - i > bestlen:
+      best, bestlen = i, j - i
+    i = max(j,i + 1)
+  h = ["%x" % x for x in g]
+  if best < 0:
+    return ":".join(h)
+  return ":".join(h[:best]) + "::" + ":".join(h[best + bestlen:])
 
 if __name__ == "__main__":
   print "This is an import module"
@@ -29,6 +29,7 @@
 
 import unittest
 from ipv6 import *
+import ipv6
 
 class testIPv6Addr(unittest.TestCase):
   def setUp(self):
@@ -147,10 +148,123 @@ class testIPv6Addr(unittest.TestCase):
       self.assertEqual(a.tohex().upper(),j.upper())
   def testInOut(self):
     self.assertEqual(self.text.upper(),self.addr.tonorm().upper())
+  def testParse(self):
+    "the pure python parser agrees with the C library"
+    from ipv6 import _v6parse
+    for i,j in zip(self.v6addrs,self.v6bits):
+      self.assertEqual("%032X" % _v6parse(i),j.upper())
+    for bad in ["1::2::3","1:2:3","12345::","1:2:3:4:5:6:7:8:9"]:
+      self.assertRaises(ValueError,_v6parse,bad)
+      self.assertRaises(ValueError,IPv6Addr,bad)
+  def testCreate(self):
+    a = IPv6Addr([0x2002,0x4b20,0,0,0,0,0xa2,7])
+    self.assertEqual(self.addr,a)
+    self.assertEqual(a,IPv6Addr(a.bits))
+    self.assertEqual(a,IPv6Addr(a.num))
+    self.assertEqual(a,IPv6Addr(list(bytearray(a.bits))))
+    self.assertEqual(v6_inet_aton(self.text),a.addr)
+    self.assertRaises(ValueError,IPv6Addr,[1,2,3])
+    self.assertRaises(ValueError,IPv6Addr,1L << 128)
+  def testStr(self):
+    self.assertEqual("2002:4b20::a2:7",str(self.addr))
+    self.assertEqual("::",str(IPv6Addr("::")))
+    self.assertEqual("::1",str(IPv6Addr("::1")))
+    self.assertEqual("2001:db8:0:1:1:1:1:1",str(IPv6Addr("2001:db8:0:1:1:1:1:1")))
+    self.assertEqual("2001:db8::1:0:0:1",str(IPv6Addr("2001:db8:0:0:1:0:0:1")))
+  def testArith(self):
+    a = IPv6Addr("2001:db8::ffff")
+    self.assertEqual("2001:db8::1:0",str(a + 1))
+    self.assertEqual(0xffff,a - IPv6Addr("2001:db8::"))
+    self.assertEqual("::",str(IPv6Addr("ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff") + 1))
+    self.assertEqual(1,len(set([a,IPv6Addr("2001:DB8:0::FFFF")])))
+    self.assertTrue(a < a + 1)
+
+class testIPv6Range(unittest.TestCase):
+  def setUp(self):
+    self.r = IPv6Range("2001:db8::","2001:db8::ffff")
+  def testContains(self):
+    self.assertTrue("2001:db8::10" in self.r)
+    self.assertFalse("2001:db8::1:0" in self.r)
+    self.assertTrue(IPv6Range("2001:db8::4","2001:db8::8") in self.r)
+    self.assertEqual(0x10000,self.r.size())
+  def testCIDR(self):
+    c = IPv6CIDR("2001:db8:1:2:3:4:5:6",48)
+    self.assertEqual("2001:db8:1::/48",str(c))
+    self.assertEqual("2001:db8:1:ffff:ffff:ffff:ffff:ffff",str(c.end))
+    self.assertEqual(1L << 80,c.size())
+    self.assertEqual("2001:db8::1/128",str(IPv6CIDR("2001:db8::1",128)))
+    self.assertRaises(ValueError,IPv6CIDR,"2001:db8::1",-1)
+    self.assertRaises(ValueError,IPv6CIDR,"2001:db8::1",129)
+  def testToCIDRs(self):
+    r = IPv6Range("2001:db8::1","2001:db8::6")
+    self.assertEqual(["2001:db8::1/128","2001:db8::2/127","2001:db8::4/127",
+                      "2001:db8::6/128"],[str(c) for c in r.to_cidrs()])
+    r = IPv6Range("::","ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff")
+    self.assertEqual(["::/0"],[str(c) for c in r.to_cidrs()])
+  def testDifference(self):
+    self.assertEqual("2001:db8::-2001:db8::f,2001:db8::11-2001:db8::ffff",
+                     str(self.r.difference("2001:db8::10")))
+
+class testIPv6RangeList(unittest.TestCase):
+  def setUp(self):
+    self.rl = IPv6RangeList([IPv6CIDR("2001:db8:1::",48),
+                             IPv6CIDR("2001:db8::",48),
+                             IPv6CIDR("2001:db8:1:5::",64),
+                             IPv6CIDR("fe80::",10)])
+    self.ra = self.rl.compact()
+  def testSorted(self):
+    self.assertEqual(["2001:db8::","2001:db8:1::","2001:db8:1:5::","fe80::"],
+                     [str(r.start) for r in self.rl])
+    self.assertEqual(str(self.rl),str(self.ra))
+    self.assertEqual(4,len(self.ra))
+    self.assertEqual("2001:db8:1::",str(self.ra[1].start))
+  def testArrayContains(self):
+    self.assertTrue("2001:db8:1:6::1" in self.ra)
+    self.assertTrue("febf::1" in self.ra)
+    self.assertFalse("2001:db8:2::" in self.ra)
+    self.assertFalse("::1" in self.ra)
+    self.assertTrue(IPv6CIDR("2001:db8:1:7::",64) in self.ra)
+    self.assertEqual(2,self.ra.find("2001:db8:1:5::1"))
+    self.assertEqual(1,self.ra.find("2001:db8:1:6::1"))
+    self.assertEqual([1,0],list(self.ra.contains_many(["2001:db8::1","::"])))
+    packed = IPv6Addr("fe80::1").bits + IPv6Addr("::2").bits
+    self.assertEqual([3,-1],list(self.ra.find_many(packed)))
+  def testAppend(self):
+    self.ra.append(IPv6Range("2001:db8:1::","2001:db8:1::1"))
+    self.assertEqual("2001:db8:1::1",str(self.ra[1].end))
+    self.assertTrue("2001:db8:1:6::" in self.ra)
+  def testNormalize(self):
+    self.rl.normalize()
+    self.assertEqual("2001:db8::-2001:db8:1:ffff:ffff:ffff:ffff:ffff,"
+                     "fe80::-febf:ffff:ffff:ffff:ffff:ffff:ffff:ffff",
+                     str(self.rl))
+    self.ra.normalize()
+    self.assertEqual(str(self.rl),str(self.ra))
+    self.assertEqual(["2001:db8::/47","fe80::/10"],
+                     [str(c) for c in self.ra.aggregate()])
+  def testSetOps(self):
+    other = IPv6RangeList([IPv6CIDR("2001:db8:1::",56)])
+    self.assertEqual("2001:db8:1::-2001:db8:1:ff:ffff:ffff:ffff:ffff",
+                     str(self.rl.intersection(other)))
+    self.assertTrue(isinstance(self.ra.difference(other),IPv6RangeArray))
+    self.assertEqual(3,len(self.ra.difference(other)))
+
+class testIPv6RangeListColumns(testIPv6RangeList):
+  "the range array tests again, with the list columns of 32 bit builds"
+  def setUp(self):
+    self.col = ipv6._col
+    ipv6._col = list
+    testIPv6RangeList.setUp(self)
+    self.assertTrue(isinstance(self.ra.starthi,list))
+  def tearDown(self):
+    ipv6._col = self.col
 
 def suite():
   suite = unittest.TestSuite()
   suite.addTest(unittest.makeSuite(testIPv6Addr))
+  suite.addTest(unittest.makeSuite(testIPv6Range))
+  suite.addTest(unittest.makeSuite(testIPv6RangeList))
+  suite.addTest(unittest.makeSuite(testIPv6RangeListColumns))
   return suite
 
 if __name__ == "__main__":